@@ -0,0 +1,168 @@
+import numpy as np
+
+from quaternion import QuaternionArray
+
+# Canal -> taille d'une valeur ; la rotation est un quaternion unitaire (w, x, y, z)
+CHANNELS = {"position": 3, "rotation": 4, "scale": 3}
+
+
+class Track:
+    """Images clés d'un canal d'un objet : temps (K,) croissants en secondes et valeurs (K, D).
+
+    Avec `loop`, la piste reprend au début après sa dernière clé ; sinon
+    elle reste sur la première avant `times[0]` et sur la dernière après.
+    """
+    def __init__(self, obj, channel, times, values, loop=True):
+        if channel not in CHANNELS:
+            raise ValueError(f"canal inconnu : {channel!r}")
+        self.obj = obj
+        self.channel = channel
+        self.times = np.asarray(times, dtype=np.float64).reshape(-1)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.times), CHANNELS[channel])
+        if not len(self.times) or np.any(np.diff(self.times) <= 0):
+            raise ValueError("les temps des clés doivent être strictement croissants")
+        if channel == "rotation":
+            self.values = QuaternionArray(self.values).normalize().data
+        self.loop = loop
+
+    @property
+    def duration(self):
+        return float(self.times[-1] - self.times[0])
+
+
+class Animator:
+    """Échantillonne toutes les pistes actives en une passe vectorisée et l'applique aux objets.
+
+    Les pistes sont regroupées par canal et nombre de clés : chaque groupe
+    est évalué d'un bloc (recherche du segment, lerp des positions et
+    échelles, slerp des rotations sur des tableaux (N, 4)). Les matrices
+    locales des objets animés sont ensuite composées par lots : pour un
+    objet à piste de rotation, aucun calcul de quaternion n'est fait en
+    Python, et chaque objet ne reçoit qu'un appel `set_transform`.
+    Les canaux sans piste gardent la valeur courante de l'objet.
+    """
+    def __init__(self):
+        self._tracks = {}  # (objet, canal) -> Track
+        self._groups = None
+        self.stats = {"tracks": 0, "objects": 0}
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def add_track(self, obj, channel, times, values, loop=True):
+        """Ajoute (ou remplace) la piste `channel` de `obj` ; renvoie la Track."""
+        track = Track(obj, channel, times, values, loop)
+        self._tracks[(obj, channel)] = track
+        self._groups = None
+        return track
+
+    def remove(self, obj):
+        """Retire toutes les pistes d'un objet."""
+        for channel in CHANNELS:
+            self._tracks.pop((obj, channel), None)
+        self._groups = None
+
+    def clear(self):
+        self._tracks = {}
+        self._groups = None
+
+    def update(self, time):
+        """Pose les objets animés à l'instant `time` (secondes) ; renvoie le nombre d'objets mis à jour."""
+        if self._groups is None:
+            self._build()
+        objects, groups = self._groups
+        if not objects:
+            return 0
+
+        count = len(objects)
+        sampled = {channel: np.empty((count, size)) for channel, size in CHANNELS.items()}
+        animated = {channel: np.zeros(count, dtype=bool) for channel in CHANNELS}
+        for channel, rows, times, values, loop in groups:
+            sampled[channel][rows] = _sample(channel, times, values, loop, time)
+            animated[channel][rows] = True
+
+        # Canaux non animés et paramètres fixes (pivot, cisaillement) lus sur les objets
+        pivots = np.array([obj._pivot for obj in objects], dtype=np.float64)
+        shears = np.array([obj._sheer for obj in objects], dtype=np.float64)
+        for channel, attribute in (("position", "_position"), ("scale", "_scale")):
+            for row in np.flatnonzero(~animated[channel]).tolist():
+                sampled[channel][row] = getattr(objects[row], attribute)
+        rotations = np.empty((count, 3, 3))
+        rotated = animated["rotation"]
+        rotations[rotated] = QuaternionArray(sampled["rotation"][rotated]).to_rotation_matrices()
+        for row in np.flatnonzero(~rotated).tolist():
+            rotations[row] = objects[row].get_rotation_matrix()
+
+        # M = T(pivot + position) . R . Sh . S . T(-pivot), comme Object3D.get_local_matrix
+        linear = (rotations @ shears) * sampled["scale"][:, None, :]
+        matrices = np.zeros((count, 4, 4))
+        matrices[:, :3, :3] = linear
+        matrices[:, :3, 3] = pivots + sampled["position"] - np.einsum("nij,nj->ni", linear, pivots)
+        matrices[:, 3, 3] = 1
+
+        positions = sampled["position"].tolist()
+        rotation_values = sampled["rotation"].tolist()
+        scales = sampled["scale"].tolist()
+        has_position = animated["position"].tolist()
+        has_rotation = animated["rotation"].tolist()
+        has_scale = animated["scale"].tolist()
+        for row, obj in enumerate(objects):
+            obj.set_transform(
+                position=positions[row] if has_position[row] else None,
+                rotation=rotation_values[row] if has_rotation[row] else None,
+                scale=scales[row] if has_scale[row] else None,
+                local_matrix=matrices[row],
+            )
+        return count
+
+    def _build(self):
+        """Objets animés et groupes de pistes (canal, nombre de clés) empilés en tableaux."""
+        objects = list(dict.fromkeys(obj for obj, _ in self._tracks))
+        rows = {obj: row for row, obj in enumerate(objects)}
+        grouped = {}
+        for (obj, channel), track in self._tracks.items():
+            grouped.setdefault((channel, len(track.times)), []).append(track)
+        groups = []
+        for (channel, _), tracks in grouped.items():
+            groups.append((
+                channel,
+                np.array([rows[track.obj] for track in tracks], dtype=np.int64),
+                np.array([track.times for track in tracks]),
+                np.array([track.values for track in tracks]),
+                np.array([track.loop for track in tracks]),
+            ))
+        self._groups = (objects, groups)
+        self.stats = {"tracks": len(self._tracks), "objects": len(objects)}
+
+
+def spin_keys(axis, period, start=(1.0, 0.0, 0.0, 0.0), steps=3):
+    """(temps, rotations) d'un tour complet autour de `axis` (repère parent) en `period` secondes, depuis `start`.
+
+    `steps` segments de moins d'un demi-tour : le slerp suit alors la bonne
+    direction et la vitesse angulaire reste constante.
+    """
+    times = np.linspace(0.0, period, steps + 1)
+    spins = QuaternionArray.from_axis_angle(np.broadcast_to(axis, (steps + 1, 3)), 2 * np.pi * times / period)
+    return times, (spins * QuaternionArray(start)).data
+
+
+def _sample(channel, times, values, loop, time):
+    """Valeurs (M, D) de M pistes de K clés (times (M, K), values (M, K, D)) à l'instant `time`."""
+    count, keys = times.shape
+    if keys == 1:
+        return values[:, 0]
+    start, end = times[:, 0], times[:, -1]
+    local = np.full(count, float(time))
+    # Pistes en boucle : temps ramené dans [start, end)
+    local = np.where(loop, start + np.mod(local - start, end - start), local)
+    local = np.clip(local, start, end)
+
+    # Segment [k, k + 1] contenant le temps local, puis fraction dans ce segment
+    segment = (times[:, 1:-1] <= local[:, None]).sum(axis=1)
+    index = np.arange(count)
+    t0, t1 = times[index, segment], times[index, segment + 1]
+    fraction = np.clip((local - t0) / (t1 - t0), 0.0, 1.0)
+    a, b = values[index, segment], values[index, segment + 1]
+    if channel == "rotation":
+        return QuaternionArray.slerp(a, b, fraction).data
+    return a + (b - a) * fraction[:, None]
@@ -0,0 +1,301 @@
+"""Benchmarks des parties critiques du moteur.
+
+Usage :
+    python bench.py obj [fichiers.obj ...] [--grid N] [--repeat R]
+    python bench.py quaternion [--count N] [--repeat R]
+    python bench.py quaternion-scalar [--reference ancien_quaternion.py] [--number N]
+    python bench.py engine [--objects 1 100 10000] [--frames N] [--output resultats.json] [--profile] [--no-lod]
+
+Le benchmark `engine` tourne sans écran (pilote SDL offscreen par défaut) :
+sous Mesa, LIBGL_ALWAYS_SOFTWARE=1 force le rendu logiciel llvmpipe.
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import math
+import os
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+
+def best_time(function, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def write_grid_obj(path, n):
+    """Écrit une grille n x n de quads texturés avec normales (v/vt/vn)."""
+    xs, zs = np.meshgrid(np.arange(n + 1, dtype=np.float64), np.arange(n + 1, dtype=np.float64))
+    ys = np.sin(xs * 0.1) * np.cos(zs * 0.1)
+    idx = np.arange((n + 1) * (n + 1)).reshape(n + 1, n + 1) + 1
+    a, b = idx[:-1, :-1].ravel(), idx[:-1, 1:].ravel()
+    c, d = idx[1:, 1:].ravel(), idx[1:, :-1].ravel()
+    with open(path, 'w') as file:
+        file.write("o grid\n")
+        np.savetxt(file, np.stack([xs.ravel(), ys.ravel(), zs.ravel()], axis=1), fmt="v %.6f %.6f %.6f")
+        np.savetxt(file, np.stack([xs.ravel() / n, zs.ravel() / n], axis=1), fmt="vt %.6f %.6f")
+        file.write("vn 0 1 0\n")
+        np.savetxt(file, np.stack([a, a, b, b, c, c, d, d], axis=1), fmt="f %d/%d/1 %d/%d/1 %d/%d/1 %d/%d/1")
+
+
+def bench_obj(paths, repeat):
+    from obj_loader import load_obj, count_lines
+
+    print(f"{'fichier':<40} {'Mo':>8} {'lignes':>10} {'temps (s)':>10} {'lignes/s':>12} {'Mo/s':>8}")
+    for path in paths:
+        size_mb = os.path.getsize(path) / 1e6
+        lines = count_lines(path)
+        seconds, _ = best_time(lambda: load_obj(path), repeat)
+        print(f"{os.path.basename(path):<40} {size_mb:>8.2f} {lines:>10} {seconds:>10.4f} "
+              f"{lines / seconds:>12.0f} {size_mb / seconds:>8.1f}")
+
+
+def bench_quaternion_array(count, repeat):
+    from quaternion import QuaternionArray
+
+    rng = np.random.default_rng(0)
+    a = QuaternionArray.random(count, rng)
+    b = QuaternionArray.random(count, rng)
+    vectors = rng.normal(size=(count, 3))
+    qa, qb = a.to_quaternions(), b.to_quaternions()
+    vector_list = vectors.tolist()
+
+    cases = [
+        ("produit", lambda: [x * y for x, y in zip(qa, qb)], lambda: a * b),
+        ("normalize", lambda: [x.normalize() for x in qa], lambda: a.normalize()),
+        ("conjugate", lambda: [x.conjugate() for x in qa], lambda: a.conjugate()),
+        ("inverse", lambda: [x.inverse() for x in qa], lambda: a.inverse()),
+        ("rotate (N vecteurs)", lambda: [x.rotate_vector(v) for x, v in zip(qa, vector_list)], lambda: a.rotate(vectors)),
+        ("rotate (1 quaternion)", lambda: [qa[0].rotate_vector(v) for v in vector_list], lambda: a[:1].rotate(vectors)),
+        ("to_rotation_matrix", lambda: [x.to_rotation_matrix() for x in qa], lambda: a.to_rotation_matrices()),
+        ("slerp", None, lambda: QuaternionArray.slerp(a, b, 0.5)),
+        ("nlerp", None, lambda: QuaternionArray.nlerp(a, b, 0.5)),
+    ]
+
+    print(f"{count} quaternions")
+    print(f"{'opération':<24} {'Quaternion (ms)':>16} {'QuaternionArray (ms)':>21} {'gain':>8}")
+    for name, scalar, vectorized in cases:
+        vector_time, _ = best_time(vectorized, repeat)
+        if scalar is None:
+            print(f"{name:<24} {'-':>16} {vector_time * 1e3:>21.3f} {'-':>8}")
+            continue
+        scalar_time, _ = best_time(scalar, repeat)
+        print(f"{name:<24} {scalar_time * 1e3:>16.3f} {vector_time * 1e3:>21.3f} {scalar_time / vector_time:>7.0f}x")
+
+
+def scalar_quaternion_cases(Quaternion):
+    """Un appel par méthode publique de Quaternion (nom, fonction sans argument)."""
+    q1 = Quaternion(0.7, 0.1, -0.5, 0.3)
+    q2 = Quaternion(0.2, -0.9, 0.4, 0.1)
+    unit = q1.normalize()
+    vector = (1.0, -2.0, 0.5)
+    matrix = q1.to_matrix()
+    rotation = unit.to_rotation_matrix()
+    cases = [
+        ("__add__", lambda: q1 + q2),
+        ("__sub__", lambda: q1 - q2),
+        ("__mul__ (quaternion)", lambda: q1 * q2),
+        ("__mul__ (scalaire)", lambda: q1 * 2.0),
+        ("conjugate", lambda: q1.conjugate()),
+        ("norm", lambda: q1.norm()),
+        ("normalize", lambda: q1.normalize()),
+        ("inverse", lambda: unit.inverse()),
+        # La référence renvoyait le conjugué, faux pour un quaternion non unitaire
+        ("inverse (non unitaire)", lambda: q1.inverse()),
+        ("rotate_vector", lambda: unit.rotate_vector(vector)),
+        ("to_matrix", lambda: q1.to_matrix()),
+        ("from_matrix", lambda: Quaternion.from_matrix(matrix)),
+        ("to_rotation_matrix", lambda: unit.to_rotation_matrix()),
+        ("to_rotation_matrix (neuf)", lambda: Quaternion(0.7, 0.1, -0.5, 0.3).to_rotation_matrix()),
+        ("from_rotation_matrix", lambda: Quaternion.from_rotation_matrix(rotation)),
+        ("random", lambda: Quaternion.random()),
+        ("__repr__", lambda: repr(q1)),
+    ]
+    if hasattr(Quaternion, "imul"):
+        acc = Quaternion(1, 0, 0, 0)
+        cases.append(("imul", lambda: acc.imul(unit).inormalize()))
+        cases.append(("inormalize", lambda: acc.inormalize()))
+    return cases
+
+
+def bench_scalar_quaternion(reference, number):
+    from quaternion import Quaternion
+
+    reference_cases = {}
+    if reference:
+        spec = importlib.util.spec_from_file_location("reference_quaternion", reference)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        reference_cases = dict(scalar_quaternion_cases(module.Quaternion))
+
+    print(f"{'méthode':<28} {'ns/appel':>10} {'référence':>10} {'gain':>7}")
+    for name, function in scalar_quaternion_cases(Quaternion):
+        # Mesures alternées pour que le bruit de la machine touche les deux versions
+        ns = ref = float('inf')
+        for _ in range(7):
+            ns = min(ns, timeit.timeit(function, number=number) / number * 1e9)
+            if name in reference_cases:
+                ref = min(ref, timeit.timeit(reference_cases[name], number=number) / number * 1e9)
+        if name in reference_cases:
+            print(f"{name:<28} {ns:>10.0f} {ref:>10.0f} {ref / ns:>6.2f}x")
+        else:
+            print(f"{name:<28} {ns:>10.0f} {'-':>10} {'-':>7}")
+
+
+def flythrough(camera, t):
+    """Caméra scriptée : tour de la scène en regardant l'origine, hauteur oscillante."""
+    radius = 30.0
+    angle = 0.4 * t
+    height = 8.0 * math.sin(0.25 * t)
+    camera.pos = np.array([radius * math.sin(angle), height, radius * math.cos(angle)], dtype=np.float32)
+    camera.yaw = -math.degrees(angle)
+    camera.pitch = -math.degrees(math.atan2(height, radius))
+
+
+def frame_time_stats(seconds):
+    ms = np.asarray(seconds) * 1e3
+    return {
+        "mean": float(ms.mean()),
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "min": float(ms.min()),
+        "max": float(ms.max()),
+    }
+
+
+def bench_engine(object_counts, frames, warmup, dt, render_mode, path, profile=False, lod=True):
+    """Rend `frames` frames par taille de scène avec un pas de temps fixe ; renvoie un dict JSON."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+    if os.environ["SDL_VIDEODRIVER"] == "offscreen":
+        # Le pilote offscreen crée son contexte via EGL, PyOpenGL doit suivre
+        os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    import pygame
+    from OpenGL.GL import glFinish, glGetString, GL_RENDERER, GL_VERSION
+    from main import Engine
+    from scene import build_grid_scene
+
+    engine = Engine(render_mode=render_mode, hidden=True)
+    engine.init_gl()
+    engine.lod = lod
+    if profile:
+        engine.toggle_profiler()
+    results = {
+        "renderer": glGetString(GL_RENDERER).decode(),
+        "gl_version": glGetString(GL_VERSION).decode(),
+        "render_mode": render_mode,
+        "mesh": path,
+        "lod": lod,
+        "frames": frames,
+        "dt": dt,
+        "scenes": [],
+    }
+
+    for count in object_counts:
+        engine.set_scene(build_grid_scene(engine.textures, count, path, streamer=engine.streamer))
+        engine.streamer.finish()  # mesures sur les assets définitifs, pas sur les placeholders
+        engine.profiler.frames.clear()
+        times = []
+        for frame in range(warmup + frames):
+            pygame.event.pump()
+            flythrough(engine.camera, frame * dt)
+            engine.profiler.begin_frame()
+            start = time.perf_counter()
+            stats = engine.render_frame(dt=dt)
+            # glFinish pour mesurer le travail GPU de la frame, pas seulement sa soumission
+            engine.profiler.begin("finish")
+            glFinish()
+            engine.profiler.end()
+            engine.profiler.begin("flip")
+            pygame.display.flip()
+            engine.profiler.end()
+            elapsed = time.perf_counter() - start
+            engine.profiler.end_frame()
+            engine.clock.tick()  # horloge non plafonnée
+            if frame >= warmup:
+                times.append(elapsed)
+
+        frame_ms = frame_time_stats(times)
+        result = {
+            "objects": count,
+            "frame_ms": frame_ms,
+            "fps": 1e3 / frame_ms["mean"],
+            "draw_calls": stats["draw_calls"],
+            "vertices": stats["vertices"],
+            "state_changes": stats["state_changes"],
+            "visible": stats["visible"],
+            "culled": stats["culled"],
+        }
+        summary = engine.profiler.summary()
+        if summary is not None:
+            # Phases de premier niveau seulement, le détail par objet est dans les exports
+            result["phases_ms"] = {name: ms for name, (depth, ms) in summary["phases"].items() if depth == 0}
+            result["gl_counters"] = summary["counters"]
+        results["scenes"].append(result)
+
+    engine.set_scene({})
+    pygame.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    obj = sub.add_parser("obj", help="débit du chargeur OBJ")
+    obj.add_argument("paths", nargs="*")
+    obj.add_argument("--grid", type=int, default=500, help="taille de la grille synthétique (0 pour désactiver)")
+    obj.add_argument("--repeat", type=int, default=3)
+
+    quaternion = sub.add_parser("quaternion", help="QuaternionArray contre Quaternion")
+    quaternion.add_argument("--count", type=int, default=100000)
+    quaternion.add_argument("--repeat", type=int, default=3)
+
+    scalar = sub.add_parser("quaternion-scalar", help="micro-benchmark de chaque méthode de Quaternion")
+    scalar.add_argument("--reference", help="autre version de quaternion.py à comparer")
+    scalar.add_argument("--number", type=int, default=100000)
+
+    engine = sub.add_parser("engine", help="temps de frame du moteur sur un survol scripté, en JSON")
+    engine.add_argument("--objects", type=int, nargs="+", default=[1, 100, 10000])
+    engine.add_argument("--frames", type=int, default=300)
+    engine.add_argument("--warmup", type=int, default=30)
+    engine.add_argument("--dt", type=float, default=1 / 60, help="pas de temps simulé par frame (s)")
+    engine.add_argument("--mode", default="retained", choices=["retained", "immediate"])
+    engine.add_argument("--mesh", default="assets/objs/cube.obj")
+    engine.add_argument("--output", help="fichier JSON (sortie standard par défaut)")
+    engine.add_argument("--profile", action="store_true", help="ajoute le temps par phase et les compteurs GL")
+    engine.add_argument("--no-lod", dest="lod", action="store_false", help="toujours dessiner les meshes complets")
+
+    args = parser.parse_args()
+    if args.command == "obj":
+        paths = args.paths or sorted(glob.glob("assets/objs/*.obj"))
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.grid:
+                grid_path = os.path.join(tmp, f"grid_{args.grid}.obj")
+                write_grid_obj(grid_path, args.grid)
+                paths = paths + [grid_path]
+            bench_obj(paths, args.repeat)
+    elif args.command == "quaternion":
+        bench_quaternion_array(args.count, args.repeat)
+    elif args.command == "quaternion-scalar":
+        bench_scalar_quaternion(args.reference, args.number)
+    elif args.command == "engine":
+        results = bench_engine(args.objects, args.frames, args.warmup, args.dt, args.mode, args.mesh, args.profile, args.lod)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+        else:
+            print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+import heapq
+import math
+
+import numpy as np
+
+NULL = -1
+MORTON_BITS = 10  # bits par axe des codes de Morton de la construction en bloc
+REBUILD_FRACTION = 0.25  # au-delà de cette part de feuilles déplacées, refit reconstruit l'arbre en bloc
+
+
+class BVH:
+    """Arbre dynamique d'AABB sur des objets (culling, picking, requêtes de voisinage).
+
+    Les boîtes sont des tuples (x0, y0, z0, x1, y1, z1). Chaque feuille garde
+    la boîte exacte de son objet et une boîte élargie de `margin` : tant que
+    l'objet reste dans cette dernière, un déplacement ne touche pas l'arbre.
+    Sinon la feuille est retirée puis réinsérée (choix du frère par coût de
+    surface, rééquilibrage par rotations comme le b2DynamicTree de Box2D).
+    Insertion, suppression et mise à jour sont en O(log n).
+
+    `bounds_of(objet)` donne la boîte monde d'un objet ; les objets signalés
+    par `mark_moved` sont remis à jour en une fois par `refit`.
+    """
+    def __init__(self, bounds_of=None, margin=0.1):
+        self.bounds_of = bounds_of
+        self.margin = margin
+        self.clear()
+
+    def clear(self):
+        self.root = NULL
+        self._boxes = []   # boîte du noeud (élargie pour une feuille)
+        self._tight = []   # boîte exacte de l'objet, None pour un noeud interne
+        self._parent = []
+        self._left = []
+        self._right = []
+        self._height = []  # 0 pour une feuille
+        self._items = []
+        self._free = []
+        self._leaves = {}  # objet -> feuille
+        self._moved = set()
+
+    def __len__(self):
+        return len(self._leaves)
+
+    def __contains__(self, item):
+        return item in self._leaves
+
+    def __iter__(self):
+        return iter(self._leaves)
+
+    @property
+    def height(self):
+        return self._height[self.root] if self.root != NULL else 0
+
+    # Construction et modifications
+
+    def build(self, items, boxes=None):
+        """Remplace le contenu par `items`, construit en bloc avec numpy.
+
+        Les feuilles sont triées selon le code de Morton de leur centre puis
+        regroupées deux à deux, niveau par niveau : des voisines dans l'espace
+        finissent sous le même parent. Bien plus rapide que des insertions
+        successives pour charger une scène entière.
+        """
+        self.clear()
+        items = list(items)
+        if not items:
+            return
+        if boxes is None:
+            boxes = [self.bounds_of(item) for item in items]
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(len(items), 6)
+        order = np.argsort(morton_codes((boxes[:, :3] + boxes[:, 3:]) / 2), kind="stable")
+        boxes = boxes[order]
+        count = len(items)
+
+        # Feuilles aux indices 0..count-1, noeuds internes ensuite
+        total = 2 * count - 1
+        node_boxes = np.empty((total, 6))
+        node_boxes[:count, :3] = boxes[:, :3] - self.margin
+        node_boxes[:count, 3:] = boxes[:, 3:] + self.margin
+        parent = np.full(total, NULL, dtype=np.int64)
+        left = np.full(total, NULL, dtype=np.int64)
+        right = np.full(total, NULL, dtype=np.int64)
+        height = np.zeros(total, dtype=np.int64)
+
+        level = np.arange(count)
+        next_node = count
+        while len(level) > 1:
+            pairs = len(level) // 2
+            lefts, rights = level[0:2 * pairs:2], level[1:2 * pairs:2]
+            nodes = np.arange(next_node, next_node + pairs)
+            node_boxes[nodes, :3] = np.minimum(node_boxes[lefts, :3], node_boxes[rights, :3])
+            node_boxes[nodes, 3:] = np.maximum(node_boxes[lefts, 3:], node_boxes[rights, 3:])
+            height[nodes] = 1 + np.maximum(height[lefts], height[rights])
+            left[nodes], right[nodes] = lefts, rights
+            parent[lefts] = parent[rights] = nodes
+            next_node += pairs
+            # Un noeud impair remonte tel quel au niveau suivant
+            level = np.concatenate([nodes, level[2 * pairs:]])
+
+        self.root = int(level[0])
+        self._boxes = [tuple(box) for box in node_boxes.tolist()]
+        self._tight = [tuple(box) for box in boxes.tolist()] + [None] * (total - count)
+        self._parent = parent.tolist()
+        self._left = left.tolist()
+        self._right = right.tolist()
+        self._height = height.tolist()
+        self._items = [items[index] for index in order.tolist()] + [None] * (total - count)
+        self._leaves = {item: leaf for leaf, item in enumerate(self._items[:count])}
+
+    def insert(self, item, box=None):
+        if item in self._leaves:
+            self.remove(item)
+        box = self._box(item, box)
+        leaf = self._allocate_leaf(item, box)
+        self._insert_leaf(leaf)
+        return leaf
+
+    def remove(self, item):
+        leaf = self._leaves.pop(item)
+        self._moved.discard(item)
+        self._remove_leaf(leaf)
+        self._release(leaf)
+
+    def update(self, item, box=None):
+        """Nouvelle boîte d'un objet ; renvoie True si la feuille a dû être réinsérée."""
+        leaf = self._leaves[item]
+        box = self._box(item, box)
+        self._tight[leaf] = box
+        if _contains(self._boxes[leaf], box):
+            return False
+        self._remove_leaf(leaf)
+        self._boxes[leaf] = self._fatten(box)
+        self._insert_leaf(leaf)
+        return True
+
+    def mark_moved(self, item):
+        """À brancher sur les déplacements des objets ; la mise à jour est différée jusqu'à `refit`."""
+        if item in self._leaves:
+            self._moved.add(item)
+
+    def refit(self):
+        """Met à jour les objets déplacés depuis le dernier appel ; renvoie le nombre de réinsertions.
+
+        Quand une grande part de la scène a bougé (sous-arbre entier du graphe
+        de scène déplacé), une construction en bloc coûte moins que les
+        réinsertions une à une ; elle compte alors pour tous les objets.
+        """
+        if len(self._moved) > REBUILD_FRACTION * len(self._leaves):
+            self.build(list(self._leaves))
+            return len(self._leaves)
+        reinserted = 0
+        # Les objets signalés pendant la boucle attendent le prochain refit
+        moved, self._moved = self._moved, set()
+        for item in moved:
+            reinserted += self.update(item)
+        return reinserted
+
+    # Requêtes
+
+    def query_aabb(self, box):
+        """Objets dont la boîte chevauche `box`."""
+        box = tuple(map(float, box))
+        return self._query(lambda node: _overlaps(node, box))
+
+    def query_sphere(self, center, radius):
+        """Objets dont la boîte touche la sphère (centre, rayon)."""
+        x, y, z = map(float, center)
+        radius_sq = float(radius) ** 2
+
+        def test(box):
+            dx = max(box[0] - x, 0.0, x - box[3])
+            dy = max(box[1] - y, 0.0, y - box[4])
+            dz = max(box[2] - z, 0.0, z - box[5])
+            return dx * dx + dy * dy + dz * dz <= radius_sq
+        return self._query(test)
+
+    def query_frustum(self, planes):
+        """Objets dont la boîte coupe le frustum (plans de frustum.frustum_planes).
+
+        Les plans dont un noeud est entièrement du bon côté ne sont plus testés
+        dans son sous-arbre ; un sous-arbre entièrement dedans est pris sans test.
+        """
+        result = []
+        if self.root == NULL:
+            return result
+        planes = [(a, b, c, d, abs(a), abs(b), abs(c)) for a, b, c, d in np.asarray(planes, dtype=np.float64).tolist()]
+        stack = [(self.root, planes)]
+        while stack:
+            node, active = stack.pop()
+            box = self._boxes[node] if self._height[node] else self._tight[node]
+            cx, cy, cz = (box[0] + box[3]) / 2, (box[1] + box[4]) / 2, (box[2] + box[5]) / 2
+            ex, ey, ez = (box[3] - box[0]) / 2, (box[4] - box[1]) / 2, (box[5] - box[2]) / 2
+            remaining = []
+            for plane in active:
+                a, b, c, d, abs_a, abs_b, abs_c = plane
+                distance = a * cx + b * cy + c * cz + d
+                extent = abs_a * ex + abs_b * ey + abs_c * ez
+                if distance < -extent:
+                    break
+                if distance < extent:
+                    remaining.append(plane)
+            else:
+                if not remaining:
+                    self._collect(node, result)
+                elif self._height[node]:
+                    stack.append((self._left[node], remaining))
+                    stack.append((self._right[node], remaining))
+                else:
+                    result.append(self._items[node])
+        return result
+
+    def query_ray(self, origin, direction, max_distance=math.inf):
+        """Générateur de (distance d'entrée, objet) pour les boîtes touchées par le rayon, par distance croissante.
+
+        `direction` n'a pas besoin d'être normée : les distances sont en
+        multiples de sa longueur. Le parcours est paresseux, on peut s'arrêter
+        dès que la distance dépasse celle du meilleur résultat déjà trouvé.
+        """
+        if self.root == NULL:
+            return
+        origin = tuple(map(float, origin))
+        inverse = tuple(1.0 / d if d else math.inf for d in map(float, direction))
+        heap = []
+        self._push_ray(heap, self.root, origin, inverse, max_distance)
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if self._height[node]:
+                self._push_ray(heap, self._left[node], origin, inverse, max_distance)
+                self._push_ray(heap, self._right[node], origin, inverse, max_distance)
+            else:
+                yield distance, self._items[node]
+
+    def _push_ray(self, heap, node, origin, inverse, max_distance):
+        # Feuilles testées sur la boîte exacte : leur distance est définitive
+        box = self._boxes[node] if self._height[node] else self._tight[node]
+        distance = ray_box(origin, inverse, box, max_distance)
+        if distance is not None:
+            heapq.heappush(heap, (distance, node))
+
+    def _query(self, test):
+        result = []
+        if self.root == NULL:
+            return result
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if self._height[node]:
+                if test(self._boxes[node]):
+                    stack.append(self._left[node])
+                    stack.append(self._right[node])
+            elif test(self._tight[node]):
+                result.append(self._items[node])
+        return result
+
+    def _collect(self, node, result):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if self._height[node]:
+                stack.append(self._left[node])
+                stack.append(self._right[node])
+            else:
+                result.append(self._items[node])
+
+    # Noeuds
+
+    def _box(self, item, box):
+        if box is None:
+            box = self.bounds_of(item)
+        return tuple(float(value) for value in box)
+
+    def _fatten(self, box):
+        m = self.margin
+        return (box[0] - m, box[1] - m, box[2] - m, box[3] + m, box[4] + m, box[5] + m)
+
+    def _allocate(self, box):
+        if self._free:
+            node = self._free.pop()
+            self._boxes[node] = box
+            self._tight[node] = None
+            self._parent[node] = self._left[node] = self._right[node] = NULL
+            self._height[node] = 0
+            self._items[node] = None
+            return node
+        self._boxes.append(box)
+        self._tight.append(None)
+        self._parent.append(NULL)
+        self._left.append(NULL)
+        self._right.append(NULL)
+        self._height.append(0)
+        self._items.append(None)
+        return len(self._boxes) - 1
+
+    def _allocate_leaf(self, item, box):
+        leaf = self._allocate(self._fatten(box))
+        self._tight[leaf] = box
+        self._items[leaf] = item
+        self._leaves[item] = leaf
+        return leaf
+
+    def _release(self, node):
+        self._items[node] = None
+        self._tight[node] = None
+        self._free.append(node)
+
+    def _insert_leaf(self, leaf):
+        if self.root == NULL:
+            self.root = leaf
+            self._parent[leaf] = NULL
+            return
+
+        # Descente vers le frère qui augmente le moins la surface totale
+        leaf_box = self._boxes[leaf]
+        index = self.root
+        while self._height[index]:
+            box = self._boxes[index]
+            area = _area(box)
+            combined_area = _union_area(box, leaf_box)
+            cost = 2.0 * combined_area
+            inheritance = 2.0 * (combined_area - area)
+            child_costs = []
+            for child in (self._left[index], self._right[index]):
+                child_box = self._boxes[child]
+                child_cost = _union_area(leaf_box, child_box) + inheritance
+                if self._height[child]:
+                    child_cost -= _area(child_box)
+                child_costs.append(child_cost)
+            if cost < child_costs[0] and cost < child_costs[1]:
+                break
+            index = self._left[index] if child_costs[0] < child_costs[1] else self._right[index]
+
+        sibling = index
+        old_parent = self._parent[sibling]
+        parent = self._allocate(_union(leaf_box, self._boxes[sibling]))
+        self._parent[parent] = old_parent
+        self._height[parent] = self._height[sibling] + 1
+        if old_parent != NULL:
+            if self._left[old_parent] == sibling:
+                self._left[old_parent] = parent
+            else:
+                self._right[old_parent] = parent
+        else:
+            self.root = parent
+        self._left[parent] = sibling
+        self._right[parent] = leaf
+        self._parent[sibling] = parent
+        self._parent[leaf] = parent
+        self._refit_from(parent, inserted=True)
+
+    def _remove_leaf(self, leaf):
+        if leaf == self.root:
+            self.root = NULL
+            return
+        parent = self._parent[leaf]
+        grand_parent = self._parent[parent]
+        sibling = self._right[parent] if self._left[parent] == leaf else self._left[parent]
+        self._release(parent)
+        if grand_parent == NULL:
+            self.root = sibling
+            self._parent[sibling] = NULL
+            return
+        if self._left[grand_parent] == parent:
+            self._left[grand_parent] = sibling
+        else:
+            self._right[grand_parent] = sibling
+        self._parent[sibling] = grand_parent
+        self._refit_from(grand_parent)
+
+    def _refit_from(self, index, inserted=False):
+        """Rééquilibre et recalcule les boîtes de `index` jusqu'à la racine.
+
+        Après une insertion, `index` est le nouveau parent, déjà à jour mais
+        dont les ancêtres ne le sont pas encore : il ne sert pas d'arrêt anticipé.
+        """
+        boxes, height = self._boxes, self._height
+        while index != NULL:
+            balanced = self._balance(index)
+            left, right = self._left[balanced], self._right[balanced]
+            new_height = 1 + max(height[left], height[right])
+            new_box = _union(boxes[left], boxes[right])
+            if not inserted and balanced == index and new_height == height[index] and new_box == boxes[index]:
+                # Rien n'a changé à ce niveau : les ancêtres sont déjà à jour
+                return
+            inserted = False
+            height[balanced] = new_height
+            boxes[balanced] = new_box
+            index = self._parent[balanced]
+
+    def _balance(self, a):
+        """Rotation AVL autour de `a` si ses sous-arbres diffèrent de plus d'un niveau ; renvoie la nouvelle racine locale."""
+        height, boxes, parent = self._height, self._boxes, self._parent
+        if height[a] < 2:
+            return a
+        b, c = self._left[a], self._right[a]
+        balance = height[c] - height[b]
+        if balance > 1:
+            up, down, keep = c, b, True
+        elif balance < -1:
+            up, down, keep = b, c, False
+        else:
+            return a
+
+        # `up` remonte à la place de `a` ; son plus grand enfant reste sous lui
+        f, g = self._left[up], self._right[up]
+        self._left[up] = a
+        parent[up] = parent[a]
+        parent[a] = up
+        if parent[up] != NULL:
+            if self._left[parent[up]] == a:
+                self._left[parent[up]] = up
+            else:
+                self._right[parent[up]] = up
+        else:
+            self.root = up
+
+        taller, shorter = (f, g) if height[f] > height[g] else (g, f)
+        self._right[up] = taller
+        if keep:
+            self._right[a] = shorter
+        else:
+            self._left[a] = shorter
+        parent[shorter] = a
+        boxes[a] = _union(boxes[down], boxes[shorter])
+        height[a] = 1 + max(height[down], height[shorter])
+        boxes[up] = _union(boxes[a], boxes[taller])
+        height[up] = 1 + max(height[a], height[taller])
+        return up
+
+
+def morton_codes(points):
+    """Codes de Morton (entrelacement des bits x, y, z) de points quantifiés sur leur boîte englobante."""
+    lower = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - lower, 1e-12)
+    scale = (1 << MORTON_BITS) - 1
+    cells = ((points - lower) / span * scale).astype(np.uint64)
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(MORTON_BITS):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return codes
+
+
+def _union(a, b):
+    # Expressions conditionnelles plutôt que min/max : c'est la fonction la plus appelée de l'arbre
+    return (a[0] if a[0] < b[0] else b[0], a[1] if a[1] < b[1] else b[1], a[2] if a[2] < b[2] else b[2],
+            a[3] if a[3] > b[3] else b[3], a[4] if a[4] > b[4] else b[4], a[5] if a[5] > b[5] else b[5])
+
+
+def _union_area(a, b):
+    """_area(_union(a, b)) sans construire la boîte intermédiaire."""
+    dx = (a[3] if a[3] > b[3] else b[3]) - (a[0] if a[0] < b[0] else b[0])
+    dy = (a[4] if a[4] > b[4] else b[4]) - (a[1] if a[1] < b[1] else b[1])
+    dz = (a[5] if a[5] > b[5] else b[5]) - (a[2] if a[2] < b[2] else b[2])
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+
+def _area(box):
+    dx, dy, dz = box[3] - box[0], box[4] - box[1], box[5] - box[2]
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] <= inner[2]
+            and inner[3] <= outer[3] and inner[4] <= outer[4] and inner[5] <= outer[5])
+
+
+def _overlaps(a, b):
+    return (a[0] <= b[3] and b[0] <= a[3] and a[1] <= b[4] and b[1] <= a[4]
+            and a[2] <= b[5] and b[2] <= a[5])
+
+
+def ray_box(origin, inverse, box, max_distance):
+    """Distance d'entrée du rayon dans la boîte (0 si l'origine est dedans), None s'il la manque (méthode des slabs)."""
+    near, far = 0.0, max_distance
+    for axis in range(3):
+        o, inv = origin[axis], inverse[axis]
+        lower, upper = box[axis], box[axis + 3]
+        if inv == math.inf:
+            # Rayon parallèle à ce slab : il faut que l'origine soit entre les deux plans
+            if o < lower or o > upper:
+                return None
+            continue
+        t0, t1 = (lower - o) * inv, (upper - o) * inv
+        if t0 > t1:
+            t0, t1 = t1, t0
+        near = max(near, t0)
+        far = min(far, t1)
+        if near > far:
+            return None
+    return near
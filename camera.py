@@ -1,18 +1,35 @@
+import math
 import numpy as np
 from pygame.constants import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 
+from constants import SCREEN_SIZE
 from keymap import keymap
+from matrices import perspective
+from renderer import to_gl_matrix
 
 class Camera:
-    def __init__(self):
+    def __init__(self, fov=70, aspect=SCREEN_SIZE[0] / SCREEN_SIZE[1], near=0.1, far=100):
         self.pos = np.array([0, 0, 5], dtype=np.float32)
         self.pitch = 0.0
         self.yaw = 0.0
         self.mouse_sensitivity = 0.15
         self.speed = 5.0
 
+        self.fov = fov
+        self.aspect = aspect
+        self.near = near
+        self.far = far
+
+        # Caches recalculés seulement quand l'état dont ils dépendent change
+        self._direction_key = None # (yaw, pitch)
+        self._directions = None
+        self._view_key = None # (yaw, pitch, x, y, z)
+        self._view = None
+        self._projection_key = None # (fov, aspect, near, far)
+        self._projection = None
+
     def process_mouse_motion(self, dx, dy):
         self.yaw += dx * self.mouse_sensitivity
         self.pitch -= dy * self.mouse_sensitivity  # inversion volontaire pour effet naturel
@@ -21,13 +38,18 @@ class Camera:
         self.pitch = max(-89, min(89, self.pitch))
 
     def get_direction_vectors(self):
-        pitch_rad = np.radians(self.pitch)
-        yaw_rad = np.radians(self.yaw)
+        """(forward, right, up) en lecture seule, partagés tant que yaw et pitch ne changent pas."""
+        key = (self.yaw, self.pitch)
+        if key == self._direction_key:
+            return self._directions
+
+        pitch_rad = math.radians(self.pitch)
+        yaw_rad = math.radians(self.yaw)
 
         forward = np.array([
-            np.cos(pitch_rad) * np.sin(yaw_rad),
-            np.sin(pitch_rad),
-            -np.cos(pitch_rad) * np.cos(yaw_rad)
+            math.cos(pitch_rad) * math.sin(yaw_rad),
+            math.sin(pitch_rad),
+            -math.cos(pitch_rad) * math.cos(yaw_rad)
         ], dtype=np.float32)
         forward /= np.linalg.norm(forward)
 
@@ -38,7 +60,11 @@ class Camera:
         up = np.cross(right, forward)
         up /= np.linalg.norm(up)
 
-        return forward, right, up
+        for vector in (forward, right, up):
+            vector.flags.writeable = False
+        self._directions = (forward, right, up)
+        self._direction_key = key
+        return self._directions
 
     def update_position(self, keys, dt):
         forward, right, up = self.get_direction_vectors()
@@ -57,12 +83,93 @@ class Camera:
         if keys[keymap["down"]]:
             self.pos -= up * velocity
 
-    def apply_view(self):
+    def _update_view(self):
+        key = (self.yaw, self.pitch, float(self.pos[0]), float(self.pos[1]), float(self.pos[2]))
+        if key == self._view_key:
+            return
         forward, right, up = self.get_direction_vectors()
-        center = self.pos + forward
-        # gluLookAt(eye_x, eye_y, eye_z, center_x, center_y, center_z, up_x, up_y, up_z)
-        gluLookAt(
-            self.pos[0], self.pos[1], self.pos[2],
-            center[0], center[1], center[2],
-            up[0], up[1], up[2]
-        )
+
+        # Même matrice que gluLookAt(pos, pos + forward, up)
+        rotation = np.identity(4)
+        rotation[0, :3] = right
+        rotation[1, :3] = up
+        rotation[2, :3] = -forward
+        view = rotation.copy()
+        view[:3, 3] = -rotation[:3, :3] @ np.asarray(key[2:])
+
+        self._view = {
+            "view": view,
+            "rotation": rotation,
+            "gl_view": to_gl_matrix(view),
+            "gl_rotation": to_gl_matrix(rotation),
+        }
+        for matrix in self._view.values():
+            matrix.flags.writeable = False
+        self._view_key = key
+
+    def _update_projection(self):
+        key = (self.fov, self.aspect, self.near, self.far)
+        if key == self._projection_key:
+            return
+        projection = perspective(*key)
+        self._projection = {"projection": projection, "gl_projection": to_gl_matrix(projection)}
+        for matrix in self._projection.values():
+            matrix.flags.writeable = False
+        self._projection_key = key
+
+    @property
+    def view_matrix(self):
+        """Matrice de vue 4x4 (convention numpy, M @ v)."""
+        self._update_view()
+        return self._view["view"]
+
+    @property
+    def view_rotation_matrix(self):
+        """Matrice de vue sans translation (skybox, repère d'axes)."""
+        self._update_view()
+        return self._view["rotation"]
+
+    @property
+    def projection_matrix(self):
+        self._update_projection()
+        return self._projection["projection"]
+
+    @property
+    def view_projection_matrix(self):
+        return self.projection_matrix @ self.view_matrix
+
+    @property
+    def gl_view_matrix(self):
+        """view_matrix au format colonne-majeure de glLoadMatrixf."""
+        self._update_view()
+        return self._view["gl_view"]
+
+    @property
+    def gl_view_rotation_matrix(self):
+        self._update_view()
+        return self._view["gl_rotation"]
+
+    @property
+    def gl_projection_matrix(self):
+        self._update_projection()
+        return self._projection["gl_projection"]
+
+    def screen_ray(self, x, y, screen_size=SCREEN_SIZE):
+        """Rayon monde (origine, direction normée) passant par le pixel (x, y), origine en haut à gauche."""
+        width, height = screen_size
+        ndc_x = 2 * (x + 0.5) / width - 1
+        ndc_y = 1 - 2 * (y + 0.5) / height
+        # Point du plan lointain, ramené en repère monde
+        far = np.linalg.inv(self.view_projection_matrix) @ np.array([ndc_x, ndc_y, 1.0, 1.0])
+        origin = self.pos.astype(np.float64)
+        direction = far[:3] / far[3] - origin
+        return origin, direction / np.linalg.norm(direction)
+
+    def apply_projection(self):
+        glMatrixMode(GL_PROJECTION)
+        glLoadMatrixf(self.gl_projection_matrix)
+        glMatrixMode(GL_MODELVIEW)
+
+    def apply_view(self):
+        # Multiplie la matrice courante, comme le faisait gluLookAt
+        glMultMatrixf(self.gl_view_matrix)
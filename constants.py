@@ -1 +1,7 @@
-SCREEN_SIZE = (800, 600)
\ No newline at end of file
+SCREEN_SIZE = (800, 600)
+
+# Modes de rendu d'Object3D.draw
+RENDER_RETAINED = "retained"    # VBO uploadé une fois, un seul glDrawArrays par mesh
+RENDER_IMMEDIATE = "immediate"  # glBegin/glEnd, un appel par sommet (fallback)
+RENDER_MODES = (RENDER_RETAINED, RENDER_IMMEDIATE)
+RENDER_INSTANCED = "instanced"  # InstanceBatch : shader et glDrawArraysInstanced
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def frustum_planes(view_projection):
+    """Six plans (a, b, c, d) normalisés, normales vers l'intérieur, extraits de projection @ vue.
+
+    Ordre : gauche, droite, bas, haut, proche, lointain. Un point p est dans
+    le frustum si a*x + b*y + c*z + d >= 0 pour les six plans.
+    """
+    m = np.asarray(view_projection, dtype=np.float64)
+    planes = np.array([
+        m[3] + m[0], m[3] - m[0],
+        m[3] + m[1], m[3] - m[1],
+        m[3] + m[2], m[3] - m[2],
+    ])
+    return planes / np.linalg.norm(planes[:, :3], axis=1)[:, None]
+
+
+def local_bounds(positions):
+    """AABB (min, max) et sphère englobante (centre, rayon) de sommets locaux (N, 3)."""
+    positions = np.asarray(positions, dtype=np.float64)
+    if not len(positions):
+        zero = np.zeros(3)
+        return zero, zero, zero, 0.0
+    lower = positions.min(axis=0)
+    upper = positions.max(axis=0)
+    center = (lower + upper) / 2
+    radius = float(np.sqrt(((positions - center) ** 2).sum(axis=1).max()))
+    return lower, upper, center, radius
+
+
+def transform_bounds(model, lower, upper, center, radius):
+    """Bornes monde d'un objet depuis ses bornes locales, sans reparcourir les sommets.
+
+    Renvoie un tableau (10,) : min (3), max (3), centre (3) et rayon.
+
+    L'AABB monde est celle de la boîte locale transformée (Arvo) ; le rayon
+    de la sphère est multiplié par la norme de Frobenius de la partie
+    linéaire, qui majore sa norme spectrale (l'étirement maximal) même avec
+    un cisaillement, là où la plus grande norme de colonne ne suffit pas.
+    """
+    linear = model[:3, :3]
+    box_center = linear @ ((lower + upper) / 2) + model[:3, 3]
+    box_extent = np.abs(linear) @ ((upper - lower) / 2)
+    world_center = linear @ center + model[:3, 3]
+    world_radius = radius * float(np.sqrt((linear ** 2).sum()))
+    return np.concatenate([box_center - box_extent, box_center + box_extent, world_center, [world_radius]])
+
+
+
+def transform_bounds_batch(models, bounds):
+    """Version vectorisée de `transform_bounds` : matrices (N, 4, 4), bornes locales (N, 10) -> bornes monde (N, 10)."""
+    linear = models[:, :3, :3]
+    translation = models[:, :3, 3]
+    lower, upper = bounds[:, 0:3], bounds[:, 3:6]
+    box_center = np.einsum("nij,nj->ni", linear, (lower + upper) / 2) + translation
+    box_extent = np.einsum("nij,nj->ni", np.abs(linear), (upper - lower) / 2)
+    world = np.empty((len(models), 10))
+    world[:, 0:3] = box_center - box_extent
+    world[:, 3:6] = box_center + box_extent
+    world[:, 6:9] = np.einsum("nij,nj->ni", linear, bounds[:, 6:9]) + translation
+    world[:, 9] = bounds[:, 9] * np.sqrt((linear ** 2).sum(axis=(1, 2)))
+    return world
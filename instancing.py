@@ -0,0 +1,189 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+
+from constants import RENDER_INSTANCED
+from quaternion import QuaternionArray
+from renderer import FLOAT_SIZE, VERTEX_STRIDE, create_program
+
+# Chaque instance envoie sa matrice modèle (convention numpy, ligne-majeure)
+# sous forme de 4 lignes ; mat4(r0, r1, r2, r3) vaut donc sa transposée.
+VERTEX_SHADER = """
+#version 130
+in vec3 position;
+in vec2 texcoord;
+in vec4 model_row0;
+in vec4 model_row1;
+in vec4 model_row2;
+in vec4 model_row3;
+out vec2 uv;
+
+void main() {
+    mat4 model_t = mat4(model_row0, model_row1, model_row2, model_row3);
+    gl_Position = gl_ModelViewProjectionMatrix * (vec4(position, 1.0) * model_t);
+    uv = texcoord;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 130
+in vec2 uv;
+uniform sampler2D texture0;
+uniform bool textured;
+
+void main() {
+    gl_FragColor = textured ? texture(texture0, uv) : vec4(1.0);
+}
+"""
+
+ATTRIBUTES = ("position", "texcoord", "model_row0", "model_row1", "model_row2", "model_row3")
+MATRIX_STRIDE = 16 * FLOAT_SIZE
+
+_program = None
+_uniforms = {}
+
+
+def get_program():
+    global _program
+    if _program is None:
+        _program = create_program(VERTEX_SHADER, FRAGMENT_SHADER, ATTRIBUTES)
+        for name in ("textured", "texture0"):
+            _uniforms[name] = glGetUniformLocation(_program, name)
+    return _program
+
+
+def begin_instanced():
+    """État commun à tous les lots : programme lié, attributs activés, non texturé."""
+    glUseProgram(get_program())
+    glActiveTexture(GL_TEXTURE0)
+    glUniform1i(_uniforms["texture0"], 0)
+    glUniform1i(_uniforms["textured"], 0)
+    for location in range(len(ATTRIBUTES)):
+        glEnableVertexAttribArray(location)
+        if location >= 2:
+            glVertexAttribDivisor(location, 1)
+
+
+def set_instanced_texture(textured):
+    """À appeler entre begin_instanced et end_instanced, la texture étant déjà liée."""
+    glUniform1i(_uniforms["textured"], int(textured))
+
+
+def end_instanced():
+    for location in range(len(ATTRIBUTES)):
+        if location >= 2:
+            glVertexAttribDivisor(location, 0)
+        glDisableVertexAttribArray(location)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glUseProgram(0)
+
+
+def compose_matrices(positions, rotations=None, scales=None):
+    """Matrices modèles (N, 4, 4) depuis des tableaux SoA : positions (N, 3),
+    quaternions (N, 4) en (w, x, y, z) et échelles (N, 3)."""
+    positions = np.asarray(positions, dtype=np.float32)
+    n = len(positions)
+    matrices = np.zeros((n, 4, 4), dtype=np.float32)
+    if rotations is None:
+        matrices[:, 0, 0] = matrices[:, 1, 1] = matrices[:, 2, 2] = 1.0
+    else:
+        matrices[:, :3, :3] = QuaternionArray(rotations).normalize().to_rotation_matrices()
+    if scales is not None:
+        matrices[:, :3, :3] *= np.asarray(scales, dtype=np.float32)[:, None, :]
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+class InstanceBatch:
+    """Toutes les instances d'un même Mesh, dessinées en un seul glDrawArraysInstanced.
+
+    Les matrices modèles vivent dans `matrices` (N, 4, 4) ; une mise à jour est
+    une écriture de tranche numpy suivie d'un seul glBufferSubData au rendu.
+    """
+    def __init__(self, mesh, count, texture_id=None):
+        self.mesh = mesh
+        self.texture_id = texture_id
+        self.matrices = np.tile(np.identity(4, dtype=np.float32), (count, 1, 1))
+        self._vbo = None
+        self._dirty = (0, count)
+
+    def __len__(self):
+        return len(self.matrices)
+
+    def set_matrices(self, matrices, start=0):
+        matrices = np.asarray(matrices, dtype=np.float32)
+        self.matrices[start:start + len(matrices)] = matrices
+        self.mark_dirty(start, start + len(matrices))
+
+    def set_transforms(self, positions, rotations=None, scales=None, start=0):
+        self.set_matrices(compose_matrices(positions, rotations, scales), start)
+
+    def mark_dirty(self, start=0, stop=None):
+        """À appeler après une écriture directe dans `matrices`."""
+        stop = len(self.matrices) if stop is None else stop
+        if self._dirty is None:
+            self._dirty = (start, stop)
+        else:
+            self._dirty = (min(self._dirty[0], start), max(self._dirty[1], stop))
+
+    def upload(self):
+        if self._vbo is None:
+            self._vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+            glBufferData(GL_ARRAY_BUFFER, self.matrices.nbytes, self.matrices, GL_DYNAMIC_DRAW)
+        elif self._dirty is not None:
+            start, stop = self._dirty
+            glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+            glBufferSubData(GL_ARRAY_BUFFER, start * MATRIX_STRIDE, (stop - start) * MATRIX_STRIDE, self.matrices[start:stop])
+        self._dirty = None
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def render_key(self, wireframe=False, textured=False):
+        """Clé d'état (mode, texture, wireframe) pour la RenderQueue."""
+        textured = textured and self.texture_id and len(self.mesh.data.texcoords)
+        return (RENDER_INSTANCED, self.texture_id if textured else 0, bool(wireframe))
+
+    def draw(self, wireframe=False, textured=False):
+        if not len(self.matrices):
+            return
+        textured = bool(textured and self.texture_id and len(self.mesh.data.texcoords))
+
+        begin_instanced()
+        if textured:
+            glBindTexture(GL_TEXTURE_2D, self.texture_id)
+            set_instanced_texture(True)
+        if wireframe:
+            glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+        self._draw_instances()
+        if wireframe:
+            glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+        if textured:
+            glBindTexture(GL_TEXTURE_2D, 0)
+        end_instanced()
+
+    def draw_queued(self, queue, mode, wireframe=False, textured=False):
+        # Programme, texture et mode de polygones déjà en place (RenderQueue)
+        if len(self.matrices):
+            self._draw_instances()
+
+    def _draw_instances(self):
+        self.upload()
+        mesh_buffer = self.mesh.get_buffer()
+
+        # Attributs par sommet : VBO partagé du mesh
+        glBindBuffer(GL_ARRAY_BUFFER, mesh_buffer.vbo)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, ctypes.c_void_p(3 * FLOAT_SIZE))
+
+        # Attributs par instance : une ligne de matrice par attribut
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        for row in range(4):
+            glVertexAttribPointer(2 + row, 4, GL_FLOAT, GL_FALSE, MATRIX_STRIDE, ctypes.c_void_p(row * 4 * FLOAT_SIZE))
+
+        glDrawArraysInstanced(GL_TRIANGLES, 0, mesh_buffer.vertex_count, len(self.matrices))
+
+    def delete(self):
+        if self._vbo is not None:
+            glDeleteBuffers(1, [self._vbo])
+            self._vbo = None
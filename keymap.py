@@ -10,6 +10,11 @@ keymap = {
     "down": K_q,
     "wireframe": K_z,
     "texture": K_t,
+    "render_mode": K_r,
+    "profiler": K_p,
+    "profiler_export": K_o,
+    "culling": K_c,
+    "lod": K_l,
 }
 
 # Default azerty
@@ -22,6 +27,11 @@ keymap = {
 #     "down": K_a,
 #     "wireframe": K_w, 
 #     "texture": K_t,
+#     "render_mode": K_r,
+#     "profiler": K_p,
+#     "profiler_export": K_o,
+#     "culling": K_c,
+#     "lod": K_l,
 # }
 
 # Custom
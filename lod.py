@@ -0,0 +1,318 @@
+"""Niveaux de détail (LOD) des meshes : simplification et choix à l'affichage.
+
+Les niveaux sont obtenus par effondrement d'arêtes guidé par l'erreur
+quadrique (Garland–Heckbert) puis rangés dans le cache des meshes, à côté du
+mesh compilé. Pré-calcul hors ligne :
+
+    python lod.py assets/objs/*.obj
+"""
+import argparse
+import heapq
+import math
+import sys
+
+import numpy as np
+
+from mesh_cache import (CACHE_DIR, MAX_CACHE_BYTES, MESH_ARRAYS, cache_path, evict, load_mesh, read_array,
+                        source_info, valid_header, write_arrays)
+from obj_loader import MeshData
+
+LOD_RATIOS = (0.5, 0.25, 0.1)  # part des triangles conservée par les niveaux 1, 2, 3
+LOD_MIN_TRIANGLES = 256  # en dessous, le mesh n'a qu'un niveau
+LOD_SCREEN_RADII = (160.0, 80.0, 40.0)  # rayon projeté (pixels) sous lequel on passe au niveau 1, 2, 3
+LOD_HYSTERESIS = 0.15  # marge relative autour de chaque seuil avant de changer de niveau
+MIN_REDUCTION = 0.9  # un niveau doit garder moins de 90 % des triangles du précédent
+
+
+def simplify(mesh, ratios=LOD_RATIOS):
+    """Versions simplifiées de `mesh` (MeshData), une par ratio décroissant du nombre de triangles.
+
+    Effondrements d'une demi-arête a -> b : le sommet a rejoint b, qui ne
+    bouge pas. Les coutures UV sont gardées des deux côtés : un coin de a
+    prend l'UV de b vue depuis la face de l'arête du même côté de la couture
+    (même UV en a) ; un coin d'un côté qui ne touche pas l'arête reçoit une
+    UV extrapolée depuis sa propre face, à la position de b. Ces derniers
+    effondrements (a quitte sa couture) ne passent qu'une fois épuisés ceux
+    qui gardent les UV exactes. Les sommets de
+    bord ne sont jamais déplacés, si bien que les contours restent intacts.
+    Les effondrements qui retourneraient un triangle ou rendraient la surface
+    non manifold sont refusés. Les normales ne sont pas conservées.
+    Un niveau qui ne réduit pas assez le précédent (MIN_REDUCTION) est omis.
+    """
+    positions = np.asarray(mesh.positions, dtype=np.float64)
+    faces = np.asarray(mesh.faces, dtype=np.int64)
+    face_uv = np.asarray(mesh.face_texcoords, dtype=np.int64)
+    has_uv = len(mesh.texcoords) > 0
+    targets = [int(len(faces) * ratio) for ratio in sorted(ratios, reverse=True)]
+    if not len(faces) or not targets:
+        return []
+
+    quadrics = _vertex_quadrics(positions, faces)
+    locked = _locked_vertices(len(positions), faces)
+
+    face_list = faces.tolist()
+    uv_list = face_uv.tolist()
+    face_alive = [True] * len(face_list)
+    vertex_faces = [set() for _ in range(len(positions))]
+    for index, face in enumerate(face_list):
+        for vertex in face:
+            vertex_faces[vertex].add(index)
+    vertex_alive = [True] * len(positions)
+    version = [0] * len(positions)
+    points = [tuple(point) for point in positions.tolist()]
+    uvs = [tuple(uv) for uv in np.asarray(mesh.texcoords, dtype=np.float64).tolist()]  # complétée par les UV extrapolées
+
+    # Candidats initiaux : les deux sens de chaque arête, évalués en un bloc
+    edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    edges = np.unique(edges, axis=0)
+    heap = []
+    _push(heap, quadrics, positions, locked, version, edges[:, 0], edges[:, 1])
+    _push(heap, quadrics, positions, locked, version, edges[:, 1], edges[:, 0])
+    heapq.heapify(heap)
+
+    levels = []
+    face_count = len(face_list)
+    previous = face_count
+    while targets:
+        if face_count <= targets[0] or not heap:
+            if face_count <= previous * MIN_REDUCTION:
+                levels.append(_snapshot(mesh, face_list, uv_list, face_alive, uvs))
+                previous = face_count
+            targets.pop(0)
+            if not heap:
+                break
+            continue
+
+        entry = heapq.heappop(heap)
+        deferred, _, a, b, version_a, version_b = entry
+        if not (vertex_alive[a] and vertex_alive[b]) or version[a] != version_a or version[b] != version_b:
+            continue
+        shared = vertex_faces[a] & vertex_faces[b]
+        if not shared:
+            continue
+        if has_uv:
+            # UV de b de chaque côté de l'arête, indexée par l'UV de a du même côté
+            sides = {}
+            for f in shared:
+                sides.setdefault(uv_list[f][face_list[f].index(a)], uv_list[f][face_list[f].index(b)])
+            corner_uvs = {uv_list[f][face_list[f].index(a)] for f in vertex_faces[a] - shared}
+            if not deferred and any(uv >= 0 and uv not in sides for uv in corner_uvs):
+                heapq.heappush(heap, (1,) + entry[1:])
+                continue
+        if not _can_collapse(a, b, shared, face_list, vertex_faces, points):
+            continue
+
+        # a -> b : les faces de l'arête disparaissent, les autres faces de a passent sur b
+        if has_uv:
+            for f in vertex_faces[a] - shared:
+                corner = face_list[f].index(a)
+                a_uv = uv_list[f][corner]
+                if a_uv in sides:
+                    uv_list[f][corner] = sides[a_uv]
+                elif a_uv >= 0:
+                    uvs.append(_extrapolate_uv(face_list[f], uv_list[f], corner, points, uvs, points[b]))
+                    uv_list[f][corner] = len(uvs) - 1
+        for f in shared:
+            face_alive[f] = False
+            for vertex in face_list[f]:
+                if vertex != a:
+                    vertex_faces[vertex].discard(f)
+        for f in vertex_faces[a] - shared:
+            face_list[f][face_list[f].index(a)] = b
+            vertex_faces[b].add(f)
+        vertex_faces[a] = set()
+        vertex_alive[a] = False
+        face_count -= len(shared)
+        quadrics[b] += quadrics[a]
+        version[b] += 1
+
+        neighbours = np.array(sorted(_neighbours(b, face_list, vertex_faces)), dtype=np.int64)
+        if len(neighbours):
+            new = []
+            _push(new, quadrics, positions, locked, version, np.full_like(neighbours, b), neighbours)
+            _push(new, quadrics, positions, locked, version, neighbours, np.full_like(neighbours, b))
+            for entry in new:
+                heapq.heappush(heap, entry)
+    return levels
+
+
+def _vertex_quadrics(positions, faces):
+    """Quadriques (V, 4, 4) : somme, pondérée par l'aire, des plans des faces autour de chaque sommet."""
+    v0, v1, v2 = (positions[faces[:, corner]] for corner in range(3))
+    normals = np.cross(v1 - v0, v2 - v0)
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    normals[valid] /= lengths[valid, None]
+    planes = np.concatenate([normals, -(normals * v0).sum(axis=1, keepdims=True)], axis=1)
+    face_quadrics = planes[:, :, None] * planes[:, None, :] * (lengths / 2)[:, None, None]
+    quadrics = np.zeros((len(positions), 4, 4))
+    for corner in range(3):
+        np.add.at(quadrics, faces[:, corner], face_quadrics)
+    return quadrics
+
+
+def _locked_vertices(count, faces):
+    """Sommets immobiles : bords (arête d'une seule face) et arêtes non manifold."""
+    locked = np.zeros(count, dtype=bool)
+    edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    unique, counts = np.unique(edges, axis=0, return_counts=True)
+    locked[unique[counts != 2].ravel()] = True
+    return locked
+
+
+def _push(heap, quadrics, positions, locked, version, sources, targets):
+    """Ajoute (différé, coût, a, b, versions) pour chaque effondrement a -> b permis ; coût = erreur quadrique en b."""
+    movable = ~locked[sources]
+    sources, targets = sources[movable], targets[movable]
+    if not len(sources):
+        return
+    point = np.concatenate([positions[targets], np.ones((len(targets), 1))], axis=1)
+    quadric = quadrics[sources] + quadrics[targets]
+    costs = np.einsum("ni,nij,nj->n", point, quadric, point)
+    for cost, a, b in zip(costs.tolist(), sources.tolist(), targets.tolist()):
+        heap.append((0, cost, a, b, version[a], version[b]))
+
+
+def _neighbours(vertex, face_list, vertex_faces):
+    return {other for f in vertex_faces[vertex] for other in face_list[f]} - {vertex}
+
+
+def _can_collapse(a, b, shared, face_list, vertex_faces, points):
+    # Condition de lien : les voisins communs de a et b sont exactement les sommets opposés de l'arête
+    opposite = {vertex for f in shared for vertex in face_list[f]} - {a, b}
+    if _neighbours(a, face_list, vertex_faces) & _neighbours(b, face_list, vertex_faces) != opposite:
+        return False
+
+    # Aucune face restante ne doit se retourner ni dégénérer ; quelques faces : calcul en Python pur
+    for f in vertex_faces[a] - shared:
+        face = face_list[f]
+        before = [points[vertex] for vertex in face]
+        after = [points[b] if vertex == a else points[vertex] for vertex in face]
+        normal_before = _normal(*before)
+        normal_after = _normal(*after)
+        dot = sum(x * y for x, y in zip(normal_before, normal_after))
+        if dot <= 1e-3 * math.sqrt(sum(x * x for x in normal_before) * sum(x * x for x in normal_after)):
+            return False
+    return True
+
+
+def _normal(p0, p1, p2):
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+
+def _extrapolate_uv(face, face_uv, corner, points, uvs, target):
+    """UV au point `target` selon l'application affine position -> UV de la face (coin `corner` déplacé)."""
+    p0, p1, p2 = (points[face[(corner + k) % 3]] for k in range(3))
+    t0, t1, t2 = (uvs[face_uv[(corner + k) % 3]] for k in range(3))
+    e1 = [y - x for x, y in zip(p0, p1)]
+    e2 = [y - x for x, y in zip(p0, p2)]
+    d = [y - x for x, y in zip(p0, target)]
+    # Coordonnées (s, t) de la projection de target dans le plan de la face : équations normales 2x2
+    g11, g12, g22 = (sum(x * y for x, y in zip(u, v)) for u, v in ((e1, e1), (e1, e2), (e2, e2)))
+    r1, r2 = sum(x * y for x, y in zip(d, e1)), sum(x * y for x, y in zip(d, e2))
+    det = g11 * g22 - g12 * g12
+    if det <= 1e-12 * g11 * g22:
+        return t0
+    s, t = (r1 * g22 - r2 * g12) / det, (r2 * g11 - r1 * g12) / det
+    return tuple(u0 + s * (u1 - u0) + t * (u2 - u0) for u0, u1, u2 in zip(t0, t1, t2))
+
+
+def _snapshot(mesh, face_list, uv_list, face_alive, uvs):
+    """MeshData compacte des faces encore vivantes (sommets et UV inutilisés retirés)."""
+    alive = np.array(face_alive)
+    faces = np.array(face_list, dtype=np.int64)[alive]
+    face_uv = np.array(uv_list, dtype=np.int64)[alive]
+
+    used, faces = np.unique(faces, return_inverse=True)
+    positions = np.asarray(mesh.positions)[used]
+    texcoords = np.array(uvs, dtype=np.float64).reshape(-1, 2)
+    if len(texcoords):
+        used_uv, inverse = np.unique(face_uv[face_uv >= 0], return_inverse=True)
+        remapped = np.full_like(face_uv, -1)
+        remapped[face_uv >= 0] = inverse
+        face_uv = remapped
+        texcoords = texcoords[used_uv]
+    faces = faces.reshape(-1, 3).astype(np.int32)
+    return MeshData(np.ascontiguousarray(positions, dtype=np.float32), np.ascontiguousarray(texcoords, dtype=np.float32),
+                    np.zeros((0, 3), dtype=np.float32), faces, face_uv.astype(np.int32), np.full_like(faces, -1))
+
+
+def cached_lods(path, ratios=LOD_RATIOS, cache_dir=CACHE_DIR):
+    """Niveaux de `path` déjà en cache et encore valides, sinon None ; ne lance jamais la simplification."""
+    target = cache_path(path, cache_dir, variant="lod:" + ",".join(map(str, ratios)))
+    header = valid_header(path, target)
+    if header is None:
+        return None
+    return [_map_level(target, header, level) for level in range(header["levels"])]
+
+
+def load_lods(path, mesh=None, ratios=LOD_RATIOS, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Niveaux simplifiés (sans le niveau 0) de l'OBJ `path`, relus depuis le cache ou générés puis mis en cache."""
+    levels = cached_lods(path, ratios, cache_dir)
+    if levels is not None:
+        return levels
+
+    target = cache_path(path, cache_dir, variant="lod:" + ",".join(map(str, ratios)))
+    if mesh is None:
+        mesh = load_mesh(path, cache_dir, max_bytes)
+    levels = simplify(mesh, ratios) if mesh.triangle_count >= LOD_MIN_TRIANGLES else []
+    arrays = {}
+    for level, data in enumerate(levels):
+        data.get_interleaved()
+        arrays.update({f"lod{level}_{name}": getattr(data, name) for name in MESH_ARRAYS})
+    try:
+        write_arrays(target, arrays, dict(source_info(path), levels=len(levels)))
+        evict(cache_dir, max_bytes)
+    except OSError:
+        pass
+    return levels
+
+
+def _map_level(target, header, level):
+    arrays = {name: read_array(target, header, f"lod{level}_{name}") for name in MESH_ARRAYS}
+    interleaved = arrays.pop("interleaved")
+    data = MeshData(**arrays)
+    data.interleaved = interleaved
+    return data
+
+
+def select_levels(radii, current, level_counts, thresholds=LOD_SCREEN_RADII, hysteresis=LOD_HYSTERESIS):
+    """Niveau de chaque objet d'après le rayon projeté (pixels) de sa sphère englobante.
+
+    Le niveau idéal compte les seuils que le rayon passe vers le bas. Pour
+    éviter les sauts d'un niveau à l'autre quand un objet reste près d'un
+    seuil, le niveau courant est conservé tant que le rayon reste dans la
+    bande seuil * (1 ± hysteresis) : on ne devient plus grossier que sous
+    seuil * (1 - hysteresis), plus fin qu'au-dessus de seuil * (1 + hysteresis).
+    """
+    radii = np.asarray(radii, dtype=np.float64)[:, None]
+    thresholds = np.asarray(thresholds, dtype=np.float64)[None, :]
+    finest = (radii < thresholds * (1 - hysteresis)).sum(axis=1)
+    coarsest = (radii < thresholds * (1 + hysteresis)).sum(axis=1)
+    levels = np.clip(np.asarray(current), finest, coarsest)
+    return np.minimum(levels, np.asarray(level_counts) - 1)
+
+
+def projected_radii(bounds, eye, fov, screen_height):
+    """Rayon à l'écran (pixels) des sphères englobantes (N, 10) vues depuis `eye` (fov vertical en degrés)."""
+    distances = np.linalg.norm(bounds[:, 6:9] - eye, axis=1)
+    radii = bounds[:, 9]
+    scale = screen_height / 2 / math.tan(math.radians(fov) / 2)
+    # Caméra dans la sphère : l'objet couvre l'écran
+    return np.where(distances > radii, radii / np.maximum(distances, 1e-9) * scale, np.inf)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        mesh = load_mesh(path)
+        counts = [mesh.triangle_count] + [level.triangle_count for level in load_lods(path, mesh)]
+        print(f"{path}: " + " / ".join(map(str, counts)) + " triangles")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
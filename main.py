@@ -5,6 +5,8 @@
 
 from math import radians
 import os
+import sys
+import time
 import pygame
 from pygame.constants import *
 from OpenGL.GL import *
@@ -12,17 +14,37 @@ from OpenGL.GLU import *
 
 from constants import *
 from object3D import Object3D
+from scene import animate_default_scene, build_default_scene
+from animation import Animator
+from mesh_cache import load_mesh
+import mesh_registry
+from instancing import InstanceBatch
+from render_queue import RenderQueue
+from frustum import frustum_planes
+from lod import projected_radii, select_levels
+from bvh import BVH
+from scene_graph import SceneGraph
+from picking import PickResult, pick_object
+from renderer import SkyboxBuffer, create_cube_map, create_texture_2d
+from profiler import FrameProfiler, ProfilerOverlay
+from streaming import AssetStreamer
 from object import *
 from camera import Camera
 from keymap import keymap
 
 class Engine():
-    def __init__(self):
+    def __init__(self, render_mode=RENDER_RETAINED, hidden=False, compress_textures=False, streaming=True):
         pygame.init()
         self.running = True
+        self.render_mode = render_mode
         self.screen_size = SCREEN_SIZE
-        self.screen = pygame.display.set_mode((800,600), DOUBLEBUF | OPENGL)
+        flags = DOUBLEBUF | OPENGL | (HIDDEN if hidden else 0)
+        self.screen = pygame.display.set_mode((800,600), flags)
+        self.compress_textures = compress_textures
+        # Assets chargés en arrière-plan : la première frame s'affiche avec des placeholders
+        self.streamer = AssetStreamer() if streaming else None
         self.skybox_texture = self.load_skybox("assets/skybox/")
+        self.skybox = None
         self.camera = Camera()
         self.clock = pg.time.Clock()
 
@@ -31,60 +53,251 @@ class Engine():
         }
 
         self.scene = {}
+        self.instances = {}
+        # Hiérarchie des objets : matrices monde en cache, recalculées par sous-arbre
+        self.scene_graph = SceneGraph()
+        # Pistes d'animation, échantillonnées au temps de la scène (secondes)
+        self.animator = Animator()
+        self.time = 0.0
+        # File de dessin triée par état GL, reconstruite à chaque frame
+        self.render_queue = RenderQueue()
+        # Objets hors du frustum de la caméra écartés avant tout appel de dessin
+        self.culling = True
+        # Niveau de détail de chaque objet choisi d'après sa taille à l'écran (mode retained)
+        self.lod = True
+        # Index spatial des objets de la scène, tenu à jour par set_scene/add_object/remove_object
+        self.bvh = BVH(bounds_of=lambda obj: obj.world_bounds[:6])
+        self._object_names = {}
+        self.selected = None # Dernier PickResult (clic droit)
+        # Compteurs de la dernière frame rendue
+        self.frame_stats = {"draw_calls": 0, "vertices": 0, "state_changes": 0, "visible": 0, "culled": 0}
+        self.profiler = FrameProfiler()
+        self.profiler_overlay = ProfilerOverlay(self.profiler)
 
     def init_scene(self):
-        cube1 = Object3D("assets/objs/cube.obj", self.textures['placeholder'])
-        cube1.set_position(0, 0, 0)
-        self.scene["cube1"] = cube1
-
-        cylinder1 = Object3D("assets/objs/cylinder.obj", self.textures['placeholder'])
-        cylinder1.set_position(3, 2, 0)
-        cylinder1.set_pivot_world(0, 0, 0)
-        self.scene["cylinder1"] = cylinder1
-
-        pyramid1 = Object3D("assets/objs/pyramid.obj", self.textures['placeholder'])
-        pyramid1.set_position(6, 0, 0)
-        pyramid1.set_scale(2, 5, 1)
-        self.scene["pyramid1"] = pyramid1
-
-        tetrahedron1 = Object3D("assets/objs/tetrahedron.obj", self.textures['placeholder'])
-        tetrahedron1.set_position(9, 0, 0)
-        self.scene["tetrahedron1"] = tetrahedron1
-
-        sphere1 = Object3D("assets/objs/sphere.obj", self.textures['placeholder'])
-        sphere1.set_position(12, 0, 0)
-        sphere1.shear(xy=1)
-        self.scene["sphere1"] = sphere1
-
-    def update_scene(self):
-        q1 = Quaternion(0.9999619, 0.0087265, 0.0, 0.0) # 1deg x
-        self.scene["cube1"].rotate(q1)
-
-        angle = 0.1 # rad
-        c = np.cos(angle)
-        s = np.sin(angle)
-        m = np.array([
-            [1,  0,  0],
-            [0,  c, -s],
-            [0,  s,  c]
-        ])
-        self.scene["cylinder1"].rotateM(m)
-        
+        self.set_scene(build_default_scene(self.textures, self.streamer))
+        animate_default_scene(self.animator, self.scene)
 
-    def draw_scene(self, wireframe, textured):
+    def set_scene(self, scene):
+        # Rend la géométrie de l'ancienne scène au registre
+        self.animator.clear()
+        self.scene_graph.clear()
         for obj in self.scene.values():
-            obj.draw(wireframe=wireframe, textured=textured)
+            obj.remove_move_listener(self.bvh.mark_moved)
+            obj.release()
+        for name in list(self.instances):
+            self.remove_instances(name)
+        self.scene = scene
+        self._object_names = {obj: name for name, obj in scene.items()}
+        for obj in scene.values():
+            self.scene_graph.add(obj)
+        self.scene_graph.update()
+        self.bvh.build(scene.values())
+        for obj in scene.values():
+            obj.add_move_listener(self.bvh.mark_moved)
+
+    def add_object(self, name, obj, parent=None):
+        """Ajoute (ou remplace) un objet de la scène, éventuellement enfant de `parent`, et l'insère dans le BVH."""
+        if name in self.scene:
+            self.remove_object(name)
+        self.scene[name] = obj
+        self._object_names[obj] = name
+        self.scene_graph.add(obj)
+        if parent is not None:
+            obj.set_parent(parent)
+        self.scene_graph.update()
+        self.bvh.insert(obj)
+        obj.add_move_listener(self.bvh.mark_moved)
+
+    def remove_object(self, name):
+        """Retire un objet de la scène ; ses enfants y restent, comme racines."""
+        obj = self.scene.pop(name)
+        del self._object_names[obj]
+        self.animator.remove(obj)
+        self.scene_graph.remove(obj)
+        self.bvh.remove(obj)
+        obj.remove_move_listener(self.bvh.mark_moved)
+        obj.release()
+        return obj
+
+    def update_scene(self, dt):
+        """Avance le temps de la scène de `dt` secondes et pose tous les objets animés en une passe."""
+        self.time += dt
+        self.animator.update(self.time)
+
+    def add_instances(self, name, path, count, texture_id=None):
+        """Crée (ou remplace) un lot de `count` instances d'un mesh, dessinées en un seul appel."""
+        if name in self.instances:
+            self.remove_instances(name)
+        batch = InstanceBatch(mesh_registry.registry.acquire(path), count, texture_id)
+        self.instances[name] = batch
+        return batch
+
+    def remove_instances(self, name):
+        """Retire un lot d'instances : son VBO est libéré et son mesh rendu au registre, comme `remove_object`."""
+        batch = self.instances.pop(name)
+        batch.delete()
+        mesh_registry.registry.release(batch.mesh)
+        return batch
+
+    def visible_objects(self):
+        """(nom, objet) de la scène dont l'AABB monde coupe le frustum de la caméra.
+
+        Suppose les matrices monde à jour : `draw_scene` appelle `scene_graph.update` juste avant.
+        """
+        # Seuls les objets déplacés depuis la frame précédente touchent l'arbre
+        self.bvh.refit()
+        if not self.culling:
+            return list(self.scene.items())
+        names = self._object_names
+        return [(names[obj], obj) for obj in self.bvh.query_frustum(frustum_planes(self.camera.view_projection_matrix))]
+
+    def select_lods(self, visible):
+        """Niveau de détail des objets visibles d'après le rayon à l'écran de leur sphère englobante.
+
+        Les niveaux manquants sont demandés au premier affichage du mesh
+        (générés en arrière-plan avec le streamer) ; en attendant, l'objet
+        garde le mesh complet.
+        """
+        objects = [obj for _, obj in visible]
+        if not (self.lod and self.render_mode == RENDER_RETAINED):
+            for obj in objects:
+                obj.lod_level = 0
+            return
+        for obj in objects:
+            obj.mesh.request_lods(self.streamer)
+        if not objects:
+            return
+        bounds = np.array([obj.world_bounds for obj in objects])
+        radii = projected_radii(bounds, self.camera.pos, self.camera.fov, self.screen_size[1])
+        levels = select_levels(radii, [obj.lod_level for obj in objects], [obj.mesh.lod_count for obj in objects])
+        for obj, level in zip(objects, levels.tolist()):
+            obj.lod_level = level
+
+    def pick(self, x, y):
+        """Objet de la scène sous le pixel (x, y) : PickResult du triangle le plus proche, ou None.
+
+        Le BVH de la scène donne les objets dont la boîte est traversée, du plus
+        proche au plus lointain ; on s'arrête dès qu'une boîte commence après
+        le meilleur impact trouvé.
+        """
+        origin, direction = self.camera.screen_ray(x, y, self.screen_size)
+        self.scene_graph.update()
+        self.bvh.refit()
+        best = None
+        for entry, obj in self.bvh.query_ray(origin, direction, self.camera.far):
+            if best is not None and entry > best.distance:
+                break
+            hit = pick_object(obj, origin, direction, best.distance if best is not None else self.camera.far)
+            if hit is not None:
+                triangle, distance = hit
+                best = PickResult(self._object_names[obj], obj, triangle, distance, origin + direction * distance)
+        return best
 
-    def run(self):
+    def draw_scene(self, wireframe, textured):
+        # Objets regroupés par (mode, texture, wireframe) : un changement d'état par groupe
+        queue = self.render_queue
+        vertices = 0
+        draw_calls = 0
+        self.profiler.begin("transforms")
+        self.scene_graph.update()
+        self.profiler.end()
+        self.profiler.begin("cull")
+        visible = self.visible_objects()
+        self.profiler.end()
+        self.frame_stats["visible"] = len(visible)
+        self.frame_stats["culled"] = len(self.scene) - len(visible)
+        self.profiler.begin("lod")
+        self.select_lods(visible)
+        self.profiler.end()
+        for name, obj in visible:
+            queue.add(obj.render_key(wireframe, textured, self.render_mode), obj, name)
+            vertices += obj.lod_mesh.data.triangle_count * 3
+            draw_calls += 1
+        for name, batch in self.instances.items():
+            if len(batch):
+                queue.add(batch.render_key(wireframe, textured), batch, name)
+                vertices += batch.mesh.data.triangle_count * 3 * len(batch)
+                draw_calls += 1
+        queue.flush(self.profiler if self.profiler.enabled else None)
+        self.count_draw(vertices, draw_calls)
+        self.frame_stats["state_changes"] += queue.stats["state_changes"]
+
+    def count_draw(self, vertices, draw_calls=1):
+        self.frame_stats["draw_calls"] += draw_calls
+        self.frame_stats["vertices"] += vertices
+
+    def init_gl(self):
         # OpenGL default settings
         glEnable(GL_DEPTH_TEST)
         glClearColor(0.1, 0.1, 0.1, 1)
 
-        glMatrixMode(GL_PROJECTION)
+        glViewport(0, 0, *self.screen_size)
+        self.camera.apply_projection()
         glLoadIdentity()
-        gluPerspective(70, SCREEN_SIZE[0]/SCREEN_SIZE[1], 0.1, 100)
-        glMatrixMode(GL_MODELVIEW)
+
+    def render_frame(self, wireframe=False, textured=True, dt=1 / 60):
+        """Dessine la frame puis avance l'animation de `dt` secondes, sans présenter ; renvoie ses compteurs."""
+        profiler = self.profiler
+        self.frame_stats = {"draw_calls": 0, "vertices": 0, "state_changes": 0, "visible": 0, "culled": 0}
+        if self.streamer is not None:
+            profiler.begin("stream_uploads")
+            self.streamer.update()
+            profiler.end()
+        profiler.begin("camera")
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
+        self.camera.apply_view()
+        profiler.end()
+
+        # Draw and update
+        profiler.begin("draw_axes")
+        self.draw_axes(length=5.0, width=5.0)
+        profiler.end()
+        profiler.begin("draw_scene")
+        self.draw_scene(wireframe=wireframe, textured=textured)
+        profiler.end()
+        # Skybox en dernier : les pixels déjà couverts par la scène sont rejetés par le test de profondeur
+        profiler.begin("draw_skybox")
+        self.draw_skybox(self.skybox_texture)
+        profiler.end()
+        profiler.begin("update_scene")
+        self.update_scene(dt)
+        profiler.end()
+
+        # Axis overlay
+        profiler.begin("draw_axes_overlay")
+        # Rotation de la caméra calculée côté CPU, sans relire la matrice GL
+        self.draw_axes_overlay(self.camera.gl_view_rotation_matrix)
+        profiler.end()
+
+        if self.profiler.enabled:
+            profiler.begin("profiler_overlay")
+            self.profiler_overlay.draw(self.screen_size)
+            profiler.end()
+        return self.frame_stats
+
+    def toggle_profiler(self):
+        """Active le profileur et son overlay ; les fonctions GL sont comptées tant qu'il est actif."""
+        profiler = self.profiler
+        profiler.enabled = not profiler.enabled
+        if profiler.enabled:
+            modules = [sys.modules[name] for name in (__name__, "renderer", "instancing", "render_queue", "camera") if name in sys.modules]
+            profiler.instrument_gl(*modules)
+        else:
+            profiler.uninstrument_gl()
+            profiler.frames.clear()
+
+    def export_profile(self, folder="profiles"):
+        """Écrit l'historique du profileur en CSV et en trace Chrome ; renvoie les deux chemins."""
+        os.makedirs(folder, exist_ok=True)
+        stem = os.path.join(folder, time.strftime("profile_%Y%m%d_%H%M%S"))
+        self.profiler.export_csv(stem + ".csv")
+        self.profiler.export_chrome_trace(stem + ".json")
+        return stem + ".csv", stem + ".json"
+
+    def run(self):
+        self.init_gl()
 
         # Pygame default settings
         pygame.event.set_grab(False)
@@ -101,6 +314,7 @@ class Engine():
 
         while running:
             dt = self.clock.tick(60) / 1000
+            self.profiler.begin_frame()
             keys = pygame.key.get_pressed()
             
             # Events
@@ -115,6 +329,9 @@ class Engine():
                         pygame.event.set_grab(True)
                         pygame.mouse.set_visible(False)
                         pygame.mouse.get_rel()
+                    elif event.button == 3 and not mouse_control:
+                        # Clic droit : sélection de l'objet sous le curseur
+                        self.selected = self.pick(*event.pos)
 
                 elif event.type == pygame.MOUSEBUTTONUP:
                     if event.button == 1:
@@ -136,28 +353,31 @@ class Engine():
                         wireframe = not wireframe
                     if event.key == keymap["texture"]:
                         texture = not texture
+                    if event.key == keymap["render_mode"]:
+                        # Bascule retained <-> immediate pour comparer les deux chemins
+                        index = RENDER_MODES.index(self.render_mode)
+                        self.render_mode = RENDER_MODES[(index + 1) % len(RENDER_MODES)]
+                    if event.key == keymap["culling"]:
+                        self.culling = not self.culling
+                    if event.key == keymap["lod"]:
+                        self.lod = not self.lod
+                    if event.key == keymap["profiler"]:
+                        self.toggle_profiler()
+                    if event.key == keymap["profiler_export"] and self.profiler.frames:
+                        self.profiler_overlay.show_export(self.export_profile())
 
             # Camera
             self.camera.update_position(keys, dt)
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-            glLoadIdentity()
-            self.camera.apply_view()
-
-            # Draw and update
-            self.draw_skybox(self.skybox_texture)
-            self.draw_axes(length=5.0, width=5.0)
-            self.draw_scene(wireframe=wireframe, textured=texture)
-            self.update_scene()
-
-            # Axis overlay
-            m = glGetFloatv(GL_MODELVIEW_MATRIX).copy()
-            # Supprimer la translation
-            m[3][0] = m[3][1] = m[3][2] = 0.0
-            self.draw_axes_overlay(m)
-
-            # Update
+            self.render_frame(wireframe=wireframe, textured=texture, dt=dt)
+
+            # Update (la limite à 60 fps est appliquée une seule fois, en haut de boucle)
+            self.profiler.begin("flip")
             pygame.display.flip()
-            self.clock.tick(60)
+            self.profiler.end()
+            self.profiler.end_frame()
+
+        if self.streamer is not None:
+            self.streamer.shutdown()
 
     def draw_cube(self):
         # Test function keeped
@@ -184,9 +404,9 @@ class Engine():
         glEnd()
 
     def draw_axes(self, length=1.0, width=1.0):
-        glDisable(GL_TEXTURE_2D)
-        glDisable(GL_TEXTURE_CUBE_MAP)
-        glLineWidth(width)
+        # Textures déjà désactivées (état de base entre deux phases), largeur 1 par défaut
+        if width != 1.0:
+            glLineWidth(width)
 
         glBegin(GL_LINES)
 
@@ -206,14 +426,15 @@ class Engine():
         glVertex3f(0.0, 0.0, length)
 
         glEnd()
+        self.count_draw(6)
 
         glColor3f(1.0, 1.0, 1.0)
-        glEnable(GL_TEXTURE_2D)
-        glLineWidth(1.0)
+        if width != 1.0:
+            glLineWidth(1.0)
 
     def draw_axes_overlay(self, camera_rotation_matrix):
-        viewport = glGetIntegerv(GL_VIEWPORT)
-        glViewport(0, viewport[3] - 100, 100, 100)
+        width, height = self.screen_size
+        glViewport(0, height - 100, 100, 100)
 
         glMatrixMode(GL_PROJECTION)
         glPushMatrix()
@@ -236,53 +457,22 @@ class Engine():
         glPopMatrix()
         glMatrixMode(GL_MODELVIEW)
 
-        glViewport(*viewport)
+        glViewport(0, 0, width, height)
 
     def load_texture(self, path):
-        from PIL import Image
-        img = Image.open(path).convert("RGB")
-        img_data = img.tobytes("raw", "RGB", 0, -1)
-        width, height = img.size
-
-        tex_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, tex_id)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, GL_RGB, GL_UNSIGNED_BYTE, img_data)
-
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glBindTexture(GL_TEXTURE_2D, 0)
-        return tex_id
+        # Pixels décodés, orientés et mipmappés lus depuis le cache de textures
+        if self.streamer is not None:
+            return self.streamer.load_texture(path, compress=self.compress_textures)
+        return create_texture_2d(path, compress=self.compress_textures)
 
     def load_obj(self, filename):
-        vertices = []
-        texcoords = []
-        faces = []
-
-        with open(filename, 'r') as file:
-            for line in file:
-                if line.startswith('v '):
-                    parts = line.strip().split()
-                    vertex = list(map(float, parts[1:4]))
-                    vertices.append(vertex)
-                elif line.startswith('vt '):
-                    parts = line.strip().split()
-                    uv = list(map(float, parts[1:3]))
-                    texcoords.append(uv)
-                elif line.startswith('f '):
-                    parts = line.strip().split()[1:]
-                    face = []
-                    for p in parts:
-                        v_indices = p.split('/')
-                        v_idx = int(v_indices[0]) - 1
-                        vt_idx = int(v_indices[1]) - 1 if len(v_indices) > 1 and v_indices[1] != '' else None
-                        face.append((v_idx, vt_idx))
-                    if len(face) == 3:
-                        faces.append(face)
-                    elif len(face) == 4:
-                        faces.append([face[0], face[1], face[2]])
-                        faces.append([face[0], face[2], face[3]])
-
-        return vertices, faces, texcoords
+        # Chargeur partagé avec Object3D, converti au format attendu par draw_obj
+        mesh = load_mesh(filename)
+        faces = [
+            [(v_idx, vt_idx if vt_idx >= 0 else None) for v_idx, vt_idx in zip(face, face_uv)]
+            for face, face_uv in zip(mesh.faces.tolist(), mesh.face_texcoords.tolist())
+        ]
+        return mesh.positions, faces, mesh.texcoords.tolist()
  
     def draw_obj(self, vertices, faces, texcoords, texture_id=None, wireframe=False, texture=False):
         if texture and texture_id:
@@ -313,94 +503,39 @@ class Engine():
             glDisable(GL_TEXTURE_2D)
 
     def load_skybox(self, folder_path):
-        from PIL import Image
         faces = [
             "right.png", "left.png",
             "top.png", "bottom.png",
             "front.png", "back.png",
         ]
-        
-        texID = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_CUBE_MAP, texID)
-
-        target_faces = [
-            GL_TEXTURE_CUBE_MAP_POSITIVE_X,
-            GL_TEXTURE_CUBE_MAP_NEGATIVE_X,
-            GL_TEXTURE_CUBE_MAP_POSITIVE_Y,
-            GL_TEXTURE_CUBE_MAP_NEGATIVE_Y,
-            GL_TEXTURE_CUBE_MAP_POSITIVE_Z,
-            GL_TEXTURE_CUBE_MAP_NEGATIVE_Z,
-        ]
-
-        for i in range(6):
-            img = Image.open(os.path.join(folder_path, faces[i])).convert('RGB')
-            img = img.transpose(Image.FLIP_TOP_BOTTOM)
-            img = img.transpose(Image.FLIP_LEFT_RIGHT)
-            img_data = img.tobytes("raw", "RGB", 0, -1)
-            glTexImage2D(target_faces[i], 0, GL_RGB, img.width, img.height, 0, GL_RGB, GL_UNSIGNED_BYTE, img_data)
-
-        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
-
-        return texID
+        # Les six faces sont décodées en parallèle (ou relues depuis le cache)
+        paths = [os.path.join(folder_path, face) for face in faces]
+        if self.streamer is not None:
+            return self.streamer.load_cube_map(paths, compress=self.compress_textures)
+        return create_cube_map(paths, compress=self.compress_textures)
 
     def draw_skybox(self, texture_id):
-        size = 50.0
+        if self.skybox is None:
+            self.skybox = SkyboxBuffer(size=50.0)
+
+        # Dessinée après la scène, profondeur forcée au plan lointain :
+        # seuls les pixels laissés vides par la géométrie passent le test LEQUAL
         glDepthFunc(GL_LEQUAL)
+        glDepthMask(GL_FALSE)
+        glDepthRange(1.0, 1.0)
         glEnable(GL_TEXTURE_CUBE_MAP)
         glBindTexture(GL_TEXTURE_CUBE_MAP, texture_id)
         glPushMatrix()
-        
-        # Supprime les translations de la caméra
-        m = glGetFloatv(GL_MODELVIEW_MATRIX)
-        m[3][0] = m[3][1] = m[3][2] = 0.0
-        glLoadMatrixf(m)
-
-        glBegin(GL_QUADS)
-
-        # Face droite
-        glTexCoord3f(1, -1, -1); glVertex3f( size, -size, -size)
-        glTexCoord3f(1, -1,  1); glVertex3f( size, -size,  size)
-        glTexCoord3f(1,  1,  1); glVertex3f( size,  size,  size)
-        glTexCoord3f(1,  1, -1); glVertex3f( size,  size, -size)
-
-        # Face gauche
-        glTexCoord3f(-1, -1,  1); glVertex3f(-size, -size,  size)
-        glTexCoord3f(-1, -1, -1); glVertex3f(-size, -size, -size)
-        glTexCoord3f(-1,  1, -1); glVertex3f(-size,  size, -size)
-        glTexCoord3f(-1,  1,  1); glVertex3f(-size,  size,  size)
-
-        # Face top
-        glTexCoord3f(-1, 1, -1); glVertex3f(-size,  size, -size)
-        glTexCoord3f( 1, 1, -1); glVertex3f( size,  size, -size)
-        glTexCoord3f( 1, 1,  1); glVertex3f( size,  size,  size)
-        glTexCoord3f(-1, 1,  1); glVertex3f(-size,  size,  size)
-
-        # Face bottom
-        glTexCoord3f(-1, -1,  1); glVertex3f(-size, -size,  size)
-        glTexCoord3f( 1, -1,  1); glVertex3f( size, -size,  size)
-        glTexCoord3f( 1, -1, -1); glVertex3f( size, -size, -size)
-        glTexCoord3f(-1, -1, -1); glVertex3f(-size, -size, -size)
-
-        # Face front
-        glTexCoord3f(-1, -1, -1); glVertex3f(-size, -size, -size)
-        glTexCoord3f( 1, -1, -1); glVertex3f( size, -size, -size)
-        glTexCoord3f( 1,  1, -1); glVertex3f( size,  size, -size)
-        glTexCoord3f(-1,  1, -1); glVertex3f(-size,  size, -size)
-
-        # Face back
-        glTexCoord3f( 1, -1, 1); glVertex3f( size, -size, size)
-        glTexCoord3f(-1, -1, 1); glVertex3f(-size, -size, size)
-        glTexCoord3f(-1,  1, 1); glVertex3f(-size,  size, size)
-        glTexCoord3f( 1,  1, 1); glVertex3f( size,  size, size)
 
-        glEnd()
+        # Vue sans translation, calculée côté CPU par la caméra
+        glLoadMatrixf(self.camera.gl_view_rotation_matrix)
+        self.skybox.draw()
+        self.count_draw(self.skybox.vertex_count)
 
         glPopMatrix()
         glDisable(GL_TEXTURE_CUBE_MAP)
+        glDepthRange(0.0, 1.0)
+        glDepthMask(GL_TRUE)
         glDepthFunc(GL_LESS)
 
 if __name__ == "__main__":
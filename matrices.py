@@ -0,0 +1,15 @@
+import numpy as np
+
+# Matrices 4x4 en convention numpy (M @ v), équivalentes aux appels GLU
+
+
+def perspective(fovy, aspect, near, far):
+    """Équivalent de gluPerspective (fovy en degrés)."""
+    f = 1.0 / np.tan(np.radians(fovy) / 2)
+    projection = np.zeros((4, 4))
+    projection[0, 0] = f / aspect
+    projection[1, 1] = f
+    projection[2, 2] = (far + near) / (near - far)
+    projection[2, 3] = 2 * far * near / (near - far)
+    projection[3, 2] = -1
+    return projection
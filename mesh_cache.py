@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from obj_loader import MeshData, load_obj
+
+# Cache des meshes compilés : un fichier binaire par OBJ source, chargé par memmap
+CACHE_DIR = os.path.join(".cache", "meshes")
+MAX_CACHE_BYTES = 1 << 30  # au-delà, les fichiers les moins récemment utilisés sont supprimés
+
+MAGIC = b"MESHCACH"
+VERSION = 1
+ALIGNMENT = 64
+
+MESH_ARRAYS = ("positions", "texcoords", "normals", "faces", "face_texcoords", "face_normals", "interleaved")
+
+
+def content_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(source, cache_dir=CACHE_DIR, suffix=".mesh", variant=""):
+    """Fichier de cache d'une source ; `variant` distingue plusieurs versions compilées d'une même source."""
+    key = hashlib.blake2b((os.path.abspath(source) + variant).encode(), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, key + suffix)
+
+
+def source_info(path):
+    """Informations de validité enregistrées dans l'en-tête d'un fichier de cache."""
+    stat = os.stat(path)
+    return {
+        "source": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": content_hash(path),
+    }
+
+
+def valid_header(path, target):
+    """En-tête du cache `target` s'il correspond encore à la source, sinon None.
+
+    Le cache est valide si la taille et la date de modification de la source
+    sont inchangées ; si seule la date a changé, le hash du contenu tranche.
+    """
+    stat = os.stat(path)
+    header = read_header(target)
+    if header is None or header["size"] != stat.st_size:
+        return None
+
+    valid = header["mtime_ns"] == stat.st_mtime_ns
+    if not valid and header["hash"] == content_hash(path):
+        # Fichier touché mais identique : on met juste l'en-tête à jour
+        header["mtime_ns"] = stat.st_mtime_ns
+        try:
+            _write_header(target, header)
+        except OSError:
+            pass  # cache en lecture seule : le hash sera recalculé au prochain chargement
+        valid = True
+    if not valid:
+        return None
+    try:
+        os.utime(target)  # horodatage LRU pour l'éviction
+    except OSError:
+        pass  # cache en lecture seule
+    return header
+
+
+def load_mesh(path, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Charge un OBJ via le cache compilé, en le (re)construisant si besoin."""
+    target = cache_path(path, cache_dir)
+    header = valid_header(path, target)
+    if header is not None:
+        return _map_mesh(target, header)
+
+    mesh = load_obj(path)
+    mesh.get_interleaved()
+    try:
+        write_cache(target, mesh, source_info(path))
+        evict(cache_dir, max_bytes)
+    except OSError:
+        # Cache en lecture seule ou disque plein : on garde le mesh parsé
+        pass
+    return mesh
+
+
+def write_cache(target, mesh, info, extra_arrays=None):
+    """Écrit les tableaux du mesh (et d'éventuels tableaux annexes) dans un fichier aligné."""
+    arrays = {name: getattr(mesh, name) for name in MESH_ARRAYS}
+    arrays.update(extra_arrays or {})
+    write_arrays(target, arrays, info)
+
+
+def write_arrays(target, arrays, info):
+    """Écrit des tableaux nommés derrière un en-tête JSON, chacun aligné pour le memmap."""
+    arrays = dict(arrays)
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+
+    header = dict(info, version=VERSION, arrays=entries)
+    header_bytes = _encode_header(header)
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as file:
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(len(header_bytes) + entries[name]["offset"])
+            file.write(array.tobytes())
+    os.replace(tmp, target)
+
+
+def read_header(target):
+    try:
+        with open(target, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                return None
+            size = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(size))
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != VERSION:
+        return None
+    header["header_size"] = size
+    header["data_offset"] = _align(len(MAGIC) + 8 + size)
+    return header
+
+
+def read_array(target, header, name):
+    """Tableau nommé du fichier de cache, en memmap lecture seule (sans copie)."""
+    entry = header["arrays"][name]
+    shape = tuple(entry["shape"])
+    if 0 in shape:
+        return np.zeros(shape, dtype=entry["dtype"])
+    return np.memmap(target, dtype=entry["dtype"], mode='r', offset=header["data_offset"] + entry["offset"], shape=shape)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, suffix=".mesh"):
+    """Supprime les fichiers les moins récemment utilisés tant que le cache dépasse max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(suffix):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+
+
+def _map_mesh(target, header):
+    arrays = {name: read_array(target, header, name) for name in MESH_ARRAYS}
+    interleaved = arrays.pop("interleaved")
+    mesh = MeshData(**arrays)
+    mesh.interleaved = interleaved
+    return mesh
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _encode_header(header, size=None):
+    payload = json.dumps({k: v for k, v in header.items() if k not in ("header_size", "data_offset")}).encode()
+    # Réserve de la place pour pouvoir réécrire l'en-tête sur place
+    payload = payload.ljust(size or _align(len(payload) + 256), b' ')
+    prefix = MAGIC + len(payload).to_bytes(8, 'little')
+    return (prefix + payload).ljust(_align(len(prefix) + len(payload)), b'\0')
+
+
+def _write_header(target, header):
+    header_bytes = _encode_header(header, header["header_size"])
+    if len(header_bytes) != header["data_offset"]:
+        return
+    with open(target, 'r+b') as file:
+        file.write(header_bytes)
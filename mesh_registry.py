@@ -0,0 +1,235 @@
+import functools
+import logging
+import os
+
+import numpy as np
+
+from frustum import local_bounds
+from mesh_cache import load_mesh
+from obj_loader import MeshData
+
+logger = logging.getLogger(__name__)
+
+
+def placeholder_mesh_data():
+    """Cube unitaire texturé affiché à la place d'un mesh encore en chargement."""
+    positions = np.array([
+        (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1),
+        (-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1),
+    ], dtype=np.float32) * 0.5
+    texcoords = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)
+    quads = np.array([
+        (0, 1, 2, 3), (5, 4, 7, 6), (4, 0, 3, 7), (1, 5, 6, 2), (3, 2, 6, 7), (4, 5, 1, 0),
+    ], dtype=np.int32)
+    faces = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+    face_texcoords = np.repeat(np.array([(0, 1, 2), (0, 2, 3)], dtype=np.int32), len(quads), axis=0)
+    return MeshData(positions, texcoords, np.zeros((0, 3), dtype=np.float32), faces, face_texcoords,
+                    np.full_like(faces, -1))
+
+
+class Mesh:
+    """Géométrie partagée par toutes les instances d'un même fichier OBJ.
+
+    Les tableaux sont en lecture seule : chaque Object3D ne garde que son
+    propre état de transformation et une référence vers ce Mesh.
+    Un mesh chargé en arrière-plan expose la géométrie de `fallback` tant
+    qu'il n'est pas prêt ; les listeners sont prévenus quand il le devient.
+    Si son chargement échoue, il garde définitivement le placeholder.
+    Les niveaux de détail (`lods`, niveau 0 = ce mesh) sont générés ou relus
+    du cache à la première demande.
+    """
+    def __init__(self, path, data, fallback=None):
+        self.path = path
+        self.ref_count = 0
+        self.ready = data is not None
+        self._fallback = fallback
+        self._buffer = None
+        self._listeners = []
+        self.lods = None
+        self._lods_requested = False
+        self._set_data(data if data is not None else fallback.data)
+
+    def _set_data(self, data):
+        self.data = data
+        self.vertices = np.ascontiguousarray(data.positions, dtype=np.float32)
+        self.vertices.flags.writeable = False
+        self._homogeneous_vertices = None
+        # Bornes locales (AABB min/max, centre et rayon de sphère), calculées une fois au chargement
+        self.bounds = local_bounds(self.vertices)
+        self._picker = None
+
+    @property
+    def homogeneous_vertices(self):
+        """Sommets (N, 4) en coordonnées homogènes, construits au premier besoin."""
+        if self._homogeneous_vertices is None:
+            homogeneous = np.ones((len(self.vertices), 4), dtype=np.float32)
+            homogeneous[:, :3] = self.vertices
+            homogeneous.flags.writeable = False
+            self._homogeneous_vertices = homogeneous
+        return self._homogeneous_vertices
+
+    @property
+    def picker(self):
+        """TrianglePicker des triangles du mesh (BVH de triangles pour les gros meshes), construit au premier pick."""
+        from picking import TrianglePicker
+
+        if self._picker is None:
+            self._picker = TrianglePicker(self.vertices[self.data.faces])
+        return self._picker
+
+    def get_buffer(self):
+        """VBO partagé, uploadé une seule fois pour toutes les instances."""
+        from renderer import MeshBuffer
+
+        if not self.ready:
+            return self._fallback.get_buffer()
+        if self._buffer is None:
+            self._buffer = MeshBuffer(self.data.get_interleaved())
+        return self._buffer
+
+    def stream(self, data):
+        """Générateur d'upload (thread principal) : remplace le placeholder une fois le VBO complet."""
+        from renderer import MeshBuffer
+
+        buffer = yield from MeshBuffer.stream(data.get_interleaved())
+        if self.ref_count <= 0:
+            # Plus aucune instance n'attend ce mesh
+            buffer.delete()
+            return
+        self._set_data(data)
+        self._buffer = buffer
+        self.ready = True
+        for listener in list(self._listeners):
+            listener(self)
+
+    @property
+    def lod_count(self):
+        return len(self.lods) if self.lods is not None else 1
+
+    def get_lod(self, level):
+        """Mesh du niveau de détail `level` (le plus grossier disponible au-delà), ce mesh tant qu'ils manquent."""
+        if level <= 0 or self.lods is None:
+            return self
+        return self.lods[min(level, len(self.lods) - 1)]
+
+    def request_lods(self, streamer=None):
+        """Lance une fois la génération des niveaux de détail, en arrière-plan avec un `streamer`.
+
+        Sans streamer, rien n'est généré pendant le rendu : seuls les niveaux
+        déjà en cache (pré-calculés par `python lod.py`) sont utilisés.
+        """
+        from lod import LOD_MIN_TRIANGLES, cached_lods, load_lods
+
+        if self._lods_requested or not self.ready:
+            return
+        self._lods_requested = True
+        if self.data.triangle_count < LOD_MIN_TRIANGLES or not os.path.isfile(self.path):
+            self.lods = [self]
+            return
+        if streamer is None:
+            try:
+                levels = cached_lods(self.path) or []
+            except Exception:
+                # Cache illisible : même repli que `_lods_failed`, le mesh reste en pleine résolution
+                levels = []
+            self.lods = [self] + [Mesh(f"{self.path}#lod{level}", data) for level, data in enumerate(levels, 1)]
+        else:
+            # Simplification en Python pur : dans un processus, pour ne pas garder le GIL pendant le rendu
+            streamer.submit(functools.partial(load_lods, self.path), self._stream_lods, self._lods_failed, process=True)
+
+    def _stream_lods(self, levels):
+        """Générateur d'upload des VBO des niveaux ; ils ne servent qu'une fois tous envoyés."""
+        from renderer import MeshBuffer
+
+        lods = [self]
+        for level, data in enumerate(levels, 1):
+            lod = Mesh(f"{self.path}#lod{level}", data)
+            lod._buffer = yield from MeshBuffer.stream(data.get_interleaved())
+            lods.append(lod)
+        if self.ref_count <= 0:
+            for lod in lods[1:]:
+                lod.release_gpu()
+            return
+        self.lods = lods
+
+    def _load_failed(self, error):
+        """Chargement en arrière-plan raté (fichier absent, OBJ invalide) : le placeholder reste affiché."""
+        logger.error("chargement de %s impossible : %s", self.path, error)
+
+    def _lods_failed(self, error):
+        """Génération des niveaux ratée : le mesh reste affiché en pleine résolution, sans nouvelle tentative."""
+        self.lods = [self]
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def release_gpu(self):
+        if self._buffer is not None:
+            self._buffer.delete()
+            self._buffer = None
+        for lod in (self.lods or [])[1:]:
+            lod.release_gpu()
+        self.lods = None
+        self._lods_requested = False
+
+
+class MeshRegistry:
+    """Meshes chargés, indexés par chemin absolu et comptés par référence."""
+    def __init__(self):
+        self._meshes = {}
+        self._placeholder = None
+
+    @property
+    def placeholder(self):
+        if self._placeholder is None:
+            self._placeholder = Mesh("<placeholder>", placeholder_mesh_data())
+        return self._placeholder
+
+    def acquire(self, path, streamer=None):
+        """Mesh partagé d'un fichier ; avec un `streamer`, le chargement se fait en arrière-plan."""
+        key = os.path.abspath(path)
+        mesh = self._meshes.get(key)
+        if mesh is None:
+            if streamer is None:
+                mesh = Mesh(key, load_mesh(path))
+            else:
+                mesh = Mesh(key, None, fallback=self.placeholder)
+                streamer.submit(lambda: _load_for_upload(path), mesh.stream, mesh._load_failed)
+            self._meshes[key] = mesh
+        mesh.ref_count += 1
+        return mesh
+
+    def release(self, mesh):
+        mesh.ref_count -= 1
+        if mesh.ref_count <= 0:
+            mesh.release_gpu()
+            self._meshes.pop(mesh.path, None)
+
+    def __len__(self):
+        return len(self._meshes)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._meshes
+
+    def stats(self):
+        return {
+            "meshes": len(self._meshes),
+            "pending": sum(not mesh.ready for mesh in self._meshes.values()),
+            "instances": sum(mesh.ref_count for mesh in self._meshes.values()),
+            "vertices": sum(len(mesh.vertices) for mesh in self._meshes.values()),
+        }
+
+
+def _load_for_upload(path):
+    # Tout le travail CPU (parsing, tableau entrelacé) reste sur le worker
+    data = load_mesh(path)
+    data.get_interleaved()
+    return data
+
+
+# Registre par défaut utilisé par Object3D
+registry = MeshRegistry()
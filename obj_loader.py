@@ -0,0 +1,244 @@
+import numpy as np
+
+# Taille des blocs lus d'un coup (alignés sur une fin de ligne)
+CHUNK_SIZE = 1 << 24
+
+SPACE = ord(' ')
+NEWLINE = ord('\n')
+SLASH = ord('/')
+
+# Tabulations et retours chariot traités comme des espaces
+_WHITESPACE = bytes.maketrans(b'\t\r', b'  ')
+
+
+class MeshData:
+    """Géométrie d'un fichier OBJ, triangulée, sous forme de tableaux numpy.
+
+    positions (N, 3), texcoords (T, 2), normals (K, 3) en float32 ;
+    faces, face_texcoords, face_normals (F, 3) en int32, indices à partir de 0,
+    -1 quand le coin n'a pas d'UV / de normale.
+    """
+    def __init__(self, positions, texcoords, normals, faces, face_texcoords, face_normals):
+        self.positions = positions
+        self.texcoords = texcoords
+        self.normals = normals
+        self.faces = faces
+        self.face_texcoords = face_texcoords
+        self.face_normals = face_normals
+        self.interleaved = None
+
+    @property
+    def triangle_count(self):
+        return len(self.faces)
+
+    def get_interleaved(self):
+        """Tableau (3 * nb_triangles, 5) : position et UV de chaque coin de triangle."""
+        if self.interleaved is None:
+            v_idx = self.faces.ravel()
+            vt_idx = self.face_texcoords.ravel()
+
+            data = np.zeros((len(v_idx), 5), dtype=np.float32)
+            data[:, :3] = self.positions[v_idx]
+            if len(self.texcoords):
+                has_uv = vt_idx >= 0
+                data[has_uv, 3:] = self.texcoords[vt_idx[has_uv]]
+            self.interleaved = data
+        return self.interleaved
+
+
+class _Chunk:
+    """Résultat brut d'un bloc : attributs et coins de faces avant triangulation."""
+    def __init__(self):
+        self.positions = []
+        self.texcoords = []
+        self.normals = []
+        self.corners = []         # (C, 3) indices v, vt, vn déjà résolus (0-based, -1 absent)
+        self.corner_counts = []   # nombre de coins de chaque face
+
+
+def load_obj(path):
+    """Charge un OBJ : n-gones triangulés en éventail, normales, indices négatifs."""
+    counts = [0, 0, 0]  # v, vt, vn déjà lus, pour résoudre les indices relatifs
+    chunks = []
+    with open(path, 'rb') as file:
+        while True:
+            data = file.read(CHUNK_SIZE)
+            if not data:
+                break
+            data += file.readline()
+            chunks.append(_parse_chunk(data, counts))
+
+    return _assemble(chunks)
+
+
+def count_lines(path):
+    with open(path, 'rb') as file:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: file.read(CHUNK_SIZE), b''))
+
+
+def _parse_chunk(data, counts):
+    data = data.translate(_WHITESPACE)
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    chunk = _Chunk()
+    try:
+        _parse_chunk_vectorized(data, counts, chunk)
+    except ValueError:
+        # Lignes hétérogènes (commentaires en fin de ligne, formats de faces mélangés...)
+        chunk = _Chunk()
+        _parse_chunk_lines(data, counts, chunk)
+    return chunk
+
+
+def _parse_chunk_vectorized(data, counts, chunk):
+    buf = np.frombuffer(data, dtype=np.uint8).copy()
+    ends = np.flatnonzero(buf == NEWLINE)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # Trois premiers caractères de chaque ligne pour classer les lignes
+    padded = np.concatenate([buf, np.zeros(3, dtype=np.uint8)])
+    c0, c1, c2 = padded[starts], padded[starts + 1], padded[starts + 2]
+    is_v = (c0 == ord('v')) & (c1 == SPACE)
+    is_vt = (c0 == ord('v')) & (c1 == ord('t')) & (c2 == SPACE)
+    is_vn = (c0 == ord('v')) & (c1 == ord('n')) & (c2 == SPACE)
+    is_f = (c0 == ord('f')) & (c1 == SPACE)
+
+    # Efface les préfixes pour ne garder que des nombres
+    buf[starts[is_v | is_vt | is_vn | is_f]] = SPACE
+    buf[starts[is_vt | is_vn] + 1] = SPACE
+
+    # Début de chaque token : caractère non blanc précédé d'un blanc
+    blank = buf <= SPACE
+    token_start = ~blank
+    token_start[1:] &= blank[:-1]
+    tokens_per_line = _count_between(np.flatnonzero(token_start), starts, ends)
+
+    lengths = ends - starts + 1
+    chunk.positions = _parse_floats(buf, is_v, lengths, tokens_per_line, 3)
+    chunk.texcoords = _parse_floats(buf, is_vt, lengths, tokens_per_line, 2)
+    chunk.normals = _parse_floats(buf, is_vn, lengths, tokens_per_line, 3)
+
+    if is_f.any():
+        corner_counts = tokens_per_line[is_f]
+        slashes = _count_between(np.flatnonzero(buf == SLASH), starts[is_f], ends[is_f])
+        width = int(slashes[0] // corner_counts[0]) + 1
+        if width > 3 or np.any(slashes != corner_counts * (width - 1)):
+            raise ValueError("formats de faces hétérogènes")
+
+        blob = _select_bytes(buf, is_f, lengths).replace(b'//', b'/0/').replace(b'/', b' ')
+        values = np.fromstring(blob, dtype=np.int64, sep=' ')
+        if len(values) != corner_counts.sum() * width:
+            raise ValueError("faces illisibles")
+        values = values.reshape(-1, width)
+
+        # Nombre d'attributs définis avant chaque face, pour les indices négatifs
+        before = [
+            counts[i] + np.cumsum(mask)[is_f] for i, mask in enumerate((is_v, is_vt, is_vn))
+        ]
+        corners = np.full((len(values), 3), -1, dtype=np.int64)
+        for i in range(width):
+            corners[:, i] = _resolve(values[:, i], np.repeat(before[i], corner_counts))
+        chunk.corners = corners
+        chunk.corner_counts = corner_counts
+
+    counts[0] += len(chunk.positions)
+    counts[1] += len(chunk.texcoords)
+    counts[2] += len(chunk.normals)
+
+
+def _count_between(positions, starts, ends):
+    """Nombre de positions (triées) dans chaque intervalle [start, end)."""
+    return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+
+def _select_bytes(buf, mask, lengths):
+    return buf[np.repeat(mask, lengths)].tobytes()
+
+
+def _parse_floats(buf, mask, lengths, tokens_per_line, size):
+    n = int(mask.sum())
+    if n == 0:
+        return np.zeros((0, size), dtype=np.float32)
+    widths = tokens_per_line[mask]
+    width = int(widths[0])
+    if width < size or np.any(widths != width):
+        raise ValueError("nombre de composantes variable")
+    values = np.fromstring(_select_bytes(buf, mask, lengths), dtype=np.float32, sep=' ')
+    if len(values) != n * width:
+        raise ValueError("nombres illisibles")
+    return values.reshape(n, width)[:, :size]
+
+
+def _resolve(indices, before):
+    """Indices OBJ (1-based, négatifs relatifs, 0 absent) vers des indices 0-based."""
+    return np.where(indices > 0, indices - 1, np.where(indices < 0, before + indices, -1))
+
+
+def _parse_chunk_lines(data, counts, chunk):
+    """Chemin lent ligne par ligne, pour les fichiers que le parseur vectorisé refuse."""
+    positions, texcoords, normals = [], [], []
+    corners, corner_counts = [], []
+    for line in data.split(b'\n'):
+        parts = line.split(b'#', 1)[0].split()
+        if not parts:
+            continue
+        tag = parts[0]
+        if tag == b'v':
+            positions.append([float(p) for p in parts[1:4]])
+        elif tag == b'vt':
+            texcoords.append([float(p) for p in parts[1:3]])
+        elif tag == b'vn':
+            normals.append([float(p) for p in parts[1:4]])
+        elif tag == b'f':
+            before = (counts[0] + len(positions), counts[1] + len(texcoords), counts[2] + len(normals))
+            for p in parts[1:]:
+                corner = [-1, -1, -1]
+                for i, value in enumerate(p.split(b'/')[:3]):
+                    if value:
+                        index = int(value)
+                        corner[i] = index - 1 if index > 0 else before[i] + index
+                corners.append(corner)
+            corner_counts.append(len(parts) - 1)
+
+    chunk.positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    chunk.texcoords = np.array(texcoords, dtype=np.float32).reshape(-1, 2)
+    chunk.normals = np.array(normals, dtype=np.float32).reshape(-1, 3)
+    chunk.corners = np.array(corners, dtype=np.int64).reshape(-1, 3)
+    chunk.corner_counts = np.array(corner_counts, dtype=np.int64)
+    counts[0] += len(chunk.positions)
+    counts[1] += len(chunk.texcoords)
+    counts[2] += len(chunk.normals)
+
+
+def _concat(arrays, width, dtype):
+    arrays = [a for a in arrays if len(a)]
+    if not arrays:
+        return np.zeros((0, width), dtype=dtype)
+    return np.ascontiguousarray(np.concatenate(arrays).astype(dtype, copy=False))
+
+
+def _assemble(chunks):
+    positions = _concat([c.positions for c in chunks], 3, np.float32)
+    texcoords = _concat([c.texcoords for c in chunks], 2, np.float32)
+    normals = _concat([c.normals for c in chunks], 3, np.float32)
+    corners = _concat([c.corners for c in chunks], 3, np.int64)
+    corner_counts = np.concatenate([np.zeros(0, dtype=np.int64)] + [c.corner_counts for c in chunks if len(c.corner_counts)])
+
+    # Triangulation en éventail : (c0, ci, ci+1) pour i = 1 .. n-2
+    face_starts = np.cumsum(corner_counts) - corner_counts  # vide si le fichier n'a aucune face
+    tri_per_face = np.maximum(corner_counts - 2, 0)
+    first = np.repeat(face_starts, tri_per_face)
+    local = np.arange(tri_per_face.sum()) - np.repeat(np.cumsum(tri_per_face) - tri_per_face, tri_per_face) + 1
+    triangles = np.stack([first, first + local, first + local + 1], axis=1)
+
+    tri_corners = corners[triangles]  # (F, 3 coins, 3 attributs)
+    return MeshData(
+        positions,
+        texcoords,
+        normals,
+        np.ascontiguousarray(tri_corners[:, :, 0], dtype=np.int32),
+        np.ascontiguousarray(tri_corners[:, :, 1], dtype=np.int32),
+        np.ascontiguousarray(tri_corners[:, :, 2], dtype=np.int32),
+    )
@@ -2,7 +2,67 @@ import pygame as pg
 import numpy as np
 import math
 from constants import *
-from quaternion import Quaternion
+from quaternion import Quaternion, QuaternionArray
+
+# Profondeur minimale (distance + z) en dessous de laquelle un point n'est pas projeté
+NEAR_PLANE = 1e-3
+
+
+def draw_segments(surface, color, starts, ends, width=1):
+    """Trace tous les segments d'un coup en écrivant directement les pixels de la surface."""
+    if len(starts) == 0:
+        return
+    width_px, height_px = surface.get_size()
+    starts = np.asarray(starts, dtype=np.float64)
+    delta = np.asarray(ends, dtype=np.float64) - starts
+    steps = np.maximum(np.ceil(np.abs(delta).max(axis=1)).astype(np.int64), 1)
+
+    # Seule la partie à l'écran est échantillonnée (un sommet proche de la caméra projette à des
+    # millions de pixels), sur la même grille d'échantillons que le segment entier
+    keep, t0, t1 = clip_segments(starts, delta, (1 - width, 1 - width, width_px - 1, height_px - 1))
+    if not keep.any():
+        return
+    starts, delta, steps = starts[keep], delta[keep], steps[keep]
+    first = np.floor(t0[keep] * steps).astype(np.int64)
+    counts = np.ceil(t1[keep] * steps).astype(np.int64) - first + 1
+
+    # Un échantillon par pixel le long de l'axe principal de chaque segment
+    segment = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(len(segment)) - np.repeat(np.cumsum(counts) - counts, counts) + first[segment]
+    t = offsets / steps[segment]
+    xs = np.rint(starts[segment, 0] + delta[segment, 0] * t).astype(np.int64)
+    ys = np.rint(starts[segment, 1] + delta[segment, 1] * t).astype(np.int64)
+
+    # Épaisseur : on décale perpendiculairement à l'axe principal
+    x_major = np.abs(delta[segment, 0]) >= np.abs(delta[segment, 1])
+    all_x, all_y = [xs], [ys]
+    for shift in range(1, width):
+        all_x.append(xs + np.where(x_major, 0, shift))
+        all_y.append(ys + np.where(x_major, shift, 0))
+    xs, ys = np.concatenate(all_x), np.concatenate(all_y)
+
+    inside = (xs >= 0) & (xs < width_px) & (ys >= 0) & (ys < height_px)
+    pixels = pg.surfarray.pixels2d(surface)
+    pixels[xs[inside], ys[inside]] = surface.map_rgb(color)
+    del pixels  # libère le verrou de la surface
+
+
+def clip_segments(starts, delta, box):
+    """Liang–Barsky vectorisé : segments starts + t * delta (N, 2) contre box = (xmin, ymin, xmax, ymax).
+
+    Renvoie (masque des segments qui touchent la boîte, t d'entrée, t de sortie), t dans [0, 1].
+    """
+    xmin, ymin, xmax, ymax = box
+    # Une contrainte p * t <= q par bord : gauche, droite, haut, bas
+    p = np.stack([-delta[:, 0], delta[:, 0], -delta[:, 1], delta[:, 1]], axis=1)
+    q = np.stack([starts[:, 0] - xmin, xmax - starts[:, 0], starts[:, 1] - ymin, ymax - starts[:, 1]], axis=1)
+    parallel = p == 0
+    ratio = np.divide(q, p, out=np.zeros_like(q), where=~parallel)
+    t0 = np.where(p < 0, ratio, 0.0).max(axis=1)
+    t1 = np.where(p > 0, ratio, 1.0).min(axis=1)
+    keep = (t0 <= t1) & ~np.any(parallel & (q < 0), axis=1)
+    return keep, t0, t1
+
 
 class Object:
     def __init__(self, positions, angles, vertices, edges):
@@ -11,14 +71,17 @@ class Object:
         self.base_vertices = vertices
         self.vertices = vertices
         self.edges = edges
+        self._edge_indices = np.array(edges, dtype=np.int64).reshape(-1, 2)
 
     def project(self, point, fov, distance):
         factor = fov / (distance + point[2])
         x = int(SCREEN_SIZE[0] / 2 + point[0] * factor * SCREEN_SIZE[0] / 2)
         y = int(SCREEN_SIZE[1] / 2 - point[1] * factor * SCREEN_SIZE[1] / 2)
         return (x, y)
-    
-    def world_to_camera(self, point, camera):
+
+    @staticmethod
+    def camera_matrix(camera):
+        """Rotation monde -> caméra (pitch . yaw), à construire une seule fois par frame."""
         cos_yaw = math.cos(-camera.yaw)
         sin_yaw = math.sin(-camera.yaw)
         cos_pitch = math.cos(-camera.pitch)
@@ -36,21 +99,56 @@ class Object:
             [0, sin_pitch, cos_pitch]
         ])
 
-        rotation_matrix = rotation_pitch @ rotation_yaw
-
-        translated_point = point - camera.position
-        camera_point = rotation_matrix @ translated_point
-        return camera_point
-
-    def draw(self, surface, fov, distance, camera):
-        transformed_vertices = []
-        for v in self.vertices:
-            camera_space_vertex = self.world_to_camera(v, camera)
-            projected_point = self.project(camera_space_vertex, fov, distance)
-            transformed_vertices.append(projected_point)
-
-        for edge in self.edges:
-            pg.draw.line(surface, (255, 255, 255), transformed_vertices[edge[0]], transformed_vertices[edge[1]], 2)
+        return rotation_pitch @ rotation_yaw
+
+    def world_to_camera(self, point, camera, rotation_matrix=None):
+        if rotation_matrix is None:
+            rotation_matrix = self.camera_matrix(camera)
+        translated_point = np.asarray(point) - camera.position
+        return translated_point @ rotation_matrix.T
+
+    def project_points(self, points, fov, distance):
+        """Projette des points caméra (N, 3) ; renvoie les pixels (N, 2) et le masque des points devant le plan proche."""
+        depth = distance + points[:, 2]
+        visible = depth > NEAR_PLANE
+        return self._to_screen(points, fov / np.where(visible, depth, 1.0)), visible
+
+    @staticmethod
+    def _to_screen(points, factor):
+        """Pixels (N, 2) de points caméra, `factor` = fov / profondeur de chaque point."""
+        screen = np.empty((len(points), 2), dtype=np.int64)
+        # Troncature vers zéro comme int() dans project
+        screen[:, 0] = np.trunc(SCREEN_SIZE[0] / 2 + points[:, 0] * factor * SCREEN_SIZE[0] / 2)
+        screen[:, 1] = np.trunc(SCREEN_SIZE[1] / 2 - points[:, 1] * factor * SCREEN_SIZE[1] / 2)
+        return screen
+
+    def draw(self, surface, fov, distance, camera, rotation_matrix=None):
+        if rotation_matrix is None:
+            rotation_matrix = self.camera_matrix(camera)
+        camera_space = self.world_to_camera(self.vertices, camera, rotation_matrix)
+        screen, visible = self.project_points(camera_space, fov, distance)
+
+        # Arêtes dont au moins une extrémité est devant la caméra, dessinées en un seul lot
+        edges = self._edge_indices
+        start_visible, end_visible = visible[edges[:, 0]], visible[edges[:, 1]]
+        keep = start_visible | end_visible
+        edges, start_visible = edges[keep], start_visible[keep]
+        starts, ends = screen[edges[:, 0]], screen[edges[:, 1]]
+
+        # Arêtes qui traversent le plan proche : l'extrémité derrière est ramenée sur le plan, en espace caméra
+        crossing = start_visible != end_visible[keep]
+        if crossing.any():
+            front = np.where(start_visible[crossing], edges[crossing, 0], edges[crossing, 1])
+            back = np.where(start_visible[crossing], edges[crossing, 1], edges[crossing, 0])
+            p0, p1 = camera_space[front], camera_space[back]
+            d0, d1 = distance + p0[:, 2], distance + p1[:, 2]
+            t = (NEAR_PLANE - d0) / (d1 - d0)
+            clipped = self._to_screen(p0 + (p1 - p0) * t[:, None], fov / NEAR_PLANE)
+            rows = np.flatnonzero(crossing)
+            behind_start = ~start_visible[crossing]
+            starts[rows[behind_start]] = clipped[behind_start]
+            ends[rows[~behind_start]] = clipped[~behind_start]
+        draw_segments(surface, (255, 255, 255), starts, ends, 2)
 
     def rotateWithMatrix(self, x=0, y=0, z=0):
         # Mise à jour des angles d'Euler
@@ -92,12 +190,8 @@ class Object:
 
         q_total = qz * qy * qx
 
-        rotated_vertices = []
-        for v in self.base_vertices:
-            rotated_v = q_total.rotate_vector(v)
-            rotated_vertices.append(rotated_v)
-
-        self.vertices = np.array(rotated_vertices)
+        # Rotation de tous les sommets en une opération
+        self.vertices = QuaternionArray.from_quaternions([q_total]).rotate(self.base_vertices)
 
     def rotateRelativeWithMatrix(self, dx=0, dy=0, dz=0):
         self.rotateWithMatrix(self.angles[0]+dx, self.angles[1]+dy, self.angles[2]+dz)
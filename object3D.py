@@ -1,12 +1,11 @@
 import numpy as np
 from quaternion import Quaternion
+from constants import RENDER_IMMEDIATE, RENDER_RETAINED
+from frustum import transform_bounds
+import mesh_registry
 
 class Object3D:
-    def __init__(self, path, texture_id=None):
-        self._vertices = []
-        self._faces = []
-        self._texcoords = []
-
+    def __init__(self, path, texture_id=None, lazy=False, gpu_transform=False, registry=None, streamer=None):
         self._position = np.array([0.0, 0.0, 0.0])
         self._scale = np.array([1.0, 1.0, 1.0])
         self._rotation = Quaternion(1, 0, 0, 0)
@@ -14,40 +13,115 @@ class Object3D:
         self._pivot = np.array([0.0, 0.0, 0.0])
         self._rotation_matrix = np.identity(3) 
         self._use_rotation_matrix = False # Flag pour savoir quelle rotation utiliser
+        self._lazy = lazy # En mode lazy, les setters ne font que marquer l'objet comme sale
+        self._dirty = True
+        # Sommets chargés immuables, la matrice modèle est appliquée par OpenGL au rendu
+        self._gpu_transform = gpu_transform
+        self._local_matrix = None
+        self._world_matrix = None
+        self._world_bounds = None
+        self._move_listeners = [] # Prévenus à chaque changement de transformation (BVH de la scène)
+        # Hiérarchie : la transformation est relative au parent ; le SceneGraph met en cache les matrices monde
+        self._parent = None
+        self._children = []
+        self._graph = None
+        self.lod_level = 0 # Niveau de détail choisi par le moteur, utilisé en mode retained
 
+        # Géométrie partagée entre toutes les instances d'un même fichier
+        self._registry = registry if registry is not None else mesh_registry.registry
+        # Avec un streamer, le mesh se charge en arrière-plan (placeholder affiché en attendant)
+        self._streamer = streamer
+        self._mesh = None
         self.load(path)
         self._texture_id = texture_id
-        self._original_vertices = list(self._vertices)
-        self.apply_transformations()
+        self._mark_dirty()
 
     def load(self, filename):
-        with open(filename, 'r') as file:
-            for line in file:
-                if line.startswith('v '):
-                    parts = line.strip().split()
-                    vertex = list(map(float, parts[1:4]))
-                    self._vertices.append(vertex)
-                elif line.startswith('vt '):
-                    parts = line.strip().split()
-                    uv = list(map(float, parts[1:3]))
-                    self._texcoords.append(uv)
-                elif line.startswith('f '):
-                    parts = line.strip().split()[1:]
-                    face = []
-                    for p in parts:
-                        v_indices = p.split('/')
-                        v_idx = int(v_indices[0]) - 1
-                        vt_idx = int(v_indices[1]) - 1 if len(v_indices) > 1 and v_indices[1] != '' else None
-                        face.append((v_idx, vt_idx))
-                    if len(face) == 3:
-                        self._faces.append(face)
-                    elif len(face) == 4:
-                        self._faces.append([face[0], face[1], face[2]])
-                        self._faces.append([face[0], face[2], face[3]])
-
-    def draw(self, wireframe=False, textured=False):
-        from OpenGL.GL import glEnable, glDisable, glBindTexture, glColor3f, glBegin, glEnd, glTexCoord2f, glVertex3fv, GL_TEXTURE_2D, GL_TRIANGLES, GL_LINE_LOOP
-        
+        if self._mesh is not None:
+            self.release()
+        mesh = self._registry.acquire(filename, self._streamer)
+        self._mesh = mesh
+        self._attach(mesh)
+        if not mesh.ready:
+            mesh.add_listener(self._on_mesh_ready)
+
+    def _attach(self, mesh):
+        self._original_vertices = mesh.vertices
+        self._vertices = mesh.vertices
+        self._texcoords = mesh.data.texcoords
+        self._normals = mesh.data.normals
+        self._faces = mesh.data.faces
+        self._face_texcoords = mesh.data.face_texcoords
+        self._face_normals = mesh.data.face_normals
+        self._dirty = True
+        self._world_bounds = None
+        self.lod_level = 0
+        if self._graph is not None:
+            # Nouvelles bornes locales à reprendre dans le graphe
+            self._graph.mark_dirty(self, bounds=True)
+
+    def release(self):
+        """Rend la géométrie partagée au registre (libérée quand plus aucune instance ne l'utilise)."""
+        if self._mesh is not None:
+            self._mesh.remove_listener(self._on_mesh_ready)
+            self._registry.release(self._mesh)
+            self._mesh = None
+
+    def _on_mesh_ready(self, mesh):
+        # Géométrie définitive arrivée : on remplace les références vers le placeholder
+        mesh.remove_listener(self._on_mesh_ready)
+        self._attach(mesh)
+        self._mark_dirty()
+
+    def add_move_listener(self, listener):
+        self._move_listeners.append(listener)
+
+    def remove_move_listener(self, listener):
+        if listener in self._move_listeners:
+            self._move_listeners.remove(listener)
+
+    @property
+    def mesh(self):
+        return self._mesh
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @property
+    def children(self):
+        return tuple(self._children)
+
+    def set_parent(self, parent):
+        """Rattache l'objet à `parent` (None : racine) ; sa transformation locale devient relative au parent."""
+        if parent is self._parent:
+            return
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor is self:
+                raise ValueError("un objet ne peut pas être son propre ancêtre")
+            ancestor = ancestor._parent
+        if self._parent is not None:
+            self._parent._children.remove(self)
+        self._parent = parent
+        if parent is not None:
+            parent._children.append(self)
+        if self._graph is not None:
+            self._graph.structure_changed()
+        self._mark_dirty()
+
+    @property
+    def lod_mesh(self):
+        """Mesh du niveau de détail courant."""
+        return self._mesh.get_lod(self.lod_level)
+
+    @property
+    def texture_id(self):
+        return self._texture_id
+
+    def draw(self, wireframe=False, textured=False, mode=RENDER_IMMEDIATE):
+        from OpenGL.GL import glEnable, glDisable, glBindTexture, glColor3f, GL_TEXTURE_2D
+
         if textured and self._texture_id:
             glEnable(GL_TEXTURE_2D)
             glBindTexture(GL_TEXTURE_2D, self._texture_id)
@@ -55,70 +129,195 @@ class Object3D:
             glDisable(GL_TEXTURE_2D)
 
         glColor3f(1, 1, 1)
+        if mode == RENDER_RETAINED:
+            self._draw_retained(wireframe, textured)
+        else:
+            self._draw_immediate(wireframe, textured)
+
+        if self._texture_id:
+            glBindTexture(GL_TEXTURE_2D, 0)
+            glDisable(GL_TEXTURE_2D)
+
+    def render_key(self, wireframe=False, textured=False, mode=RENDER_IMMEDIATE):
+        """Clé d'état (mode, texture, wireframe) pour la RenderQueue ; texture 0 = non texturé."""
+        textured = textured and self._texture_id and len(self._texcoords) > 0
+        return (mode, self._texture_id if textured else 0, bool(wireframe))
+
+    def draw_queued(self, queue, mode, wireframe=False, textured=False):
+        """Dessin sans changement d'état : texture, couleur et client states sont posés par la file."""
+        from OpenGL.GL import glPushMatrix, glPopMatrix, glMultMatrixf
+        from renderer import to_gl_matrix
+
+        if mode != RENDER_RETAINED:
+            self._draw_immediate(wireframe, textured)
+            return
+        buffer = self.lod_mesh.get_buffer()
+        queue.use_buffer(buffer, textured)
+        glPushMatrix()
+        glMultMatrixf(to_gl_matrix(self.get_model_matrix()))
+        buffer.draw_arrays()
+        glPopMatrix()
+
+    def _draw_immediate(self, wireframe, textured):
+        from OpenGL.GL import glBegin, glEnd, glTexCoord2f, glVertex3fv, glPushMatrix, glPopMatrix, glMultMatrixf, GL_TRIANGLES, GL_LINE_LOOP
+        from renderer import to_gl_matrix
+
+        if self._gpu_transform:
+            vertices = self._original_vertices
+            glPushMatrix()
+            glMultMatrixf(to_gl_matrix(self.get_model_matrix()))
+        else:
+            vertices = self.vertices
+
         if wireframe:
-            for face in self._faces:
+            for face in self._faces.tolist():
                 glBegin(GL_LINE_LOOP)
-                for vertex in face:
-                    v_idx = vertex[0]
-                    glVertex3fv(self._vertices[v_idx])
+                for v_idx in face:
+                    glVertex3fv(vertices[v_idx])
                 glEnd()
         else:
+            textured = textured and len(self._texcoords) > 0
             glBegin(GL_TRIANGLES)
-            for face in self._faces:
-                for v_idx, vt_idx in face:
-                    if textured and vt_idx is not None and self._texcoords:
+            for face, face_uv in zip(self._faces.tolist(), self._face_texcoords.tolist()):
+                for v_idx, vt_idx in zip(face, face_uv):
+                    if textured and vt_idx >= 0:
                         glTexCoord2f(*self._texcoords[vt_idx])
-                    glVertex3fv(self._vertices[v_idx])
+                    glVertex3fv(vertices[v_idx])
             glEnd()
 
-        if self._texture_id:
-            glBindTexture(GL_TEXTURE_2D, 0)
-            glDisable(GL_TEXTURE_2D)
+        if self._gpu_transform:
+            glPopMatrix()
 
-    def apply_transformations(self):
-        transformed_vertices = []
-        for vertex in self._original_vertices:
-            relative = np.array(vertex) - self._pivot
-            # Échelle
-            scaled = relative * self._scale
-            # Cisaillement
-            sheared = self._sheer @ scaled
-            # Rotation (Quaternion ou Matrice)
-            if self._use_rotation_matrix:
-                rotated = self._rotation_matrix @ sheared
+    def _draw_retained(self, wireframe, textured):
+        from OpenGL.GL import glPushMatrix, glPopMatrix, glMultMatrixf
+        from renderer import to_gl_matrix
+
+        # VBO partagé uploadé une fois, la transformation passe par la matrice modèle
+        glPushMatrix()
+        glMultMatrixf(to_gl_matrix(self.get_model_matrix()))
+        self.lod_mesh.get_buffer().draw(textured=textured and len(self._texcoords) > 0, wireframe=wireframe)
+        glPopMatrix()
+
+    def get_interleaved(self):
+        """Tableau (3 * nb_triangles, 5) : position locale et UV de chaque coin de triangle."""
+        return self._mesh.data.get_interleaved()
+
+    def get_rotation_matrix(self):
+        """Rotation locale en matrice 3x3, depuis la matrice ou le quaternion selon le mode courant."""
+        if self._use_rotation_matrix:
+            return np.asarray(self._rotation_matrix, dtype=np.float64)
+        return np.array(self._rotation.to_rotation_matrix(), dtype=np.float64)
+
+    def get_local_matrix(self):
+        """Compose pivot, échelle, cisaillement, rotation et translation en une matrice affine 4x4 (repère du parent)."""
+        if self._local_matrix is not None:
+            return self._local_matrix
+
+        # M = T(pivot + position) . R . Sh . S . T(-pivot)
+        linear = self.get_rotation_matrix() @ self._sheer @ np.diag(self._scale)
+        model = np.identity(4)
+        model[:3, :3] = linear
+        model[:3, 3] = self._pivot + self._position - linear @ self._pivot
+        self._local_matrix = model
+        return model
+
+    def get_model_matrix(self):
+        """Matrice monde : matrice locale composée avec celles des ancêtres (calculées par lots dans un SceneGraph)."""
+        if self._world_matrix is None:
+            if self._graph is not None:
+                self._world_matrix = self._graph.world_matrix(self)
+            elif self._parent is not None:
+                self._world_matrix = self._parent.get_model_matrix() @ self.get_local_matrix()
             else:
-                rotated = self._rotation.rotate_vector(sheared)
-            # Translation
-            translated = rotated + self._pivot + self._position
-            transformed_vertices.append(translated.tolist())
-        self._vertices = transformed_vertices
+                self._world_matrix = self.get_local_matrix()
+        return self._world_matrix
+
+    @property
+    def world_bounds(self):
+        """Bornes monde (10,) : min, max, centre et rayon, déduits des bornes du mesh et de la matrice modèle."""
+        if self._world_bounds is None:
+            self._world_bounds = transform_bounds(self.get_model_matrix(), *self._mesh.bounds)
+        return self._world_bounds
+
+    def apply_transformations(self):
+        model = self.get_model_matrix()
+        # Un seul produit matriciel (N, 4) @ (4, 3) sur tous les sommets
+        self._vertices = self._mesh.homogeneous_vertices @ model[:3].T.astype(np.float32)
+        self._dirty = False
+
+    def _mark_dirty(self, local_matrix=None):
+        self._dirty = True
+        self._local_matrix = local_matrix
+        self._world_matrix = None
+        self._world_bounds = None
+        if self._graph is not None:
+            # Le graphe recalcule tout le sous-arbre à sa prochaine mise à jour et prévient alors les listeners
+            self._graph.mark_dirty(self)
+            return
+        for listener in self._move_listeners:
+            listener(self)
+        if not (self._lazy or self._gpu_transform):
+            self.apply_transformations()
+        # Hors graphe, les descendants sont invalidés un par un
+        for child in self._children:
+            child._mark_dirty()
+
+    def _world_changed(self, matrix, bounds):
+        """Appelé par le SceneGraph avec la matrice et les bornes monde recalculées."""
+        self._dirty = True
+        self._world_matrix = matrix
+        self._world_bounds = bounds
+        for listener in self._move_listeners:
+            listener(self)
+
+    @property
+    def vertices(self):
+        """Sommets transformés, recalculés au plus une fois après une série de setters."""
+        if self._dirty:
+            self.apply_transformations()
+        return self._vertices
+
+    def set_transform(self, position=None, rotation=None, scale=None, local_matrix=None):
+        """Pose position, rotation (quaternion unitaire, Quaternion ou (w, x, y, z)) et échelle en une fois.
+
+        `local_matrix` est la matrice locale correspondante si l'appelant l'a
+        déjà calculée (Animator, par lots) ; sinon elle sera recomposée.
+        """
+        if position is not None:
+            self._position = np.array(position, dtype=np.float64)
+        if rotation is not None:
+            self._rotation = rotation if isinstance(rotation, Quaternion) else Quaternion(*rotation)
+            self._use_rotation_matrix = False
+        if scale is not None:
+            self._scale = np.array(scale, dtype=np.float64)
+        self._mark_dirty(local_matrix)
 
     def rotate(self, quaternion):
         q = quaternion.normalize()
         self._rotation = q * self._rotation
         self._use_rotation_matrix = False
-        self.apply_transformations()
+        self._mark_dirty()
 
     def set_rotation(self, quaternion):
         self._rotation = quaternion.normalize()
         self._use_rotation_matrix = False
-        self.apply_transformations()
+        self._mark_dirty()
 
     def translate(self, dx, dy, dz):
         self._position += np.array([dx, dy, dz])
-        self.apply_transformations()
+        self._mark_dirty()
 
     def set_position(self, x, y, z):
         self._position = np.array([x, y, z])
-        self.apply_transformations()
+        self._mark_dirty()
 
     def scale(self, sx, sy, sz):
         self._scale += np.array([sx, sy, sz])
-        self.apply_transformations()
+        self._mark_dirty()
 
     def set_scale(self, x, y, z):
         self._scale = np.array([x, y, z])
-        self.apply_transformations()
+        self._mark_dirty()
 
     def shear(self, xy=0, xz=0, yx=0, yz=0, zx=0, zy=0):
         new_shear = np.array([
@@ -127,7 +326,7 @@ class Object3D:
             [zx, zy, 1 ]
         ])
         self._sheer = new_shear @ self._sheer
-        self.apply_transformations()
+        self._mark_dirty()
 
     def set_shear(self, xy=0, xz=0, yx=0, yz=0, zx=0, zy=0):
         self._sheer = np.array([
@@ -135,24 +334,26 @@ class Object3D:
             [yx, 1,  yz],
             [zx, zy, 1 ]
         ])
-        self.apply_transformations()
+        self._mark_dirty()
 
     def rotateM(self, matrix):
         self._rotation_matrix = matrix @ self._rotation_matrix
         self._use_rotation_matrix = True
-        self.apply_transformations()
+        self._mark_dirty()
 
     def set_rotationM(self, matrix):
         self._rotation_matrix = matrix
         self._use_rotation_matrix = True
-        self.apply_transformations()
+        self._mark_dirty()
 
     def set_pivot(self, x, y, z):
         self._pivot = np.array([x, y, z])
+        self._mark_dirty()
 
     def set_pivot_world(self, x, y, z):
         pivot_world = np.array([x, y, z])
         relative = pivot_world - self._position
         inv_rot = self._rotation.inverse()
         pivot_local = inv_rot.rotate_vector(relative)
-        self._pivot = pivot_local
+        self._pivot = np.array(pivot_local)
+        self._mark_dirty()
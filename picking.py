@@ -0,0 +1,169 @@
+import heapq
+import math
+
+import numpy as np
+
+from bvh import morton_codes, ray_box
+
+BRUTE_FORCE_TRIANGLES = 4096  # en dessous, un seul test vectorisé sur tout le mesh
+LEAF_TRIANGLES = 64  # triangles par feuille du BVH de triangles
+LEAF_BATCH = 8  # feuilles testées ensemble, dans l'ordre de traversée
+
+
+class PickResult:
+    """Objet touché par un rayon : triangle (indice dans les faces du mesh), distance et point monde."""
+    def __init__(self, name, obj, triangle, distance, point):
+        self.name = name
+        self.obj = obj
+        self.triangle = triangle
+        self.distance = distance
+        self.point = point
+
+    def __repr__(self):
+        return f"PickResult({self.name!r}, triangle={self.triangle}, distance={self.distance:.3f})"
+
+
+def intersect_triangles(origin, direction, triangles):
+    """Distances (N,) du rayon aux triangles (N, 3, 3) par Möller–Trumbore vectorisé ; inf pour un raté.
+
+    Les deux faces des triangles comptent, le rayon part de `origin` (t > 0).
+    """
+    triangles = np.asarray(triangles)
+    dx, dy, dz = (float(value) for value in direction)
+    # Composantes séparées : np.cross sur des (N, 3) coûte bien plus que ces produits
+    v0x, v0y, v0z = (triangles[:, 0, axis].astype(np.float64) for axis in range(3))
+    e1x, e1y, e1z = (triangles[:, 1, axis] - triangles[:, 0, axis] for axis in range(3))
+    e2x, e2y, e2z = (triangles[:, 2, axis] - triangles[:, 0, axis] for axis in range(3))
+
+    # p = direction x edge2, det = edge1 . p
+    px, py, pz = dy * e2z - dz * e2y, dz * e2x - dx * e2z, dx * e2y - dy * e2x
+    det = e1x * px + e1y * py + e1z * pz
+    valid = np.abs(det) > 1e-12  # rayon parallèle au triangle
+    inv_det = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+
+    # s = origin - v0, q = s x edge1
+    sx, sy, sz = origin[0] - v0x, origin[1] - v0y, origin[2] - v0z
+    u = (sx * px + sy * py + sz * pz) * inv_det
+    qx, qy, qz = sy * e1z - sz * e1y, sz * e1x - sx * e1z, sx * e1y - sy * e1x
+    v = (dx * qx + dy * qy + dz * qz) * inv_det
+    t = (e2x * qx + e2y * qy + e2z * qz) * inv_det
+    hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 1e-9)
+    return np.where(hit, t, np.inf)
+
+
+class TrianglePicker:
+    """Lancer de rayon sur les triangles d'un mesh, en repère local.
+
+    Les petits meshes sont testés d'un bloc. Au-delà de BRUTE_FORCE_TRIANGLES,
+    les triangles sont triés selon le code de Morton de leur centre et
+    regroupés en feuilles de LEAF_TRIANGLES sous un BVH statique : seules les
+    feuilles traversées par le rayon sont testées, de la plus proche à la
+    plus lointaine, jusqu'à ce qu'aucune ne puisse battre le meilleur impact.
+    """
+    def __init__(self, triangles):
+        triangles = np.asarray(triangles, dtype=np.float32)
+        self.triangle_count = len(triangles)
+        if self.triangle_count <= BRUTE_FORCE_TRIANGLES:
+            self.order = None
+            self.triangles = triangles
+            return
+
+        mins = triangles.min(axis=1)
+        maxs = triangles.max(axis=1)
+        self.order = np.argsort(morton_codes((mins + maxs) / 2), kind="stable")
+        self.triangles = triangles[self.order]
+        mins, maxs = mins[self.order], maxs[self.order]
+
+        # Feuilles : blocs contigus de triangles triés
+        starts = np.arange(0, self.triangle_count, LEAF_TRIANGLES)
+        leaf_count = len(starts)
+        total = 2 * leaf_count - 1
+        boxes = np.empty((total, 6))
+        boxes[:leaf_count, :3] = np.minimum.reduceat(mins, starts)
+        boxes[:leaf_count, 3:] = np.maximum.reduceat(maxs, starts)
+        children = np.full((total, 2), -1, dtype=np.int64)
+
+        # Noeuds internes : feuilles voisines regroupées deux à deux, niveau par niveau
+        level = np.arange(leaf_count)
+        next_node = leaf_count
+        while len(level) > 1:
+            pairs = len(level) // 2
+            lefts, rights = level[0:2 * pairs:2], level[1:2 * pairs:2]
+            nodes = np.arange(next_node, next_node + pairs)
+            boxes[nodes, :3] = np.minimum(boxes[lefts, :3], boxes[rights, :3])
+            boxes[nodes, 3:] = np.maximum(boxes[lefts, 3:], boxes[rights, 3:])
+            children[nodes, 0], children[nodes, 1] = lefts, rights
+            next_node += pairs
+            level = np.concatenate([nodes, level[2 * pairs:]])
+
+        self.root = int(level[0])
+        self.leaf_count = leaf_count
+        # Listes Python : le parcours lit les noeuds un par un
+        self._boxes = [tuple(box) for box in boxes.tolist()]
+        self._children = children.tolist()
+
+    def intersect(self, origin, direction, max_distance=math.inf):
+        """(indice du triangle, distance) le plus proche, ou None. La distance est en multiples de `direction`."""
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        if self.order is None:
+            distances = intersect_triangles(origin, direction, self.triangles)
+            return _closest(distances, max_distance, 0, None)
+
+        origin_tuple = tuple(origin.tolist())
+        inverse = tuple(1.0 / d if d else math.inf for d in direction.tolist())
+        best = None
+        heap = []
+        entry = ray_box(origin_tuple, inverse, self._boxes[self.root], max_distance)
+        if entry is not None:
+            heap.append((entry, self.root))
+        while heap:
+            # Les LEAF_BATCH prochaines feuilles dans l'ordre d'entrée du rayon, testées en un seul appel :
+            # le coût d'un test numpy tient surtout à son lancement, pas au nombre de triangles
+            leaves = []
+            while heap and len(leaves) < LEAF_BATCH:
+                entry, node = heapq.heappop(heap)
+                if entry > max_distance:
+                    heap = []
+                    break
+                left, right = self._children[node]
+                if left < 0:
+                    leaves.append(node)
+                    continue
+                for child in (left, right):
+                    child_entry = ray_box(origin_tuple, inverse, self._boxes[child], max_distance)
+                    if child_entry is not None:
+                        heapq.heappush(heap, (child_entry, child))
+            if not leaves:
+                break
+            indices = (np.asarray(leaves)[:, None] * LEAF_TRIANGLES + np.arange(LEAF_TRIANGLES)).ravel()
+            indices = indices[indices < self.triangle_count]
+            distances = intersect_triangles(origin, direction, self.triangles[indices])
+            hit = _closest(distances, max_distance, 0, indices)
+            if hit is not None:
+                best = (int(self.order[hit[0]]), hit[1])
+                max_distance = hit[1]
+        return best
+
+
+def _closest(distances, max_distance, offset, order):
+    if not len(distances):
+        return None
+    index = int(np.argmin(distances))
+    if distances[index] == np.inf or distances[index] > max_distance:
+        return None
+    triangle = offset + index
+    return (int(order[triangle]) if order is not None else triangle), float(distances[index])
+
+
+def pick_object(obj, origin, direction, max_distance=math.inf):
+    """(triangle, distance) du rayon monde sur un Object3D, ou None.
+
+    Le rayon est ramené en repère local par l'inverse de la matrice modèle ;
+    sa direction n'est pas renormalisée, la distance reste donc celle du
+    rayon monde.
+    """
+    inverse = np.linalg.inv(obj.get_model_matrix())
+    local_origin = inverse[:3, :3] @ origin + inverse[:3, 3]
+    local_direction = inverse[:3, :3] @ direction
+    return obj.mesh.picker.intersect(local_origin, local_direction, max_distance)
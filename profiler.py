@@ -0,0 +1,260 @@
+import csv
+import json
+import time
+from collections import deque
+
+# Compteurs remis à zéro à chaque frame
+COUNTERS = ("gl_calls", "draw_calls", "vertices", "texture_binds", "gl_readbacks")
+
+
+class FrameProfiler:
+    """Chronomètres par phase (imbriqués) et compteurs GL par frame, sur un historique glissant.
+
+    Désactivé, chaque appel se réduit à un test de booléen : les appels peuvent
+    rester en place dans la boucle de rendu.
+    """
+    def __init__(self, history=120, enabled=False):
+        self.enabled = enabled
+        self.frames = deque(maxlen=history)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._events = []
+        self._stack = []
+        self._frame_start = None
+        self._frame_index = 0
+        self._gl_patches = []
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._events = []
+        self._stack = []
+        for name in self.counters:
+            self.counters[name] = 0
+        self._frame_start = time.perf_counter_ns()
+
+    def begin(self, name):
+        if self.enabled:
+            self._stack.append((name, time.perf_counter_ns()))
+
+    def end(self):
+        if self.enabled and self._stack:
+            name, start = self._stack.pop()
+            self._events.append((name, start, time.perf_counter_ns() - start, len(self._stack)))
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        duration = time.perf_counter_ns() - self._frame_start
+        events = sorted(self._events, key=lambda event: event[1])
+        phases = {}
+        for name, _, elapsed, _ in events:
+            phases[name] = phases.get(name, 0) + elapsed
+        self.frames.append({
+            "index": self._frame_index,
+            "start": self._frame_start,
+            "duration": duration,
+            "phases": phases,
+            "counters": dict(self.counters),
+            "events": events,
+        })
+        self._frame_index += 1
+        self._frame_start = None
+
+    def summary(self):
+        """Moyennes sur l'historique : durée de frame, phases (ms) et compteurs."""
+        if not self.frames:
+            return None
+        count = len(self.frames)
+        frame_ms = sum(frame["duration"] for frame in self.frames) / count / 1e6
+        phases = {}
+        for name, _, _, depth in self.frames[-1]["events"]:
+            if name not in phases:
+                total = sum(frame["phases"].get(name, 0) for frame in self.frames)
+                phases[name] = (depth, total / count / 1e6)
+        counters = {name: sum(frame["counters"][name] for frame in self.frames) / count for name in COUNTERS}
+        return {"frames": count, "frame_ms": frame_ms, "fps": 1e3 / frame_ms if frame_ms else 0.0,
+                "phases": phases, "counters": counters}
+
+    def export_csv(self, path):
+        """Une ligne par frame de l'historique : durée, temps de chaque phase (ms) et compteurs."""
+        names = []
+        for frame in self.frames:
+            names.extend(name for name in frame["phases"] if name not in names)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "frame_ms"] + names + list(COUNTERS))
+            for frame in self.frames:
+                writer.writerow(
+                    [frame["index"], frame["duration"] / 1e6]
+                    + [frame["phases"].get(name, 0) / 1e6 for name in names]
+                    + [frame["counters"][name] for name in COUNTERS])
+
+    def export_chrome_trace(self, path):
+        """Historique au format Trace Event (chrome://tracing, Perfetto)."""
+        if not self.frames:
+            return
+        origin = self.frames[0]["start"]
+        events = []
+        for frame in self.frames:
+            events.append({"name": f"frame {frame['index']}", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": (frame["start"] - origin) / 1e3, "dur": frame["duration"] / 1e3})
+            for name, start, elapsed, _ in frame["events"]:
+                events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                               "ts": (start - origin) / 1e3, "dur": elapsed / 1e3})
+            events.append({"name": "counters", "ph": "C", "pid": 0, "tid": 0,
+                           "ts": (frame["start"] - origin) / 1e3, "args": frame["counters"]})
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def instrument_gl(self, *modules):
+        """Remplace les fonctions gl*/glu* par des versions comptées.
+
+        Le module OpenGL.GL lui-même est patché (imports locaux) ainsi que les
+        modules donnés, qui ont importé les fonctions avec `from OpenGL.GL import *`.
+        """
+        import OpenGL.GL
+        import OpenGL.GLU
+
+        if self._gl_patches:
+            return
+        sources = (OpenGL.GL, OpenGL.GLU)
+        wrappers = {}
+        for module in sources:
+            for name, function in vars(module).items():
+                if name.startswith("gl") and callable(function) and id(function) not in wrappers:
+                    wrappers[id(function)] = (function, _counted(self.counters, name, function))
+
+        for module in sources + modules:
+            for name, value in list(vars(module).items()):
+                original, wrapper = wrappers.get(id(value), (None, None))
+                if original is value and name.startswith("gl"):
+                    self._gl_patches.append((module, name, value))
+                    setattr(module, name, wrapper)
+
+    def uninstrument_gl(self):
+        for module, name, original in reversed(self._gl_patches):
+            setattr(module, name, original)
+        self._gl_patches = []
+
+
+def _counted(counters, name, function):
+    """Enveloppe comptée d'une fonction GL, spécialisée selon ce qu'elle fait."""
+    if name.startswith("glGet") or name == "glReadPixels":
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            counters["gl_readbacks"] += 1
+            return function(*args, **kwargs)
+    elif name == "glBindTexture":
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            counters["texture_binds"] += 1
+            return function(*args, **kwargs)
+    elif name in ("glDrawArrays", "glDrawElements"):
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            counters["draw_calls"] += 1
+            counters["vertices"] += args[2]
+            return function(*args, **kwargs)
+    elif name in ("glDrawArraysInstanced", "glDrawElementsInstanced"):
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            counters["draw_calls"] += 1
+            counters["vertices"] += args[2] * args[-1]
+            return function(*args, **kwargs)
+    elif name == "glBegin":
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            counters["draw_calls"] += 1
+            return function(*args, **kwargs)
+    elif name.startswith("glVertex") and not name.startswith("glVertexAttrib") and name != "glVertexPointer":
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            counters["vertices"] += 1
+            return function(*args, **kwargs)
+    else:
+        def counted(*args, **kwargs):
+            counters["gl_calls"] += 1
+            return function(*args, **kwargs)
+    counted.__name__ = name
+    counted.__wrapped__ = function
+    return counted
+
+
+class ProfilerOverlay:
+    """Affiche le résumé du profileur en haut à droite de l'écran."""
+    REFRESH = 0.5  # secondes entre deux mises à jour du texte
+    MAX_OBJECTS = 5  # objets les plus lents listés sous draw_scene
+
+    def __init__(self, profiler, font_size=20):
+        self.profiler = profiler
+        self.font_size = font_size
+        self._font = None
+        self._image = None
+        self._updated = 0.0
+        self.exported = ()  # chemins du dernier export, listés sous le résumé
+
+    def show_export(self, paths):
+        self.exported = tuple(paths)
+        self._image = None  # texte regénéré dès la prochaine frame
+
+    def draw(self, screen_size):
+        from OpenGL.GL import (glPushAttrib, glPopAttrib, glDisable, glEnable, glBlendFunc, glWindowPos2i,
+                               glDrawPixels, GL_ENABLE_BIT, GL_COLOR_BUFFER_BIT, GL_DEPTH_TEST, GL_TEXTURE_2D,
+                               GL_TEXTURE_CUBE_MAP, GL_BLEND, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_RGBA,
+                               GL_UNSIGNED_BYTE)
+
+        now = time.perf_counter()
+        if self._image is None or now - self._updated > self.REFRESH:
+            self._image = self._render_text(self.lines())
+            self._updated = now
+        data, width, height = self._image
+
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_TEXTURE_2D)
+        glDisable(GL_TEXTURE_CUBE_MAP)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glWindowPos2i(max(0, screen_size[0] - width - 10), max(0, screen_size[1] - height - 10))
+        glDrawPixels(width, height, GL_RGBA, GL_UNSIGNED_BYTE, data)
+        glPopAttrib()
+
+    def lines(self):
+        summary = self.profiler.summary()
+        if summary is None:
+            return ["profiler: en attente de frames"] + self._export_lines()
+        lines = [f"frame {summary['frame_ms']:.2f} ms  ({summary['fps']:.0f} fps, {summary['frames']} frames)"]
+        objects = []
+        for name, (depth, ms) in summary["phases"].items():
+            if name.startswith("draw_scene/"):
+                objects.append((ms, name))
+            else:
+                lines.append(f"{'  ' * depth}{name:<20} {ms:8.3f} ms")
+        for ms, name in sorted(objects, reverse=True)[:self.MAX_OBJECTS]:
+            lines.append(f"    {name[len('draw_scene/'):]:<18} {ms:8.3f} ms")
+        counters = summary["counters"]
+        lines.append(f"gl calls {counters['gl_calls']:.0f}  draws {counters['draw_calls']:.0f}  "
+                     f"vertices {counters['vertices']:.0f}")
+        lines.append(f"texture binds {counters['texture_binds']:.0f}  glGet {counters['gl_readbacks']:.0f}")
+        return lines + self._export_lines()
+
+    def _export_lines(self):
+        return [f"exporté : {path}" for path in self.exported]
+
+    def _render_text(self, lines):
+        import pygame
+
+        if self._font is None:
+            pygame.font.init()
+            self._font = pygame.font.Font(None, self.font_size)  # police intégrée à pygame
+        rendered = [self._font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(surface.get_width() for surface in rendered) + 8
+        height = sum(surface.get_height() for surface in rendered) + 8
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 160))
+        y = 4
+        for surface in rendered:
+            panel.blit(surface, (4, y))
+            y += surface.get_height()
+        # Lignes retournées : glDrawPixels part du bas
+        return pygame.image.tostring(panel, "RGBA", True), width, height
@@ -1,12 +1,16 @@
 import math
 import random
+import numpy as np
 
 class Quaternion:
+    __slots__ = ("w", "x", "y", "z", "_matrix_key", "_matrix")
+
     def __init__(self, w, x, y, z):
         self.w = w
         self.x = x
         self.y = y
         self.z = z
+        self._matrix_key = None # Composantes pour lesquelles _matrix a été calculée
 
     def __add__(self, other):
         return Quaternion(
@@ -26,34 +30,78 @@ class Quaternion:
     
     def __mul__(self, other):
         if isinstance(other, Quaternion):
-            w = self.w * other.w - self.x * other.x - self.y * other.y - self.z * other.z
-            x = self.w * other.x + self.x * other.w + self.y * other.z - self.z * other.y
-            y = self.w * other.y - self.x * other.z + self.y * other.w + self.z * other.x
-            z = self.w * other.z + self.x * other.y - self.y * other.x + self.z * other.w
-            return Quaternion(w, x, y, z)
+            w1 = self.w; x1 = self.x; y1 = self.y; z1 = self.z
+            w2 = other.w; x2 = other.x; y2 = other.y; z2 = other.z
+            return Quaternion(
+                w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+                w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+            )
         elif isinstance(other, (int, float)):
             return Quaternion(self.w * other, self.x * other, self.y * other, self.z * other)
+        return NotImplemented
+
+    def imul(self, other):
+        """self = self * other, sans créer de nouvel objet."""
+        if isinstance(other, Quaternion):
+            w1 = self.w; x1 = self.x; y1 = self.y; z1 = self.z
+            w2 = other.w; x2 = other.x; y2 = other.y; z2 = other.z
+            self.w = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+            self.x = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
+            self.y = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
+            self.z = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+        else:
+            self.w *= other
+            self.x *= other
+            self.y *= other
+            self.z *= other
+        return self
     
     def conjugate(self):
         return Quaternion(self.w, -self.x, -self.y, -self.z)
     
     def norm(self):
-        return math.sqrt(self.w**2 + self.x**2 + self.y**2 + self.z**2)
+        w, x, y, z = self.w, self.x, self.y, self.z
+        return math.sqrt(w * w + x * x + y * y + z * z)
     
     def normalize(self):
         n = self.norm()
         if n == 0:
             return Quaternion(1, 0, 0, 0)
         return Quaternion(self.w / n, self.x / n, self.y / n, self.z / n)
+
+    def inormalize(self):
+        """Normalise sur place."""
+        n = self.norm()
+        if n == 0:
+            self.w, self.x, self.y, self.z = 1, 0, 0, 0
+        else:
+            self.w, self.x, self.y, self.z = self.w / n, self.x / n, self.y / n, self.z / n
+        return self
     
     def inverse(self):
-        w, x, y, z = self.w, self.x, self.y, self.z
-        return Quaternion(w, -x, -y, -z)
+        # q^-1 = q* / |q|², correct aussi pour un quaternion non unitaire
+        w = self.w; x = self.x; y = self.y; z = self.z
+        n2 = w * w + x * x + y * y + z * z
+        if 0.999999999999 < n2 < 1.000000000001:
+            # Cas courant (rotation) : le conjugué, sans division
+            return Quaternion(w, -x, -y, -z)
+        inv = 1 / n2
+        return Quaternion(w * inv, -x * inv, -y * inv, -z * inv)
     
     def rotate_vector(self, vector):
-        q_vec = Quaternion(0, *vector)
-        rotated_vec = self * q_vec * self.conjugate()
-        return (rotated_vec.x, rotated_vec.y, rotated_vec.z)
+        # Forme fermée de q v q* : (w² - |u|²) v + 2 (u.v) u + 2 w (u x v)
+        w, x, y, z = self.w, self.x, self.y, self.z
+        vx, vy, vz = vector
+        a = w * w - x * x - y * y - z * z
+        b = 2 * (x * vx + y * vy + z * vz)
+        c = 2 * w
+        return (
+            a * vx + b * x + c * (y * vz - z * vy),
+            a * vy + b * y + c * (z * vx - x * vz),
+            a * vz + b * z + c * (x * vy - y * vx),
+        )
     
     def to_matrix(self):
         """Retourne la matrice canonique M(q) du quaternion (4x4)."""
@@ -75,12 +123,23 @@ class Quaternion:
         return Quaternion(a, b, c, d)
         
     def to_rotation_matrix(self):
-        w, x, y, z = self.w, self.x, self.y, self.z
-        return [
-            [1 - 2*y*y - 2*z*z, 2*x*y - 2*w*z, 2*x*z + 2*w*y],
-            [2*x*y + 2*w*z, 1 - 2*x*x - 2*z*z, 2*y*z - 2*w*x],
-            [2*x*z - 2*w*y, 2*y*z + 2*w*x, 1 - 2*x*x - 2*y*y]
-        ]
+        """Matrice de rotation 3x3, calculée une fois tant que le quaternion ne change pas.
+
+        Retourne, comme avant le cache, une liste de listes neuve à chaque
+        appel : l'appelant peut la modifier sans toucher au cache.
+        """
+        w, x, y, z = key = (self.w, self.x, self.y, self.z)
+        if key == self._matrix_key:
+            m00, m01, m02, m10, m11, m12, m20, m21, m22 = self._matrix
+        else:
+            # 2*a*b == (2*a)*b exactement : mêmes valeurs qu'avec la formule développée
+            tx, ty, tz = 2*x, 2*y, 2*z
+            m00, m01, m02 = 1 - ty*y - tz*z, tx*y - tz*w, tx*z + ty*w
+            m10, m11, m12 = tx*y + tz*w, 1 - tx*x - tz*z, ty*z - tx*w
+            m20, m21, m22 = tx*z - ty*w, ty*z + tx*w, 1 - tx*x - ty*y
+            self._matrix = (m00, m01, m02, m10, m11, m12, m20, m21, m22)
+            self._matrix_key = key
+        return [[m00, m01, m02], [m10, m11, m12], [m20, m21, m22]]
     
     @staticmethod
     def from_rotation_matrix(matrix):
@@ -125,3 +184,184 @@ class Quaternion:
     
     def __repr__(self):
         return f"Quaternion({self.w}, {self.x}, {self.y}, {self.z})"
+
+
+class QuaternionArray:
+    """Tableau de N quaternions (w, x, y, z) stocké en numpy (N, 4).
+
+    Même sémantique que Quaternion, mais toutes les opérations sont vectorisées.
+    """
+    def __init__(self, data, dtype=np.float64):
+        data = np.asarray(data, dtype=dtype)
+        self.data = data.reshape(-1, 4)
+
+    @staticmethod
+    def identity(n, dtype=np.float64):
+        data = np.zeros((n, 4), dtype=dtype)
+        data[:, 0] = 1
+        return QuaternionArray(data, dtype)
+
+    @staticmethod
+    def random(n, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        return QuaternionArray(rng.uniform(-1, 1, (n, 4))).normalize()
+
+    @staticmethod
+    def from_quaternions(quaternions):
+        return QuaternionArray([(q.w, q.x, q.y, q.z) for q in quaternions])
+
+    @staticmethod
+    def from_axis_angle(axes, angles):
+        axes = np.asarray(axes, dtype=np.float64).reshape(-1, 3)
+        axes = axes / np.linalg.norm(axes, axis=1, keepdims=True)
+        half = np.asarray(angles, dtype=np.float64).reshape(-1, 1) / 2
+        xyz = axes * np.sin(half)
+        return QuaternionArray(np.hstack([np.broadcast_to(np.cos(half), (len(xyz), 1)), xyz]))
+
+    def to_quaternions(self):
+        return [Quaternion(*row) for row in self.data.tolist()]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Quaternion(*self.data[index].tolist())
+        return QuaternionArray(self.data[index], self.data.dtype)
+
+    def __setitem__(self, index, value):
+        if isinstance(value, Quaternion):
+            value = (value.w, value.x, value.y, value.z)
+        elif isinstance(value, QuaternionArray):
+            value = value.data
+        self.data[index] = value
+
+    def _components(self):
+        return self.data[:, 0], self.data[:, 1], self.data[:, 2], self.data[:, 3]
+
+    @staticmethod
+    def _as_data(other):
+        if isinstance(other, QuaternionArray):
+            return other.data
+        if isinstance(other, Quaternion):
+            return np.array([[other.w, other.x, other.y, other.z]])
+        return np.asarray(other, dtype=np.float64).reshape(-1, 4)
+
+    def __add__(self, other):
+        return QuaternionArray(self.data + self._as_data(other))
+
+    def __sub__(self, other):
+        return QuaternionArray(self.data - self._as_data(other))
+
+    def __mul__(self, other):
+        if isinstance(other, (int, float)):
+            return QuaternionArray(self.data * other)
+        if isinstance(other, np.ndarray) and other.ndim == 1:
+            return QuaternionArray(self.data * other[:, None])
+        # Produit de Hamilton, avec diffusion 1 x N ou N x 1
+        w1, x1, y1, z1 = self._components()
+        o = self._as_data(other)
+        w2, x2, y2, z2 = o[:, 0], o[:, 1], o[:, 2], o[:, 3]
+        return QuaternionArray(np.stack([
+            w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+            w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+            w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+            w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+        ], axis=1))
+
+    def __rmul__(self, other):
+        if isinstance(other, Quaternion):
+            return QuaternionArray(self._as_data(other)) * self
+        return self * other
+
+    def conjugate(self):
+        return QuaternionArray(self.data * np.array([1, -1, -1, -1], dtype=self.data.dtype))
+
+    def norm(self):
+        return np.linalg.norm(self.data, axis=1)
+
+    def normalize(self):
+        n = self.norm()
+        data = self.data / np.where(n == 0, 1, n)[:, None]
+        data[n == 0] = (1, 0, 0, 0)
+        return QuaternionArray(data, self.data.dtype)
+
+    def inverse(self):
+        return QuaternionArray(self.conjugate().data / np.sum(self.data ** 2, axis=1)[:, None])
+
+    def rotate(self, vectors):
+        """Applique q v q* à des vecteurs (M, 3) ; un quaternion par vecteur, ou un seul pour tous."""
+        v = np.asarray(vectors)
+        u = self.data[:, 1:]
+        w = self.data[:, :1]
+        # q v q* = (w² - |u|²) v + 2 (u.v) u + 2 w (u x v), valable aussi hors norme 1
+        return ((w * w - np.sum(u * u, axis=1, keepdims=True)) * v
+                + 2 * np.sum(u * v, axis=1, keepdims=True) * u
+                + 2 * w * np.cross(u, v))
+
+    def to_rotation_matrices(self):
+        """Matrices de rotation (N, 3, 3) de quaternions unitaires."""
+        w, x, y, z = self._components()
+        m = np.empty((len(self), 3, 3), dtype=self.data.dtype)
+        m[:, 0, 0] = 1 - 2 * (y * y + z * z)
+        m[:, 0, 1] = 2 * (x * y - w * z)
+        m[:, 0, 2] = 2 * (x * z + w * y)
+        m[:, 1, 0] = 2 * (x * y + w * z)
+        m[:, 1, 1] = 1 - 2 * (x * x + z * z)
+        m[:, 1, 2] = 2 * (y * z - w * x)
+        m[:, 2, 0] = 2 * (x * z - w * y)
+        m[:, 2, 1] = 2 * (y * z + w * x)
+        m[:, 2, 2] = 1 - 2 * (x * x + y * y)
+        return m
+
+    @staticmethod
+    def from_rotation_matrices(matrices):
+        """Inverse de to_rotation_matrices, même choix de pivot que Quaternion.from_rotation_matrix."""
+        m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+        m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+        trace = m00 + m11 + m22
+        case = np.select(
+            [trace > 0, (m00 > m11) & (m00 > m22), m11 > m22],
+            [0, 1, 2], default=3,
+        )
+        s = 2 * np.sqrt(np.maximum(np.choose(case, [
+            trace + 1.0, 1.0 + m00 - m11 - m22, 1.0 + m11 - m00 - m22, 1.0 + m22 - m00 - m11,
+        ]), 1e-300))
+        d21, d02, d10 = m[:, 2, 1] - m[:, 1, 2], m[:, 0, 2] - m[:, 2, 0], m[:, 1, 0] - m[:, 0, 1]
+        s01, s02, s12 = m[:, 0, 1] + m[:, 1, 0], m[:, 0, 2] + m[:, 2, 0], m[:, 1, 2] + m[:, 2, 1]
+        quarter = 0.25 * s
+        data = np.stack([
+            np.choose(case, [quarter, d21 / s, d02 / s, d10 / s]),
+            np.choose(case, [d21 / s, quarter, s01 / s, s02 / s]),
+            np.choose(case, [d02 / s, s01 / s, quarter, s12 / s]),
+            np.choose(case, [d10 / s, s02 / s, s12 / s, quarter]),
+        ], axis=1)
+        return QuaternionArray(data)
+
+    @staticmethod
+    def nlerp(a, b, t):
+        """Interpolation linéaire normalisée, par le plus court chemin."""
+        a, b = QuaternionArray._as_data(a), QuaternionArray._as_data(b)
+        t = np.reshape(t, (-1, 1))
+        sign = np.where(np.sum(a * b, axis=1, keepdims=True) < 0, -1.0, 1.0)
+        return QuaternionArray(a + (b * sign - a) * t).normalize()
+
+    @staticmethod
+    def slerp(a, b, t):
+        """Interpolation sphérique de quaternions unitaires, t scalaire ou (N,)."""
+        a, b = QuaternionArray._as_data(a), QuaternionArray._as_data(b)
+        t = np.reshape(t, (-1, 1))
+        dot = np.sum(a * b, axis=1, keepdims=True)
+        b = np.where(dot < 0, -b, b)
+        dot = np.abs(dot)
+
+        # Quaternions presque alignés : l'interpolation linéaire évite la division par sin ~ 0
+        close = dot > 0.9995
+        theta = np.arccos(np.clip(dot, -1, 1))
+        sin_theta = np.where(close, 1, np.sin(theta))
+        wa = np.where(close, 1 - t, np.sin((1 - t) * theta) / sin_theta)
+        wb = np.where(close, t, np.sin(t * theta) / sin_theta)
+        return QuaternionArray(wa * a + wb * b).normalize()
+
+    def __repr__(self):
+        return f"QuaternionArray({self.data!r})"
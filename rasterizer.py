@@ -0,0 +1,278 @@
+"""Rasteriseur logiciel numpy : triangles pleins, texturés, avec z-buffer.
+
+Produit des images de référence sans GPU à partir de la même scène que Engine :
+    python rasterizer.py [sortie.png] [--workers N]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from constants import SCREEN_SIZE
+
+CLEAR_COLOR = (0.1, 0.1, 0.1)
+# Nombre maximal de couples (triangle, pixel) évalués d'un coup dans une tuile
+BATCH_ELEMENTS = 1 << 20
+
+
+def load_texture_image(path):
+    """Image RGB (H, W, 3) uint8, ligne 0 en haut comme dans le fichier."""
+    from PIL import Image
+    return np.asarray(Image.open(path).convert("RGB"))
+
+
+class Rasterizer:
+    """Rendu CPU déterministe en deux temps : draw_* met les triangles en file, flush les rastérise.
+
+    Les tuiles sont indépendantes ; avec workers > 0 elles sont réparties en bandes
+    sur un pool de processus, pour un résultat identique au rendu séquentiel.
+    """
+    def __init__(self, width=SCREEN_SIZE[0], height=SCREEN_SIZE[1], tile_size=64, workers=0):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.workers = workers
+        self.color = np.zeros((height, width, 3), dtype=np.uint8)
+        self.depth = np.ones((height, width), dtype=np.float32)
+        self.view = np.identity(4)
+        self.projection = np.identity(4)
+        self._queue = []
+        self._textures = []
+
+    def clear(self, color=CLEAR_COLOR):
+        self.color[:] = (np.asarray(color) * 255).astype(np.uint8)
+        self.depth[:] = 1.0
+        self._queue = []
+        self._textures = []
+
+    def set_camera(self, view, projection):
+        self.view = np.asarray(view, dtype=np.float64)
+        self.projection = np.asarray(projection, dtype=np.float64)
+
+    def draw_mesh(self, positions, faces, model=None, texcoords=None, face_texcoords=None, texture=None):
+        """Ajoute un mesh indexé : positions (N, 3), faces (F, 3), UV (T, 2) et (F, 3)."""
+        model = np.identity(4) if model is None else model
+        corners = np.asarray(positions, dtype=np.float64)[np.asarray(faces)]
+        homogeneous = np.concatenate([corners, np.ones(corners.shape[:2] + (1,))], axis=2)
+        clip = homogeneous @ (self.projection @ self.view @ model).T
+
+        uv = np.zeros(corners.shape[:2] + (2,))
+        if texture is not None and texcoords is not None and len(texcoords):
+            face_texcoords = np.asarray(face_texcoords)
+            uv = np.asarray(texcoords, dtype=np.float64)[np.maximum(face_texcoords, 0)]
+            uv[face_texcoords < 0] = 0
+            self._textures.append(np.asarray(texture))
+            texture_index = len(self._textures) - 1
+        else:
+            texture_index = -1
+
+        clip, uv = _clip_near(clip, uv)
+        if len(clip):
+            self._queue.append((clip, uv, np.full(len(clip), texture_index)))
+
+    def draw_object(self, obj, texture=None):
+        mesh = obj.mesh
+        self.draw_mesh(mesh.vertices, mesh.data.faces, obj.get_model_matrix(),
+                       mesh.data.texcoords, mesh.data.face_texcoords, texture)
+
+    def flush(self):
+        """Rastérise tous les triangles en file dans les buffers couleur et profondeur."""
+        if not self._queue:
+            return self.color
+        clip = np.concatenate([item[0] for item in self._queue])
+        uv = np.concatenate([item[1] for item in self._queue])
+        texture_index = np.concatenate([item[2] for item in self._queue])
+        triangles = _setup_triangles(clip, uv, texture_index, self.width, self.height)
+        self._queue = []
+
+        bands = self._bands()
+        if self.workers > 0 and len(bands) > 1:
+            with ProcessPoolExecutor(self.workers) as pool:
+                futures = [pool.submit(_raster_band, *self._band_task(triangles, band)) for band in bands]
+                results = [future.result() for future in futures]
+        else:
+            results = [_raster_band(*self._band_task(triangles, band)) for band in bands]
+
+        for (y0, y1), (color, depth) in zip(bands, results):
+            self.color[y0:y1] = color
+            self.depth[y0:y1] = depth
+        return self.color
+
+    def render_scene(self, scene, view, projection, textures=None, textured=True):
+        """Rend un dict {nom: Object3D} ; `textures` associe un texture_id à une image."""
+        textures = textures or {}
+        self.clear()
+        self.set_camera(view, projection)
+        for obj in scene.values():
+            texture = textures.get(obj.texture_id) if textured else None
+            self.draw_object(obj, texture)
+        return self.flush()
+
+    def _bands(self):
+        count = max(self.workers, 1)
+        rows = -(-self.height // self.tile_size)
+        per_band = -(-rows // count) * self.tile_size
+        return [(y, min(y + per_band, self.height)) for y in range(0, self.height, per_band)]
+
+    def _band_task(self, triangles, band):
+        y0, y1 = band
+        selected = (triangles["ymax"] >= y0) & (triangles["ymin"] < y1)
+        subset = {name: values[selected] for name, values in triangles.items()}
+        return (subset, self._textures, self.color[y0:y1].copy(), self.depth[y0:y1].copy(),
+                self.width, y0, self.tile_size)
+
+
+def _clip_near(clip, uv):
+    """Découpe les triangles (F, 3, 4) contre le plan proche z + w >= 0."""
+    distance = clip[:, :, 2] + clip[:, :, 3]
+    inside = distance > 0
+    count = inside.sum(axis=1)
+    out_clip = [clip[count == 3]]
+    out_uv = [uv[count == 3]]
+
+    def rolled(mask, first):
+        order = (first[:, None] + np.arange(3)) % 3
+        c = np.take_along_axis(clip[mask], order[:, :, None], axis=1)
+        t = np.take_along_axis(uv[mask], order[:, :, None], axis=1)
+        d = np.take_along_axis(distance[mask], order, axis=1)
+        return c, t, d
+
+    def intersect(c, t, d, a, b):
+        s = (d[:, a] / (d[:, a] - d[:, b]))[:, None]
+        return c[:, a] + (c[:, b] - c[:, a]) * s, t[:, a] + (t[:, b] - t[:, a]) * s
+
+    # Un seul sommet devant : il est placé en premier, le triangle rétrécit
+    mask = count == 1
+    if mask.any():
+        c, t, d = rolled(mask, np.argmax(inside[mask], axis=1))
+        c01, t01 = intersect(c, t, d, 0, 1)
+        c02, t02 = intersect(c, t, d, 0, 2)
+        out_clip.append(np.stack([c[:, 0], c01, c02], axis=1))
+        out_uv.append(np.stack([t[:, 0], t01, t02], axis=1))
+
+    # Deux sommets devant : le sommet derrière est placé en premier, le quad restant donne deux triangles
+    mask = count == 2
+    if mask.any():
+        c, t, d = rolled(mask, np.argmin(inside[mask], axis=1))
+        c01, t01 = intersect(c, t, d, 0, 1)
+        c20, t20 = intersect(c, t, d, 0, 2)
+        out_clip.append(np.concatenate([
+            np.stack([c01, c[:, 1], c[:, 2]], axis=1), np.stack([c01, c[:, 2], c20], axis=1)]))
+        out_uv.append(np.concatenate([
+            np.stack([t01, t[:, 1], t[:, 2]], axis=1), np.stack([t01, t[:, 2], t20], axis=1)]))
+
+    return np.concatenate(out_clip), np.concatenate(out_uv)
+
+
+def _setup_triangles(clip, uv, texture_index, width, height):
+    """Passage en coordonnées écran et coefficients des fonctions d'arête normalisées par l'aire."""
+    inv_w = 1.0 / clip[:, :, 3]
+    ndc = clip[:, :, :3] * inv_w[:, :, None]
+    x = (ndc[:, :, 0] + 1) * 0.5 * width
+    y = (1 - ndc[:, :, 1]) * 0.5 * height
+    z = ndc[:, :, 2] * 0.5 + 0.5
+
+    area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (y[:, 1] - y[:, 0]) * (x[:, 2] - x[:, 0])
+    valid = np.abs(area) > 1e-12
+    x, y, z, inv_w, uv, texture_index, area = (
+        a[valid] for a in (x, y, z, inv_w, uv, texture_index, area))
+
+    # l_i(p) = a_i * px + b_i * py + c_i, fonction d'arête opposée au sommet i divisée par l'aire
+    j, k = [1, 2, 0], [2, 0, 1]
+    a = (y[:, j] - y[:, k]) / area[:, None]
+    b = (x[:, k] - x[:, j]) / area[:, None]
+    c = (x[:, j] * y[:, k] - x[:, k] * y[:, j]) / area[:, None]
+
+    return {
+        "a": a, "b": b, "c": c, "z": z, "inv_w": inv_w, "uv": uv, "texture": texture_index,
+        "xmin": np.floor(x.min(axis=1)).astype(np.int64), "xmax": np.ceil(x.max(axis=1)).astype(np.int64),
+        "ymin": np.floor(y.min(axis=1)).astype(np.int64), "ymax": np.ceil(y.max(axis=1)).astype(np.int64),
+    }
+
+
+def _raster_band(triangles, textures, color, depth, width, y_offset, tile_size):
+    height = len(color)
+    for ty in range(0, height, tile_size):
+        for tx in range(0, width, tile_size):
+            y0, y1 = y_offset + ty, y_offset + min(ty + tile_size, height)
+            x0, x1 = tx, min(tx + tile_size, width)
+            selected = np.flatnonzero(
+                (triangles["xmax"] >= x0) & (triangles["xmin"] < x1)
+                & (triangles["ymax"] >= y0) & (triangles["ymin"] < y1))
+            if len(selected):
+                rows = slice(ty, ty + y1 - y0)
+                color[rows, x0:x1], depth[rows, x0:x1] = _raster_tile(
+                    triangles, selected, textures, color[rows, x0:x1], depth[rows, x0:x1], x0, y0)
+    return color, depth
+
+
+def _raster_tile(triangles, selected, textures, color, depth, x0, y0):
+    h, w = depth.shape
+    py, px = np.mgrid[y0:y0 + h, x0:x0 + w]
+    px = px.ravel() + 0.5
+    py = py.ravel() + 0.5
+    flat_color = color.reshape(-1, 3).copy()
+    flat_depth = depth.reshape(-1).copy()
+    pixels = np.arange(len(px))
+
+    # Lots de triangles dans l'ordre de soumission : à profondeur égale, le premier dessiné gagne
+    batch = max(1, BATCH_ELEMENTS // len(px))
+    for start in range(0, len(selected), batch):
+        tri = selected[start:start + batch]
+        bary = (triangles["a"][tri, :, None] * px + triangles["b"][tri, :, None] * py
+                + triangles["c"][tri, :, None])
+        inside = (bary >= 0).all(axis=1)
+        z = np.einsum('tip,ti->tp', bary, triangles["z"][tri])
+        z = np.where(inside & (z >= 0) & (z <= 1), z, np.inf)
+
+        best = np.argmin(z, axis=0)
+        best_z = z[best, pixels]
+        passed = np.flatnonzero(best_z < flat_depth)
+        if not len(passed):
+            continue
+        winner = tri[best[passed]]
+        flat_depth[passed] = best_z[passed]
+        flat_color[passed] = _shade(triangles, textures, winner, bary[best[passed], :, passed])
+    return flat_color.reshape(h, w, 3), flat_depth.reshape(h, w)
+
+
+def _shade(triangles, textures, winner, bary):
+    """Couleur des pixels : UV interpolés en perspective, texture échantillonnée au plus proche (GL_REPEAT)."""
+    colors = np.full((len(winner), 3), 255, dtype=np.uint8)
+    texture_index = triangles["texture"][winner]
+    for index in np.unique(texture_index):
+        if index < 0:
+            continue
+        mask = texture_index == index
+        weights = bary[mask] * triangles["inv_w"][winner[mask]]
+        uv = np.einsum('pi,pij->pj', weights, triangles["uv"][winner[mask]]) / weights.sum(axis=1, keepdims=True)
+        texture = textures[index]
+        th, tw = texture.shape[:2]
+        column = np.floor(uv[:, 0] * tw).astype(np.int64) % tw
+        row = th - 1 - np.floor(uv[:, 1] * th).astype(np.int64) % th
+        colors[mask] = texture[row, column, :3]
+    return colors
+
+
+def main():
+    from PIL import Image
+    from camera import Camera
+    from scene import build_default_scene
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", nargs="?", default="reference.png")
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    # Les identifiants de texture ne sont que des clés : pas besoin de contexte GL ici
+    scene = build_default_scene({"placeholder": "placeholder"})
+    textures = {"placeholder": load_texture_image("assets/textures/placeholder.png")}
+
+    camera = Camera()
+    rasterizer = Rasterizer(workers=args.workers)
+    image = rasterizer.render_scene(scene, camera.view_matrix, camera.projection_matrix, textures)
+    Image.fromarray(image).save(args.output)
+
+
+if __name__ == "__main__":
+    main()
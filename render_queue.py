@@ -0,0 +1,119 @@
+import ctypes
+from OpenGL.GL import *
+
+from constants import RENDER_INSTANCED, RENDER_RETAINED
+from renderer import FLOAT_SIZE, VERTEX_STRIDE
+
+
+class RenderQueue:
+    """File de dessin d'une frame, triée par état GL pour n'émettre que les changements.
+
+    Chaque élément est rangé sous une clé (mode, texture, wireframe) : `mode`
+    choisit le chemin de rendu (et le shader des lots instanciés), `texture`
+    vaut 0 pour un dessin non texturé. Après `flush`, l'état GL revient à
+    l'état de base du moteur : textures désactivées, polygones pleins.
+    """
+    def __init__(self):
+        self._items = []
+        self._buffer = None
+        self.stats = {"items": 0, "state_changes": 0, "texture_binds": 0}
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, key, item, name=None):
+        """`item` expose `mesh` et `draw_queued(queue, mode, wireframe, textured)`."""
+        self._items.append((key, item, name))
+
+    def clear(self):
+        self._items = []
+
+    def flush(self, profiler=None):
+        """Trie la file, la dessine puis la vide ; les objets d'un même mesh restent contigus."""
+        self.stats = {"items": len(self._items), "state_changes": 0, "texture_binds": 0}
+        # Tri stable : à clé et mesh égaux, l'ordre d'insertion est conservé
+        items = sorted(self._items, key=lambda entry: (entry[0], id(entry[1].mesh)))
+        self._items = []
+        if not items:
+            return
+
+        glColor3f(1, 1, 1)
+        current = (None, None, None)
+        for key, item, name in items:
+            if key != current:
+                self._apply(key, current)
+                current = key
+            if profiler is not None and name is not None:
+                profiler.begin("draw_scene/" + name)
+            item.draw_queued(self, key[0], wireframe=key[2], textured=bool(key[1]))
+            if profiler is not None and name is not None:
+                profiler.end()
+        self._apply((None, 0, False), current)
+
+    def _apply(self, key, previous):
+        mode, texture, wireframe = key
+        previous_mode, previous_texture, previous_wireframe = previous
+        if mode != previous_mode:
+            if previous_texture:
+                self._set_texture(previous_mode, 0, previous_texture)
+            self._end_mode(previous_mode)
+            self._begin_mode(mode)
+            self.stats["state_changes"] += 1
+            previous_texture = 0
+        if texture != previous_texture:
+            self._set_texture(mode, texture, previous_texture)
+            self.stats["state_changes"] += 1
+        if bool(wireframe) != bool(previous_wireframe):
+            glPolygonMode(GL_FRONT_AND_BACK, GL_LINE if wireframe else GL_FILL)
+            self.stats["state_changes"] += 1
+
+    def _begin_mode(self, mode):
+        if mode == RENDER_RETAINED:
+            glEnableClientState(GL_VERTEX_ARRAY)
+        elif mode == RENDER_INSTANCED:
+            from instancing import begin_instanced
+            begin_instanced()
+
+    def _end_mode(self, mode):
+        if mode == RENDER_RETAINED:
+            glDisableClientState(GL_VERTEX_ARRAY)
+        elif mode == RENDER_INSTANCED:
+            from instancing import end_instanced
+            end_instanced()
+        if self._buffer is not None:
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            self._buffer = None
+
+    def _set_texture(self, mode, texture, previous_texture):
+        if texture:
+            # Les lots instanciés lisent la texture dans le shader, sans glEnable
+            if not previous_texture and mode != RENDER_INSTANCED:
+                glEnable(GL_TEXTURE_2D)
+            glBindTexture(GL_TEXTURE_2D, texture)
+            self.stats["texture_binds"] += 1
+        else:
+            glBindTexture(GL_TEXTURE_2D, 0)
+            glDisable(GL_TEXTURE_2D)
+
+        if bool(texture) == bool(previous_texture):
+            return
+        if mode == RENDER_RETAINED:
+            if texture:
+                glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+                # Le pointeur de coordonnées de texture du VBO lié n'est pas encore défini
+                self._buffer = None
+            else:
+                glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        elif mode == RENDER_INSTANCED:
+            from instancing import set_instanced_texture
+            set_instanced_texture(bool(texture))
+
+    def use_buffer(self, buffer, textured):
+        """Lie le VBO d'un MeshBuffer et ses pointeurs, sauf s'il est déjà en place."""
+        if buffer is self._buffer:
+            return
+        glBindBuffer(GL_ARRAY_BUFFER, buffer.vbo)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        if textured:
+            glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(3 * FLOAT_SIZE))
+        self._buffer = buffer
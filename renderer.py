@@ -0,0 +1,279 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION import GL_1_3 as raw_GL_1_3
+
+FLOAT_SIZE = 4
+VERTEX_STRIDE = 5 * FLOAT_SIZE  # x, y, z, u, v
+UPLOAD_CHUNK_BYTES = 4 << 20  # taille des envois de MeshBuffer.stream
+
+
+class MeshBuffer:
+    """Buffer GPU entrelacé (position + UV) d'un mesh triangulé non indexé.
+
+    N'utilise que des VBO et les client arrays du pipeline fixe (GL 1.5),
+    donc fonctionne aussi en rendu logiciel (Mesa llvmpipe) sans contexte core.
+    """
+    def __init__(self, interleaved):
+        data = np.ascontiguousarray(interleaved, dtype=np.float32).reshape(-1, 5)
+        self.vertex_count = len(data)
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    @classmethod
+    def stream(cls, interleaved, chunk_bytes=UPLOAD_CHUNK_BYTES):
+        """Comme le constructeur, mais envoie les données par morceaux avec un `yield` après chacun.
+
+        À utiliser avec `buffer = yield from MeshBuffer.stream(...)`.
+        """
+        data = np.ascontiguousarray(interleaved, dtype=np.float32).reshape(-1, 5)
+        buffer = cls.__new__(cls)
+        buffer.vertex_count = len(data)
+        buffer.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, buffer.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, None, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        raw = data.reshape(-1).view(np.uint8)
+        for offset in range(0, len(raw), chunk_bytes):
+            chunk = raw[offset:offset + chunk_bytes]
+            glBindBuffer(GL_ARRAY_BUFFER, buffer.vbo)
+            glBufferSubData(GL_ARRAY_BUFFER, offset, len(chunk), chunk)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            yield
+        return buffer
+
+    def draw(self, textured=False, wireframe=False):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        if textured:
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(3 * FLOAT_SIZE))
+
+        if wireframe:
+            glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
+        if wireframe:
+            glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+
+        if textured:
+            glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw_arrays(self):
+        """glDrawArrays seul : VBO, pointeurs et client states déjà en place (RenderQueue.use_buffer)."""
+        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
+
+    def delete(self):
+        if self.vbo:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = 0
+
+
+# Coins des faces de la skybox (quads) ; ce sont aussi les coordonnées de cube map
+SKYBOX_CORNERS = np.array([
+    # Face droite
+    (1, -1, -1), (1, -1, 1), (1, 1, 1), (1, 1, -1),
+    # Face gauche
+    (-1, -1, 1), (-1, -1, -1), (-1, 1, -1), (-1, 1, 1),
+    # Face top
+    (-1, 1, -1), (1, 1, -1), (1, 1, 1), (-1, 1, 1),
+    # Face bottom
+    (-1, -1, 1), (1, -1, 1), (1, -1, -1), (-1, -1, -1),
+    # Face front
+    (-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1),
+    # Face back
+    (1, -1, 1), (-1, -1, 1), (-1, 1, 1), (1, 1, 1),
+], dtype=np.float32)
+SKYBOX_STRIDE = 6 * FLOAT_SIZE  # x, y, z, s, t, r
+
+
+class SkyboxBuffer:
+    """Cube de la skybox uploadé une fois, dessiné en un seul glDrawArrays."""
+    def __init__(self, size=50.0):
+        data = np.ascontiguousarray(np.hstack([SKYBOX_CORNERS * size, SKYBOX_CORNERS]))
+        self.vertex_count = len(data)
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, SKYBOX_STRIDE, ctypes.c_void_p(0))
+        glTexCoordPointer(3, GL_FLOAT, SKYBOX_STRIDE, ctypes.c_void_p(3 * FLOAT_SIZE))
+        glDrawArrays(GL_QUADS, 0, self.vertex_count)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        if self.vbo:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = 0
+
+
+# Format compressé utilisé avec compress=True (GL_EXT_texture_compression_s3tc)
+COMPRESSED_RGB_S3TC_DXT1 = 0x83F0
+
+CUBE_MAP_FACES = (
+    GL_TEXTURE_CUBE_MAP_POSITIVE_X, GL_TEXTURE_CUBE_MAP_NEGATIVE_X,
+    GL_TEXTURE_CUBE_MAP_POSITIVE_Y, GL_TEXTURE_CUBE_MAP_NEGATIVE_Y,
+    GL_TEXTURE_CUBE_MAP_POSITIVE_Z, GL_TEXTURE_CUBE_MAP_NEGATIVE_Z,
+)
+
+
+def supports_s3tc():
+    count = glGetIntegerv(GL_NUM_EXTENSIONS)
+    return any(glGetStringi(GL_EXTENSIONS, i) == b"GL_EXT_texture_compression_s3tc" for i in range(count))
+
+
+def create_texture_2d(path, mipmaps=True, compress=False):
+    """Texture 2D depuis le cache de textures (ligne du bas en premier, comme l'attend OpenGL)."""
+    return _create_texture(TextureSource.texture_2d(path, mipmaps, compress))
+
+
+def create_cube_map(paths, mipmaps=True, compress=False):
+    """Cube map depuis six images (+X, -X, +Y, -Y, +Z, -Z), décodées en parallèle."""
+    return _create_texture(TextureSource.cube_map(paths, mipmaps, compress))
+
+
+def _create_texture(source):
+    texture = glGenTextures(1)
+    for _ in source.upload(texture, source.load()):
+        pass
+    glBindTexture(source.kind, 0)
+    return texture
+
+
+class TextureSource:
+    """Texture à construire en deux temps : `load` (CPU, depuis n'importe quel thread)
+    puis `upload` (GL, thread principal), ce qui permet de charger en arrière-plan.
+    """
+    def __init__(self, kind, faces, flip_x, flip_y, mipmaps, compressed_format=None):
+        self.kind = kind
+        self.faces = faces  # [(cible GL, chemin)]
+        self.flip_x = flip_x
+        self.flip_y = flip_y
+        self.mipmaps = mipmaps
+        self.compressed_format = compressed_format
+
+    @classmethod
+    def texture_2d(cls, path, mipmaps=True, compress=False):
+        return cls(GL_TEXTURE_2D, [(GL_TEXTURE_2D, path)], False, True, mipmaps, cls._format(compress))
+
+    @classmethod
+    def cube_map(cls, paths, mipmaps=True, compress=False):
+        # Faces retournées horizontalement, l'orientation attendue par les coordonnées de la skybox
+        return cls(GL_TEXTURE_CUBE_MAP, list(zip(CUBE_MAP_FACES, paths)), True, False, mipmaps, cls._format(compress))
+
+    @staticmethod
+    def _format(compress):
+        return COMPRESSED_RGB_S3TC_DXT1 if compress and supports_s3tc() else None
+
+    @property
+    def paths(self):
+        return [path for _, path in self.faces]
+
+    def load(self):
+        """Niveaux de chaque face : blocs compressés en cache si possible, sinon pixels bruts."""
+        from texture_cache import load_texture_datas, read_texture_cache, texture_variant
+
+        if self.compressed_format:
+            variant = texture_variant(self.flip_x, self.flip_y, self.mipmaps, self.compressed_format)
+            datas = [read_texture_cache(path, variant) for path in self.paths]
+            if all(data is not None for data in datas):
+                return datas
+        return load_texture_datas(self.paths, flip_x=self.flip_x, flip_y=self.flip_y, mipmaps=self.mipmaps)
+
+    def create_placeholder(self, color=(128, 128, 128)):
+        """Nom de texture utilisable tout de suite : une couleur unie 1x1 en attendant les vrais pixels."""
+        texture = glGenTextures(1)
+        glBindTexture(self.kind, texture)
+        pixel = np.array(color, dtype=np.uint8)
+        for target, _ in self.faces:
+            glTexImage2D(target, 0, GL_RGB, 1, 1, 0, GL_RGB, GL_UNSIGNED_BYTE, pixel)
+        self._set_parameters(0, 0)
+        glBindTexture(self.kind, 0)
+        return texture
+
+    def upload(self, texture, datas):
+        """Générateur : envoie un niveau de mipmap (toutes faces) par étape, du plus petit au plus grand.
+
+        GL_TEXTURE_BASE_LEVEL suit le plus grand niveau envoyé, la texture reste
+        donc complète et s'affine au fil des étapes.
+        """
+        level_count = len(datas[0].levels)
+        for level in reversed(range(level_count)):
+            glBindTexture(self.kind, texture)
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)  # lignes RGB des petits niveaux non alignées sur 4 octets
+            for (target, _), data in zip(self.faces, datas):
+                pixels = data.levels[level]
+                width, height = data.sizes[level]
+                if data.compressed_format:
+                    glCompressedTexImage2D(target, level, data.compressed_format, width, height, 0, pixels)
+                else:
+                    internal_format = self.compressed_format or GL_RGB
+                    glTexImage2D(target, level, internal_format, width, height, 0, GL_RGB, GL_UNSIGNED_BYTE, pixels)
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+            self._set_parameters(level, level_count - 1)
+            yield
+
+        if self.compressed_format and not datas[0].compressed_format:
+            self._store_compressed(texture, datas)
+
+    def _set_parameters(self, base_level, max_level):
+        glTexParameteri(self.kind, GL_TEXTURE_BASE_LEVEL, base_level)
+        glTexParameteri(self.kind, GL_TEXTURE_MAX_LEVEL, max_level)
+        glTexParameteri(self.kind, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR if max_level > base_level else GL_LINEAR)
+        glTexParameteri(self.kind, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        if self.kind == GL_TEXTURE_CUBE_MAP:
+            glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
+
+    def _store_compressed(self, texture, datas):
+        """Compression faite une fois par le driver, relue puis mise en cache pour les chargements suivants."""
+        from texture_cache import TextureData, texture_variant, write_texture_cache
+
+        variant = texture_variant(self.flip_x, self.flip_y, self.mipmaps, self.compressed_format)
+        glBindTexture(self.kind, texture)
+        for (target, path), data in zip(self.faces, datas):
+            levels = []
+            for level in range(len(data.levels)):
+                size = glGetTexLevelParameteriv(target, level, GL_TEXTURE_COMPRESSED_IMAGE_SIZE)
+                blocks = np.empty(int(size), dtype=np.uint8)
+                # Le wrapper PyOpenGL de glGetCompressedTexImage est cassé : appel brut vers le tableau
+                raw_GL_1_3.glGetCompressedTexImage(target, level, blocks.ctypes.data_as(ctypes.c_void_p))
+                levels.append(blocks)
+            write_texture_cache(path, variant, TextureData(levels, data.sizes, self.compressed_format))
+
+
+def to_gl_matrix(matrix):
+    """Matrice 4x4 (convention numpy, ligne-majeure) vers le format colonne-majeure d'OpenGL."""
+    return np.ascontiguousarray(np.asarray(matrix, dtype=np.float32).T)
+
+
+def create_program(vertex_source, fragment_source, attributes=()):
+    """Compile et lie un programme GLSL, avec des emplacements d'attributs fixes."""
+    from OpenGL.GL import shaders
+
+    program = glCreateProgram()
+    vertex = shaders.compileShader(vertex_source, GL_VERTEX_SHADER)
+    fragment = shaders.compileShader(fragment_source, GL_FRAGMENT_SHADER)
+    glAttachShader(program, vertex)
+    glAttachShader(program, fragment)
+    for location, name in enumerate(attributes):
+        glBindAttribLocation(program, location, name)
+    glLinkProgram(program)
+    if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+        raise RuntimeError(glGetProgramInfoLog(program).decode())
+    glDeleteShader(vertex)
+    glDeleteShader(fragment)
+    return program
@@ -0,0 +1,60 @@
+import numpy as np
+
+from animation import spin_keys
+from object3D import Object3D
+
+
+def build_default_scene(textures, streamer=None):
+    """Scène de démonstration ; `textures` associe un nom à un identifiant de texture.
+
+    Avec un `streamer`, les meshes sont chargés en arrière-plan.
+    """
+    scene = {}
+
+    cube1 = Object3D("assets/objs/cube.obj", textures['placeholder'], gpu_transform=True, streamer=streamer)
+    cube1.set_position(0, 0, 0)
+    scene["cube1"] = cube1
+
+    cylinder1 = Object3D("assets/objs/cylinder.obj", textures['placeholder'], gpu_transform=True, streamer=streamer)
+    cylinder1.set_position(3, 2, 0)
+    cylinder1.set_pivot_world(0, 0, 0)
+    scene["cylinder1"] = cylinder1
+
+    pyramid1 = Object3D("assets/objs/pyramid.obj", textures['placeholder'], gpu_transform=True, streamer=streamer)
+    pyramid1.set_position(6, 0, 0)
+    pyramid1.set_scale(2, 5, 1)
+    scene["pyramid1"] = pyramid1
+
+    tetrahedron1 = Object3D("assets/objs/tetrahedron.obj", textures['placeholder'], gpu_transform=True, streamer=streamer)
+    tetrahedron1.set_position(9, 0, 0)
+    scene["tetrahedron1"] = tetrahedron1
+
+    sphere1 = Object3D("assets/objs/sphere.obj", textures['placeholder'], gpu_transform=True, streamer=streamer)
+    sphere1.set_position(12, 0, 0)
+    sphere1.shear(xy=1)
+    scene["sphere1"] = sphere1
+
+    return scene
+
+
+def animate_default_scene(animator, scene):
+    """Pistes de la scène de démonstration : le cube tourne sur lui-même, le cylindre autour de l'origine."""
+    if "cube1" in scene:
+        # 60 degrés par seconde autour de x
+        animator.add_track(scene["cube1"], "rotation", *spin_keys((1, 0, 0), 6.0))
+    if "cylinder1" in scene:
+        # 6 rad/s autour de l'axe x passant par son pivot (origine du monde)
+        animator.add_track(scene["cylinder1"], "rotation", *spin_keys((1, 0, 0), 2 * np.pi / 6.0))
+
+
+def build_grid_scene(textures, count, path="assets/objs/cube.obj", spacing=3.0, streamer=None):
+    """`count` copies d'un mesh sur une grille 3D centrée sur l'origine (scènes de benchmark)."""
+    side = max(1, int(np.ceil(count ** (1 / 3) - 1e-9)))
+    offset = (side - 1) * spacing / 2
+    scene = {}
+    for i in range(count):
+        x, y, z = i % side, (i // side) % side, i // (side * side)
+        obj = Object3D(path, textures['placeholder'], gpu_transform=True, streamer=streamer)
+        obj.set_position(x * spacing - offset, y * spacing - offset, z * spacing - offset)
+        scene[f"object{i}"] = obj
+    return scene
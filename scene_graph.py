@@ -0,0 +1,184 @@
+import numpy as np
+
+from frustum import transform_bounds_batch
+
+
+class SceneGraph:
+    """Hiérarchie des objets de la scène et cache de leurs matrices monde.
+
+    Chaque Object3D garde sa transformation locale (relative à son parent,
+    voir `Object3D.set_parent`). Le graphe range les noeuds en ordre préfixe :
+    un parent précède ses enfants et chaque sous-arbre occupe une plage
+    contiguë. Un objet modifié ne fait que se signaler ; `update` recalcule
+    ensuite, en une passe, les matrices monde de tous les sous-arbres sales,
+    profondeur par profondeur avec un produit matriciel numpy par niveau,
+    ainsi que leurs bornes monde (voir `Object3D.world_bounds`).
+    Déplacer une racine à 10k descendants coûte donc une mise à jour de
+    sous-arbre, pas 10k recompositions indépendantes.
+    """
+    def __init__(self):
+        self._objects = {}  # ensemble ordonné des objets du graphe
+        self._nodes = []  # objets en ordre préfixe
+        self._index = {}
+        self._parents = np.empty(0, dtype=np.int64)
+        self._depths = np.empty(0, dtype=np.int64)
+        self._ends = np.empty(0, dtype=np.int64)  # fin (exclue) du sous-arbre de chaque noeud
+        self._local = np.empty((0, 4, 4))
+        self._world = np.empty((0, 4, 4))
+        self._bounds = np.empty((0, 10))  # bornes locales des meshes (min, max, centre, rayon)
+        self._dirty = set()  # objets dont la matrice locale a changé
+        self._bounds_dirty = set()  # objets dont le mesh (donc les bornes locales) a changé
+        self._order_valid = True
+        self.stats = {"updated": 0, "rebuilds": 0}
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, obj):
+        return obj in self._objects
+
+    def add(self, obj):
+        """Ajoute un objet ; son parent, s'il en a un, doit aussi faire partie du graphe avant `update`."""
+        if obj._graph is not None and obj._graph is not self:
+            obj._graph.remove(obj)
+        obj._graph = self
+        self._objects[obj] = None
+        self._order_valid = False
+
+    def remove(self, obj):
+        """Retire un objet ; ses enfants deviennent des racines."""
+        del self._objects[obj]
+        self._dirty.discard(obj)
+        self._bounds_dirty.discard(obj)
+        obj._graph = None
+        for child in obj.children:
+            child.set_parent(None)
+        obj.set_parent(None)
+        obj._mark_dirty()
+        self._order_valid = False
+
+    def clear(self):
+        """Retire tous les objets ; leurs liens parent/enfant sont conservés."""
+        objects = list(self._objects)
+        self._objects = {}
+        self._nodes = []
+        self._index = {}
+        self._dirty = set()
+        self._bounds_dirty = set()
+        self._order_valid = False
+        for obj in objects:
+            obj._graph = None
+            obj._mark_dirty()
+
+    def structure_changed(self):
+        """Un lien parent/enfant a changé : l'ordre des noeuds sera reconstruit à la prochaine mise à jour."""
+        self._order_valid = False
+
+    def mark_dirty(self, obj, bounds=False):
+        """Transformation locale de `obj` modifiée ; `bounds` si son mesh a aussi changé."""
+        self._dirty.add(obj)
+        if bounds:
+            self._bounds_dirty.add(obj)
+
+    def world_matrix(self, obj):
+        """Matrice monde (copie) d'un objet du graphe, après mise à jour des sous-arbres sales."""
+        if self._dirty or not self._order_valid:
+            self.update()
+        return self._world[self._index[obj]].copy()
+
+    def update(self):
+        """Recalcule les matrices monde des sous-arbres sales ; renvoie le nombre de noeuds mis à jour.
+
+        Les objets concernés reçoivent leur matrice et leurs bornes monde
+        (`_world_changed`) : leurs sommets en cache sont invalidés et leurs
+        listeners de déplacement (BVH de la scène) appelés.
+        """
+        if not self._order_valid:
+            self._rebuild()
+            rows = np.arange(len(self._nodes))
+        elif self._dirty:
+            rows = self._dirty_rows()
+        else:
+            return 0
+        self._dirty = set()
+        self._bounds_dirty = set()
+
+        # Les parents sont toujours moins profonds que leurs enfants : un niveau après l'autre
+        depths = self._depths[rows]
+        for depth in np.unique(depths):
+            level = rows[depths == depth]
+            if depth == 0:
+                self._world[level] = self._local[level]
+            else:
+                self._world[level] = self._world[self._parents[level]] @ self._local[level]
+
+        matrices = self._world[rows]
+        bounds = transform_bounds_batch(matrices, self._bounds[rows])
+        nodes = self._nodes
+        for row, matrix, world_bounds in zip(rows.tolist(), matrices, bounds):
+            nodes[row]._world_changed(matrix, world_bounds)
+        self.stats["updated"] += len(rows)
+        return len(rows)
+
+    def _dirty_rows(self):
+        index = self._index
+        nodes = self._nodes
+        starts = sorted(index[obj] for obj in self._dirty)
+        self._local[starts] = [nodes[row].get_local_matrix() for row in starts]
+        for obj in self._bounds_dirty:
+            self._bounds[index[obj]] = _local_bounds(obj)
+
+        # Plages des sous-arbres sales ; celles incluses dans une plage précédente sont ignorées
+        stale = np.zeros(len(self._nodes), dtype=bool)
+        end = -1
+        for row in starts:
+            if row < end:
+                continue
+            end = int(self._ends[row])
+            stale[row:end] = True
+        return np.flatnonzero(stale)
+
+    def _rebuild(self):
+        """Ordre préfixe, parents, profondeurs et matrices locales de tous les noeuds."""
+        nodes, parents, depths = [], [], []
+        ends = {}
+
+        def visit(obj, parent, depth):
+            # Pile explicite : pas de limite de récursion sur les hiérarchies profondes
+            stack = [(obj, parent, depth, False)]
+            while stack:
+                obj, parent, depth, done = stack.pop()
+                if done:
+                    ends[obj] = len(nodes)
+                    continue
+                row = len(nodes)
+                nodes.append(obj)
+                parents.append(parent)
+                depths.append(depth)
+                stack.append((obj, parent, depth, True))
+                for child in reversed(obj.children):
+                    if child not in self._objects:
+                        raise ValueError("enfant absent du graphe de scène")
+                    stack.append((child, row, depth + 1, False))
+
+        for obj in self._objects:
+            if obj.parent is None:
+                visit(obj, -1, 0)
+            elif obj.parent not in self._objects:
+                raise ValueError("parent absent du graphe de scène")
+
+        self._nodes = nodes
+        self._index = {obj: row for row, obj in enumerate(nodes)}
+        self._parents = np.array(parents, dtype=np.int64)
+        self._depths = np.array(depths, dtype=np.int64)
+        self._ends = np.array([ends[obj] for obj in nodes], dtype=np.int64)
+        self._local = np.array([obj.get_local_matrix() for obj in nodes]).reshape(-1, 4, 4)
+        self._world = np.empty_like(self._local)
+        self._bounds = np.array([_local_bounds(obj) for obj in nodes]).reshape(-1, 10)
+        self._order_valid = True
+        self.stats["rebuilds"] += 1
+
+
+def _local_bounds(obj):
+    lower, upper, center, radius = obj.mesh.bounds
+    return np.concatenate([lower, upper, center, [radius]])
@@ -0,0 +1,113 @@
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+UPLOAD_BUDGET_MS = 2.0  # temps d'upload GL accordé par frame
+
+
+class AssetStreamer:
+    """Chargement d'assets en arrière-plan avec uploads GL étalés sur les frames.
+
+    Le travail CPU (lecture, décodage, parsing) tourne sur un pool de threads,
+    ou sur un pool de processus pour les calculs en Python pur qui, sur un
+    thread, garderaient le GIL et saccaderaient le rendu (simplification des
+    LOD) ; les uploads sont des générateurs exécutés sur le thread principal par
+    `update`, une étape après l'autre tant que le budget de la frame le permet.
+    Un chargement qui échoue est retiré de la file : l'asset garde son
+    placeholder et l'erreur est passée à son `on_error`, ou relancée une fois.
+    """
+    def __init__(self, workers=4, budget_ms=UPLOAD_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="assets")
+        self._processes = None  # créé au premier chargement qui en a besoin
+        self._loading = deque()  # (future, upload, on_error) dans l'ordre de soumission
+        self._uploads = deque()  # générateurs d'upload commencés ou prêts
+        self.stats = {"submitted": 0, "uploaded": 0, "failed": 0, "upload_ms": 0.0}
+
+    def submit(self, load, upload, on_error=None, process=False):
+        """`load()` tourne sur un worker ; `upload(résultat)` est un générateur exécuté sur le thread principal.
+
+        Avec `process`, `load` (sérialisable par pickle, ainsi que son résultat)
+        tourne dans un processus séparé. Si `load` lève, `on_error(exception)`
+        est appelé sur le thread principal (sans `on_error`, l'exception
+        remonte une seule fois de `update`).
+        """
+        pool = self._process_pool() if process else self._pool
+        self._loading.append((pool.submit(load), upload, on_error))
+        self.stats["submitted"] += 1
+
+    def load_texture(self, path, mipmaps=True, compress=False):
+        """Nom de texture 2D utilisable immédiatement (placeholder uni), complété en arrière-plan."""
+        from renderer import TextureSource
+        return self._load_texture_source(TextureSource.texture_2d(path, mipmaps, compress))
+
+    def load_cube_map(self, paths, mipmaps=True, compress=False):
+        from renderer import TextureSource
+        return self._load_texture_source(TextureSource.cube_map(paths, mipmaps, compress))
+
+    def _load_texture_source(self, source):
+        texture = source.create_placeholder()
+        self.submit(source.load, lambda datas: source.upload(texture, datas))
+        return texture
+
+    def _process_pool(self):
+        if self._processes is None:
+            # spawn : pas de fork d'un processus qui a des threads et un contexte GL
+            self._processes = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"))
+        return self._processes
+
+    @property
+    def pending(self):
+        return len(self._loading) + len(self._uploads)
+
+    def update(self, budget_ms=None):
+        """Avance les uploads pendant au plus `budget_ms` ; renvoie le nombre d'assets encore en attente.
+
+        Une étape commencée n'est jamais interrompue : le budget peut être dépassé
+        d'au plus une étape (un niveau de mipmap, un morceau de VBO).
+        """
+        budget = (self.budget_ms if budget_ms is None else budget_ms) / 1e3
+        start = time.perf_counter()
+
+        # Chargements terminés, gardés dans l'ordre de soumission ; la file est reconstruite
+        # avant de traiter les échecs, pour qu'un chargement raté n'y reste pas
+        loading, done = deque(), []
+        for entry in self._loading:
+            (done if entry[0].done() else loading).append(entry)
+        self._loading = loading
+        errors = []
+        for future, upload, on_error in done:
+            error = future.exception()
+            if error is None:
+                self._uploads.append(upload(future.result()))
+                continue
+            self.stats["failed"] += 1
+            if on_error is not None:
+                on_error(error)
+            else:
+                errors.append(error)
+
+        while self._uploads and time.perf_counter() - start < budget:
+            try:
+                next(self._uploads[0])
+            except StopIteration:
+                self._uploads.popleft()
+                self.stats["uploaded"] += 1
+
+        self.stats["upload_ms"] += (time.perf_counter() - start) * 1e3
+        if errors:
+            # Les autres assets ont avancé normalement ; l'échec n'est signalé qu'une fois
+            raise errors[0]
+        return self.pending
+
+    def finish(self):
+        """Attend tous les chargements et fait tous les uploads, sans limite de temps."""
+        while self.pending:
+            wait([future for future, _, _ in self._loading])
+            self.update(budget_ms=float('inf'))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=True, cancel_futures=True)
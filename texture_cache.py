@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from mesh_cache import cache_path, evict, read_array, source_info, valid_header, write_arrays
+
+# Cache des textures décodées : pixels déjà orientés pour glTexImage2D, mipmaps comprises
+CACHE_DIR = os.path.join(".cache", "textures")
+MAX_CACHE_BYTES = 1 << 30
+SUFFIX = ".tex"
+
+
+class TextureData:
+    """Niveaux de mipmap d'une image, du plus grand au plus petit.
+
+    Sans `compressed_format`, chaque niveau est un tableau (H, W, 3) uint8 dont
+    la ligne 0 est la première envoyée à OpenGL. Sinon ce sont les blocs
+    compressés tels que relus depuis le driver, et `sizes` donne (largeur, hauteur).
+    """
+    def __init__(self, levels, sizes=None, compressed_format=None):
+        self.levels = levels
+        self.sizes = sizes or [(level.shape[1], level.shape[0]) for level in levels]
+        self.compressed_format = compressed_format
+
+    @property
+    def width(self):
+        return self.sizes[0][0]
+
+    @property
+    def height(self):
+        return self.sizes[0][1]
+
+    @property
+    def nbytes(self):
+        return sum(level.nbytes for level in self.levels)
+
+
+def decode_image(path, flip_x=False, flip_y=False):
+    """Décode une image en RGB et applique les retournements demandés (une seule copie)."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        pixels = np.asarray(image.convert("RGB"))
+    if flip_y:
+        pixels = pixels[::-1]
+    if flip_x:
+        pixels = pixels[:, ::-1]
+    return np.ascontiguousarray(pixels)
+
+
+def build_mipmaps(pixels):
+    """Chaîne de mipmaps par moyenne arrondie de blocs 2x2 jusqu'au niveau 1x1."""
+    levels = [pixels]
+    level = pixels
+    while level.shape[0] > 1 or level.shape[1] > 1:
+        # Une dimension déjà à 1 est dupliquée pour garder des blocs 2x2
+        if level.shape[0] == 1:
+            level = np.concatenate([level, level], axis=0)
+        if level.shape[1] == 1:
+            level = np.concatenate([level, level], axis=1)
+        height, width = level.shape[0] // 2, level.shape[1] // 2
+        blocks = level[:height * 2, :width * 2].astype(np.uint16)
+        total = blocks[0::2, 0::2] + blocks[1::2, 0::2] + blocks[0::2, 1::2] + blocks[1::2, 1::2]
+        level = ((total + 2) >> 2).astype(np.uint8)
+        levels.append(level)
+    return levels
+
+
+def texture_variant(flip_x, flip_y, mipmaps, compressed_format=None):
+    return f"texture:{int(flip_x)}{int(flip_y)}{int(mipmaps)}:{compressed_format or 'raw'}"
+
+
+def load_texture_data(path, flip_x=False, flip_y=True, mipmaps=True, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Pixels orientés (et mipmaps) d'une image, depuis le cache disque ou décodés puis mis en cache.
+
+    Par défaut l'image est retournée verticalement : glTexImage2D attend la ligne du bas en premier.
+    """
+    variant = texture_variant(flip_x, flip_y, mipmaps)
+    data = read_texture_cache(path, variant, cache_dir)
+    if data is not None:
+        return data
+
+    pixels = decode_image(path, flip_x, flip_y)
+    data = TextureData(build_mipmaps(pixels) if mipmaps else [pixels])
+    write_texture_cache(path, variant, data, cache_dir, max_bytes)
+    return data
+
+
+def load_texture_datas(paths, workers=None, **options):
+    """load_texture_data sur plusieurs images en parallèle (PIL relâche le GIL pendant le décodage)."""
+    with ThreadPoolExecutor(workers or min(len(paths), os.cpu_count() or 1)) as pool:
+        return list(pool.map(lambda path: load_texture_data(path, **options), paths))
+
+
+def read_texture_cache(path, variant, cache_dir=CACHE_DIR):
+    target = cache_path(path, cache_dir, SUFFIX, variant)
+    header = valid_header(path, target)
+    if header is None:
+        return None
+    levels = [read_array(target, header, f"level{i}") for i in range(header["levels"])]
+    sizes = [tuple(size) for size in header["sizes"]]
+    return TextureData(levels, sizes, header.get("compressed_format"))
+
+
+def write_texture_cache(path, variant, data, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    target = cache_path(path, cache_dir, SUFFIX, variant)
+    info = dict(source_info(path), levels=len(data.levels), sizes=[list(size) for size in data.sizes],
+                compressed_format=data.compressed_format)
+    try:
+        write_arrays(target, {f"level{i}": level for i, level in enumerate(data.levels)}, info)
+        evict(cache_dir, max_bytes, SUFFIX)
+    except OSError:
+        # Cache en lecture seule ou disque plein : les pixels décodés restent utilisables
+        pass